@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, func
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, func
 from sqlalchemy.dialects.postgresql import JSONB
 from backend.sql_database import Base
 
@@ -6,10 +6,21 @@ from backend.sql_database import Base
 class CourseModel(Base):
     """SQLAlchemy model for courses table"""
     __tablename__ = "courses"
+    __table_args__ = (
+        # Keyset pagination order (see backend/pagination.py)
+        Index("ix_courses_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
     description = Column(Text)
     price = Column(Integer, default=0) # Price in BWP/USD
     modules = Column(JSONB, default=[])
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    final_exam = Column(JSONB, nullable=False, default=[], server_default="[]")
+    # Bumped by every write; exposed as the ETag for If-Match preconditions
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Lesson index derived from modules on every write (see backend/progress.py)
+    lesson_ids = Column(JSONB, nullable=False, default=[], server_default="[]")
+    lesson_count = Column(Integer, nullable=False, default=0, server_default="0")
+    quiz_count = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -1,14 +1,39 @@
-from typing import List, Optional
-from sqlalchemy import select
+from typing import List, Optional, Sequence
+from sqlalchemy import select, insert, update, delete, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from backend.course_model import CourseModel
+from backend.lesson_model import LessonModel
 from backend.schemas import CourseCreate, CourseUpdate
+from backend.pagination import Page, paginate, DEFAULT_PAGE_SIZE
+from backend.services.course_cache import course_cache
+from backend.json_patch import JsonPatchError, JsonPatchOperation, apply_patch, compile_patch
+from backend.lessons import sync_lessons
+from backend.grading import sync_answer_keys
+from backend.progress import lesson_ids_sql, lesson_index, quiz_count_sql, recount_course_progress
 
 
-async def get_courses(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[CourseModel]:
-    """Get all courses with pagination"""
-    result = await db.execute(select(CourseModel).offset(skip).limit(limit))
-    return result.scalars().all()
+class VersionConflictError(Exception):
+    """The course exists but no longer has the version the client's If-Match named."""
+
+    def __init__(self, current_version: int):
+        self.current_version = current_version
+        super().__init__(f"Course is at version {current_version}")
+
+
+async def _raise_if_version_conflict(db: AsyncSession, course_id: int, expected_version: Optional[int]):
+    """After a conditional write matched no row: raise if the course exists at another version."""
+    if expected_version is None:
+        return
+    result = await db.execute(select(CourseModel.version).where(CourseModel.id == course_id))
+    current = result.scalar_one_or_none()
+    if current is not None and current != expected_version:
+        raise VersionConflictError(current)
+
+
+async def get_courses(db: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None, options: Sequence = ()) -> Page:
+    """Get one page of courses, newest first (keyset pagination on created_at, id)"""
+    stmt = select(CourseModel).options(*options)
+    return await paginate(db, stmt, CourseModel.created_at, CourseModel.id, limit=limit, cursor=cursor)
 
 
 async def get_course(db: AsyncSession, course_id: int) -> Optional[CourseModel]:
@@ -17,48 +42,185 @@ async def get_course(db: AsyncSession, course_id: int) -> Optional[CourseModel]:
     return result.scalar_one_or_none()
 
 
-async def create_course(db: AsyncSession, course: CourseCreate) -> CourseModel:
-    """Create a new course"""
-    db_course = CourseModel(
-        title=course.title,
-        description=course.description,
-        modules=course.modules
+async def get_course_outline(db: AsyncSession, course_id: int) -> list:
+    """Course header columns joined to its lesson rows (minus text), in order; [] if no such course"""
+    result = await db.execute(
+        select(
+            CourseModel.id,
+            CourseModel.title,
+            CourseModel.description,
+            CourseModel.version,
+            CourseModel.lesson_count,
+            CourseModel.quiz_count,
+            LessonModel.module_idx,
+            LessonModel.lesson_idx,
+            LessonModel.lesson_id,
+            LessonModel.module_title,
+            LessonModel.type,
+            LessonModel.title.label("lesson_title"),
+        )
+        .outerjoin(LessonModel, LessonModel.course_id == CourseModel.id)
+        .where(CourseModel.id == course_id)
+        .order_by(LessonModel.module_idx, LessonModel.lesson_idx)
     )
-    db.add(db_course)
+    return result.all()
+
+
+async def get_lesson(db: AsyncSession, course_id: int, module_idx: int, lesson_idx: int) -> Optional[LessonModel]:
+    """Primary-key lookup of one lesson"""
+    return await db.get(LessonModel, (course_id, module_idx, lesson_idx))
+
+
+async def create_course(db: AsyncSession, course: CourseCreate) -> CourseModel:
+    """Create a new course (INSERT ... RETURNING, no follow-up SELECT)"""
+    db_course = await insert_course(db, course)
     await db.commit()
-    await db.refresh(db_course)
+    course_cache.invalidate_pages()
     return db_course
 
 
-async def update_course(db: AsyncSession, course_id: int, course: CourseUpdate) -> Optional[CourseModel]:
-    """Update an existing course"""
-    result = await db.execute(select(CourseModel).where(CourseModel.id == course_id))
+async def insert_course(db: AsyncSession, course: CourseCreate) -> CourseModel:
+    """
+    Insert a course with its lessons and answer keys without committing, for callers
+    that commit it together with other writes (then call course_cache.invalidate_pages()).
+    """
+    result = await db.execute(
+        insert(CourseModel)
+        .values(
+            title=course.title,
+            description=course.description,
+            modules=course.modules,
+            final_exam=course.final_exam,
+            **lesson_index(course.modules),
+        )
+        .returning(CourseModel)
+    )
+    db_course = result.scalar_one()
+    await sync_lessons(db, db_course.id)
+    await sync_answer_keys(db, db_course.id)
+    return db_course
+
+
+async def update_course(
+    db: AsyncSession, course_id: int, course: CourseUpdate, expected_version: Optional[int] = None
+) -> Optional[CourseModel]:
+    """Update an existing course in one UPDATE ... RETURNING statement"""
+    # Update only provided fields
+    values = course.model_dump(exclude_none=True)
+    if not values:
+        return await get_course(db, course_id)
+    old_lesson_ids = None
+    if "modules" in values:
+        values.update(lesson_index(values["modules"]))
+        # Lock the row while reading its current index so a concurrent write can't
+        # slip in between this read and the UPDATE and leave stale progress counts
+        result = await db.execute(
+            select(CourseModel.lesson_ids).where(CourseModel.id == course_id).with_for_update()
+        )
+        old_lesson_ids = result.scalar_one_or_none()
+
+    stmt = update(CourseModel).where(CourseModel.id == course_id)
+    if expected_version is not None:
+        stmt = stmt.where(CourseModel.version == expected_version)
+    result = await db.execute(
+        stmt.values(**values, version=CourseModel.version + 1)
+        .returning(CourseModel)
+        .execution_options(synchronize_session=False)
+    )
     db_course = result.scalar_one_or_none()
-    
     if db_course is None:
+        await _raise_if_version_conflict(db, course_id, expected_version)
         return None
-    
-    # Update only provided fields
-    if course.title is not None:
-        db_course.title = course.title
-    if course.description is not None:
-        db_course.description = course.description
-    if course.modules is not None:
-        db_course.modules = course.modules
-    
+
+    if "modules" in values:
+        await sync_lessons(db, course_id)
+        # As in patch_course_modules: edits that keep the lesson index leave every count as is
+        if values["lesson_ids"] != old_lesson_ids:
+            await recount_course_progress(db, course_id)
+    if "modules" in values or "final_exam" in values:
+        await sync_answer_keys(db, course_id)
     await db.commit()
-    await db.refresh(db_course)
+    course_cache.invalidate_course(course_id)
     return db_course
 
 
 async def delete_course(db: AsyncSession, course_id: int) -> bool:
-    """Delete a course by ID"""
-    result = await db.execute(select(CourseModel).where(CourseModel.id == course_id))
-    db_course = result.scalar_one_or_none()
-    
-    if db_course is None:
+    """Delete a course by ID in one DELETE ... RETURNING statement"""
+    result = await db.execute(
+        delete(CourseModel)
+        .where(CourseModel.id == course_id)
+        .returning(CourseModel.id)
+        .execution_options(synchronize_session=False)
+    )
+    if result.scalar_one_or_none() is None:
         return False
-    
-    await db.delete(db_course)
+
     await db.commit()
+    course_cache.invalidate_course(course_id)
     return True
+
+
+async def patch_course_modules(
+    db: AsyncSession, course_id: int, operations: List[JsonPatchOperation], expected_version: Optional[int] = None
+) -> Optional[int]:
+    """
+    Apply RFC 6902 operations to a course's modules inside Postgres (see backend/json_patch.py).
+
+    Returns the new version, or None if the course does not exist. Raises
+    VersionConflictError or JsonPatchError; nothing is written in either case.
+    """
+    laterals, patched, params = compile_patch(operations, "coalesce(c.modules, '[]'::jsonb)")
+    version_check = ""
+    if expected_version is not None:
+        version_check = "AND courses.version = :expected_version"
+        params["expected_version"] = expected_version
+    else:
+        # The patched document comes from the statement's snapshot, and READ COMMITTED
+        # re-checks only the target row after waiting on a concurrent writer. With no
+        # version fence (If-Match: *) the row is locked first so the UPDATE's snapshot
+        # already includes any edit committed ahead of this one.
+        await db.execute(select(CourseModel.id).where(CourseModel.id == course_id).with_for_update())
+    params["course_id"] = course_id
+
+    result = await db.execute(
+        text(f"""
+            UPDATE courses
+            SET modules = patched.doc,
+                version = courses.version + 1,
+                lesson_ids = indexed.lesson_ids,
+                lesson_count = jsonb_array_length(indexed.lesson_ids),
+                quiz_count = indexed.quiz_count
+            FROM (
+                SELECT {patched} AS doc, c.lesson_ids AS old_lesson_ids
+                FROM courses AS c
+                {laterals}
+                WHERE c.id = :course_id
+            ) AS patched
+            CROSS JOIN LATERAL (
+                SELECT {lesson_ids_sql("patched.doc")} AS lesson_ids, {quiz_count_sql("patched.doc")} AS quiz_count
+            ) AS indexed
+            WHERE courses.id = :course_id AND patched.doc IS NOT NULL {version_check}
+            RETURNING courses.version, indexed.lesson_ids IS DISTINCT FROM patched.old_lesson_ids AS index_changed
+        """),
+        params,
+    )
+    row = result.one_or_none()
+    if row is not None:
+        await sync_lessons(db, course_id)
+        await sync_answer_keys(db, course_id)
+        # Edits to lesson text leave the index, and so every enrollment's count, untouched
+        if row.index_changed:
+            await recount_course_progress(db, course_id)
+        await db.commit()
+        course_cache.invalidate_course(course_id)
+        return row.version
+
+    # Slow path, only on failure: work out why nothing was updated
+    await db.rollback()
+    db_course = await get_course(db, course_id)
+    if db_course is None:
+        return None
+    if expected_version is not None and db_course.version != expected_version:
+        raise VersionConflictError(db_course.version)
+    apply_patch(db_course.modules or [], operations)
+    raise JsonPatchError("Patch could not be applied")
@@ -5,8 +5,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from backend.sql_database import get_db
 from backend.sql_models import SQLUser
-from backend.models import User, TokenData
+from backend.models import TokenData
 from backend.security import SECRET_KEY, ALGORITHM
+from backend.services.principal_cache import Principal, principal_cache
+from backend.services.token_versions import token_versions
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/token")
 
@@ -24,16 +26,28 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
         token_data = TokenData(email=email)
     except JWTError:
         raise credentials_exception
-        
+
+    # Self-contained token: authorize from its claims as long as its version is current
+    if "ver" in payload and "uid" in payload:
+        if not await token_versions.is_current(db, payload["uid"], payload["ver"]):
+            raise credentials_exception
+        return Principal.from_claims(payload)
+
+    principal = principal_cache.get(token_data.email)
+    if principal is not None:
+        return principal
+
     result = await db.execute(select(SQLUser).where(SQLUser.email == token_data.email))
     user = result.scalar_one_or_none()
     
     if user is None:
         raise credentials_exception
-        
-    return User.model_validate(user)
 
-async def get_active_user(current_user: User = Depends(get_current_user)):
+    principal = Principal.from_row(user)
+    principal_cache.put(token_data.email, principal)
+    return principal
+
+async def get_active_user(current_user: Principal = Depends(get_current_user)):
     from datetime import datetime, timezone
     
     if current_user.disabled:
@@ -42,7 +56,11 @@ async def get_active_user(current_user: User = Depends(get_current_user)):
     # Check trial
     if current_user.trial_ends_at:
         now = datetime.now(timezone.utc)
-        if now > current_user.trial_ends_at:
+        trial_ends_at = current_user.trial_ends_at
+        if trial_ends_at.tzinfo is None:
+            # Stored as naive UTC
+            trial_ends_at = trial_ends_at.replace(tzinfo=timezone.utc)
+        if now > trial_ends_at:
             # If trial is over, check subscription
             if current_user.subscription_status != 'active':
                 raise HTTPException(
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, func
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Index, func
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from backend.sql_database import Base
@@ -7,6 +7,13 @@ import uuid
 class EnrollmentModel(Base):
     """SQLAlchemy model for course enrollments and progress tracking"""
     __tablename__ = "enrollments"
+    __table_args__ = (
+        # Serves both the per-user filter and the keyset pagination order
+        Index("ix_enrollments_user_enrolled_at_id", "user_id", "enrolled_at", "id"),
+        # One enrollment per learner and course; also serves /check and pay-certificate lookups
+        Index("uq_enrollments_user_course", "user_id", "course_id", unique=True),
+        Index("ix_enrollments_course_id", "course_id"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
@@ -16,7 +23,10 @@ class EnrollmentModel(Base):
     # Structure: { "module_id": { "lesson_id": true/false }, "overall_percent": 0-100 }
     progress_data = Column(JSONB, default={})
     
+    # True ticks that match a lesson in the course's lesson index
+    completed_lessons = Column(Integer, nullable=False, default=0, server_default="0")
+
     is_completed = Column(Boolean, default=False)
     is_paid = Column(Boolean, default=False) # For certificate collection
     last_accessed = Column(DateTime(timezone=True), server_default=func.now())
-    enrolled_at = Column(DateTime(timezone=True), server_default=func.now())
+    enrolled_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
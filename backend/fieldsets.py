@@ -0,0 +1,62 @@
+"""
+Sparse fieldsets for list endpoints.
+
+`?fields=id,title` or `?view=summary` picks the columns a client needs. The selection is
+pushed into SQL with load_only(), so heavy JSONB columns (course modules, enrollment
+progress) are never read or serialized unless asked for. Routes pair this with an
+all-optional response model and response_model_exclude_unset=True.
+"""
+from typing import Any, Iterable, Literal, Optional, Sequence, Tuple, Type
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+from sqlalchemy.orm import load_only
+
+
+class FieldSet:
+    def __init__(self, model: Type, schema: Type[BaseModel], summary: Sequence[str], keys: Sequence[str] = ("id",)):
+        """
+        model: ORM class; schema: full response model whose fields name the selectable columns;
+        summary: fields for view=summary; keys: columns always loaded (ids, pagination keys).
+        """
+        self.model = model
+        self.fields = tuple(schema.model_fields)
+        self.summary = tuple(summary)
+        self.keys = tuple(keys)
+
+    def resolve(self, fields: Optional[str] = None, view: str = "full") -> Optional[Tuple[str, ...]]:
+        """Return the selected field names, or None for the full representation."""
+        if fields:
+            requested = [name.strip() for name in fields.split(",") if name.strip()]
+            unknown = sorted(set(requested) - set(self.fields))
+            if unknown:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(self.fields)}",
+                )
+            # The id is always returned so clients can address what they listed
+            return tuple(dict.fromkeys(["id", *requested]))
+        if view == "summary":
+            return self.summary
+        return None
+
+    def params(self):
+        """FastAPI dependency parsing ?fields= and ?view= for this resource."""
+        def dependency(
+            fields: Optional[str] = Query(None, description=f"Comma-separated subset of: {', '.join(self.fields)}"),
+            view: Literal["full", "summary"] = Query("full", description="summary omits heavy JSON columns"),
+        ) -> Optional[Tuple[str, ...]]:
+            return self.resolve(fields, view)
+
+        return dependency
+
+    def load_options(self, selected: Optional[Iterable[str]]) -> list:
+        if selected is None:
+            return []
+        columns = dict.fromkeys([*self.keys, *selected])
+        return [load_only(*(getattr(self.model, name) for name in columns))]
+
+    def project(self, obj: Any, selected: Optional[Iterable[str]]):
+        """Return obj untouched for the full view, else a dict of just the selected attributes."""
+        if selected is None:
+            return obj
+        return {name: getattr(obj, name) for name in selected}
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, Float, String, Text, DateTime, Index, func
+from sqlalchemy.dialects.postgresql import JSONB
+from backend.sql_database import Base
+
+
+class GenerationCacheModel(Base):
+    """
+    A generated course shared by every request for the same normalized topic, audience
+    and prompt version (see backend/services/generation_cache.py).
+    """
+    __tablename__ = "generation_cache"
+    __table_args__ = (
+        Index("ix_generation_cache_expires_at", "expires_at"),
+    )
+
+    key = Column(String(64), primary_key=True)  # sha256 of prompt version, topic, audience
+    prompt_version = Column(String(32), nullable=False)
+    topic = Column(Text, nullable=False)
+    target_audience = Column(Text, nullable=False)
+    course = Column(JSONB, nullable=False)
+    # What producing the course cost, credited to the savings on every hit
+    model_calls = Column(Integer, nullable=False, default=0)
+    generation_seconds = Column(Float, nullable=False, default=0)
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,44 @@
+import uuid
+from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, DateTime, Index, func
+from sqlalchemy.dialects.postgresql import JSONB
+from backend.sql_database import Base
+
+
+class GenerationJobModel(Base):
+    """
+    An AI course generation requested through POST /api/ai/jobs and run in the background
+    by GenerationJobWorker (see backend/services/generation_jobs.py).
+    """
+    __tablename__ = "generation_jobs"
+    __table_args__ = (
+        Index(
+            "ix_generation_jobs_runnable",
+            "run_after",
+            postgresql_where="status IN ('queued', 'running')",
+        ),
+        Index("ix_generation_jobs_user_created", "user_id", "created_at"),
+        Index(
+            "uq_generation_jobs_user_idempotency_key",
+            "user_id",
+            "idempotency_key",
+            unique=True,
+            postgresql_where="idempotency_key IS NOT NULL",
+        ),
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    idempotency_key = Column(String(128), nullable=True)
+    status = Column(String(16), nullable=False, default="queued")  # queued, running, succeeded, failed
+    topic = Column(Text, nullable=False)
+    target_audience = Column(String, nullable=True)
+    save_course = Column(Boolean, nullable=False, default=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    # Queued: earliest start. Running: lease expiry, after which another worker may reclaim it
+    run_after = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    result = Column(JSONB, nullable=True)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="SET NULL"), nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,254 @@
+"""
+Server-side quiz grading.
+
+Each quiz of a course (module quizzes, named by module position "0", "1", ..., and the
+"final" exam) has an answer key materialized into quiz_answer_keys by sync_answer_keys()
+on every course write: one byte per question holding the index of the correct option.
+Submissions use the same encoding, so a score is the number of equal bytes, and a whole
+batch is graded with one big-integer XOR instead of a Python loop over questions.
+"""
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+FINAL_EXAM = "final"
+MAX_OPTIONS = 250
+# Key byte for a question whose correct_answer is not among its options; matches nothing
+NO_CORRECT_OPTION = 254
+UNANSWERED = 255
+
+_HIT = bytes([1] + [0] * 255)
+# Module positions; at most 9 digits so the index fits the int it is cast to in SQL
+_MODULE_QUIZ = re.compile(r"[0-9]{1,9}")
+
+
+class QuizNotFoundError(LookupError):
+    pass
+
+
+class SubmissionLengthError(ValueError):
+    pass
+
+
+class NotEnrolledError(LookupError):
+    pass
+
+
+@dataclass
+class BatchGrade:
+    scores: List[int]
+    # How many submissions answered each question correctly (item analysis)
+    question_correct: List[int]
+
+
+def is_quiz_name(quiz: str) -> bool:
+    # Not str.isdigit(): it accepts characters such as "²" that int() rejects
+    return quiz == FINAL_EXAM or _MODULE_QUIZ.fullmatch(quiz) is not None
+
+
+def encode_answers(answers: Sequence[Optional[int]], length: int) -> bytes:
+    """One byte per question; missing or out-of-range choices become UNANSWERED."""
+    if len(answers) > length:
+        raise SubmissionLengthError(f"Quiz has {length} questions, got {len(answers)} answers")
+    encoded = bytearray([UNANSWERED]) * length
+    for i, choice in enumerate(answers):
+        if choice is not None and 0 <= choice < MAX_OPTIONS:
+            encoded[i] = choice
+    return bytes(encoded)
+
+
+def grade_batch(key: bytes, submissions: Sequence[bytes]) -> BatchGrade:
+    """Grade encoded submissions (each len(key) bytes) against `key`."""
+    questions, count = len(key), len(submissions)
+    if not questions or not count:
+        return BatchGrade(scores=[0] * count, question_correct=[0] * questions)
+    size = questions * count
+    # Equal bytes XOR to zero; map zero bytes to 1 and everything else to 0
+    diff = int.from_bytes(b"".join(submissions), "big") ^ int.from_bytes(key * count, "big")
+    hits = diff.to_bytes(size, "big").translate(_HIT)
+    return BatchGrade(
+        scores=[hits.count(1, start, start + questions) for start in range(0, size, questions)],
+        question_correct=[hits[i::questions].count(1) for i in range(questions)],
+    )
+
+
+def correct_flags(key: bytes, answers: bytes) -> List[bool]:
+    return [expected == given for expected, given in zip(key, answers)]
+
+
+def without_answers(questions: Any) -> Any:
+    """A quiz's questions as learners may see them: every correct_answer removed."""
+    if not isinstance(questions, list):
+        return questions
+    return [
+        {name: value for name, value in question.items() if name != "correct_answer"}
+        if isinstance(question, dict) else question
+        for question in questions
+    ]
+
+
+def modules_without_answers(modules: Any) -> Any:
+    """Course modules with each module quiz passed through without_answers()."""
+    if not isinstance(modules, list):
+        return modules
+    return [
+        {**module, "quiz": without_answers(module["quiz"])} if isinstance(module, dict) and "quiz" in module else module
+        for module in modules
+    ]
+
+
+# --- Answer keys ---
+
+def _answer_key_sql(questions: str) -> str:
+    """bytea answer key of a jsonb array of {"question", "options", "correct_answer"}."""
+    correct = f"""coalesce((
+        SELECT (option.pos - 1)::int
+        FROM jsonb_array_elements(
+            CASE WHEN jsonb_typeof(question.value -> 'options') = 'array'
+                 THEN question.value -> 'options' ELSE '[]'::jsonb END
+        ) WITH ORDINALITY AS option(value, pos)
+        WHERE option.value = question.value -> 'correct_answer' AND option.pos <= {MAX_OPTIONS}
+        ORDER BY option.pos
+        LIMIT 1
+    ), {NO_CORRECT_OPTION})"""
+    return f"""(
+        SELECT decode(string_agg(lpad(to_hex({correct}), 2, '0'), '' ORDER BY question.pos), 'hex')
+        FROM jsonb_array_elements(
+            CASE WHEN jsonb_typeof({questions}) = 'array' THEN {questions} ELSE '[]'::jsonb END
+        ) WITH ORDINALITY AS question(value, pos)
+    )"""
+
+
+def answer_key_source_sql(course_filter: str) -> str:
+    """SELECT (course_id, quiz, answers) for every non-empty quiz of courses matching `course_filter` (alias c)."""
+    return f"""
+        SELECT c.id, (module.pos - 1)::text, {_answer_key_sql("module.value -> 'quiz'")}
+        FROM courses AS c
+        CROSS JOIN LATERAL jsonb_array_elements(
+            CASE WHEN jsonb_typeof(c.modules) = 'array' THEN c.modules ELSE '[]'::jsonb END
+        ) WITH ORDINALITY AS module(value, pos)
+        WHERE {course_filter} AND jsonb_typeof(module.value -> 'quiz') = 'array'
+            AND jsonb_array_length(module.value -> 'quiz') > 0
+        UNION ALL
+        SELECT c.id, '{FINAL_EXAM}', {_answer_key_sql("c.final_exam")}
+        FROM courses AS c
+        WHERE {course_filter} AND jsonb_typeof(c.final_exam) = 'array' AND jsonb_array_length(c.final_exam) > 0
+    """
+
+
+SYNC_ANSWER_KEYS_SQL = f"""
+    WITH source (course_id, quiz, answers) AS ({answer_key_source_sql("c.id = :course_id")}),
+    removed AS (
+        DELETE FROM quiz_answer_keys AS k
+        WHERE k.course_id = :course_id AND NOT EXISTS (SELECT 1 FROM source AS s WHERE s.quiz = k.quiz)
+    )
+    INSERT INTO quiz_answer_keys (course_id, quiz, answers)
+    SELECT course_id, quiz, answers FROM source
+    ON CONFLICT (course_id, quiz) DO UPDATE SET answers = EXCLUDED.answers
+    WHERE quiz_answer_keys.answers IS DISTINCT FROM EXCLUDED.answers
+"""
+
+# The questions a learner sees: everything but correct_answer
+QUIZ_QUESTIONS_SQL = f"""
+    SELECT coalesce(jsonb_agg(question.value - 'correct_answer' ORDER BY question.pos), '[]'::jsonb)
+    FROM courses AS c
+    CROSS JOIN LATERAL (
+        SELECT CASE WHEN CAST(:quiz AS text) = '{FINAL_EXAM}' THEN c.final_exam
+                    ELSE c.modules -> CAST(:module_idx AS int) -> 'quiz' END AS questions
+    ) AS quiz
+    CROSS JOIN LATERAL jsonb_array_elements(
+        CASE WHEN jsonb_typeof(quiz.questions) = 'array' THEN quiz.questions ELSE '[]'::jsonb END
+    ) WITH ORDINALITY AS question(value, pos)
+    WHERE c.id = :course_id
+"""
+
+# Many attempts in one statement, one array parameter per column
+RECORD_ATTEMPTS_SQL = """
+    INSERT INTO quiz_attempts (user_id, course_id, quiz, answers, score, total)
+    SELECT attempt.user_id, :course_id, :quiz, attempt.answers, attempt.score, :total
+    FROM unnest(CAST(:user_ids AS varchar[]), CAST(:answers AS bytea[]), CAST(:scores AS smallint[]))
+        AS attempt(user_id, answers, score)
+    RETURNING id
+"""
+
+
+async def sync_answer_keys(db: AsyncSession, course_id: int):
+    """Re-derive a course's answer keys from its quizzes; call in the writing transaction."""
+    await db.execute(text(SYNC_ANSWER_KEYS_SQL), {"course_id": course_id})
+
+
+async def get_answer_key(db: AsyncSession, course_id: int, quiz: str) -> bytes:
+    result = await db.execute(
+        text("SELECT answers FROM quiz_answer_keys WHERE course_id = :course_id AND quiz = :quiz"),
+        {"course_id": course_id, "quiz": quiz},
+    )
+    answers = result.scalar_one_or_none()
+    if answers is None:
+        raise QuizNotFoundError(f"Course {course_id} has no quiz {quiz!r}")
+    return bytes(answers)
+
+
+async def record_attempts(
+    db: AsyncSession, course_id: int, quiz: str, total: int,
+    user_ids: Sequence[str], answers: Sequence[bytes], scores: Sequence[int],
+) -> List[int]:
+    """Store graded attempts (answers as their encoded bytes) in one INSERT; returns their ids."""
+    result = await db.execute(
+        text(RECORD_ATTEMPTS_SQL),
+        {
+            "course_id": course_id,
+            "quiz": quiz,
+            "total": total,
+            "user_ids": list(user_ids),
+            "answers": list(answers),
+            "scores": list(scores),
+        },
+    )
+    return list(result.scalars().all())
+
+
+async def lock_attempt_count(db: AsyncSession, user_id: str, course_id: int, quiz: str) -> int:
+    """
+    How many attempts the user has recorded at a quiz, counted while holding their
+    enrollment row so that concurrent submissions can't both get under the attempt
+    limit. Raises NotEnrolledError if they are not enrolled in the course.
+    """
+    enrolled = await db.execute(
+        text("SELECT 1 FROM enrollments WHERE user_id = :user_id AND course_id = :course_id FOR NO KEY UPDATE"),
+        {"user_id": user_id, "course_id": course_id},
+    )
+    if enrolled.scalar_one_or_none() is None:
+        raise NotEnrolledError(f"User {user_id} is not enrolled in course {course_id}")
+    # A separate statement, so its snapshot is taken after the lock is granted
+    result = await db.execute(
+        text("SELECT count(*) FROM quiz_attempts WHERE user_id = :user_id AND course_id = :course_id AND quiz = :quiz"),
+        {"user_id": user_id, "course_id": course_id, "quiz": quiz},
+    )
+    return result.scalar_one()
+
+
+async def find_unknown_users(db: AsyncSession, user_ids: Sequence[str]) -> List[str]:
+    """The distinct ids among `user_ids` that no user has, in one query."""
+    result = await db.execute(
+        text("""
+            SELECT DISTINCT candidate.id
+            FROM unnest(CAST(:user_ids AS varchar[])) AS candidate(id)
+            WHERE NOT EXISTS (SELECT 1 FROM users WHERE users.id = candidate.id)
+            ORDER BY candidate.id
+        """),
+        {"user_ids": list(user_ids)},
+    )
+    return list(result.scalars().all())
+
+
+async def get_quiz_questions(db: AsyncSession, course_id: int, quiz: str) -> List[Dict]:
+    result = await db.execute(
+        text(QUIZ_QUESTIONS_SQL),
+        {"course_id": course_id, "quiz": quiz, "module_idx": 0 if quiz == FINAL_EXAM else int(quiz)},
+    )
+    questions = result.scalar_one()
+    if not questions:
+        raise QuizNotFoundError(f"Course {course_id} has no quiz {quiz!r}")
+    return questions
@@ -0,0 +1,208 @@
+"""
+RFC 6902 JSON Patch for JSONB columns.
+
+compile_patch() turns a list of operations into one SQL expression chain built from
+jsonb_set / jsonb_insert / #- / #>, so Postgres applies the edit in place and the client
+never re-uploads the document. Each step runs in its own LATERAL subquery and yields SQL
+NULL when its precondition fails (missing path, failed test), which makes the whole
+chain NULL. apply_patch() is the pure-Python equivalent, used to explain such failures.
+"""
+import copy
+import json
+import re
+from typing import Any, Dict, List, Literal, Optional, Tuple
+from pydantic import BaseModel, ConfigDict, Field
+
+MAX_PATCH_OPERATIONS = 100
+
+_ARRAY_INDEX = re.compile(r"^(0|[1-9][0-9]*)$")
+_NEGATIVE_INDEX = re.compile(r"^-[0-9]+$")
+
+
+class JsonPatchOperation(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+    op: Literal["add", "remove", "replace", "move", "copy", "test"]
+    path: str
+    value: Any = None
+    from_: Optional[str] = Field(None, alias="from")
+
+
+class JsonPatchError(ValueError):
+    def __init__(self, message: str, index: Optional[int] = None):
+        self.index = index
+        super().__init__(message if index is None else f"Operation {index}: {message}")
+
+
+def parse_pointer(pointer: str, index: Optional[int] = None) -> List[str]:
+    """Split a JSON Pointer ("/0/lessons/2") into unescaped tokens."""
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer {pointer!r}", index)
+    tokens = [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+    # Postgres path operators count negative indexes from the end; JSON Pointer has no such thing
+    if any(_NEGATIVE_INDEX.match(token) for token in tokens):
+        raise JsonPatchError(f"Invalid array index in {pointer!r}", index)
+    return tokens
+
+
+def _validate(operations: List[JsonPatchOperation]):
+    if len(operations) > MAX_PATCH_OPERATIONS:
+        raise JsonPatchError(f"At most {MAX_PATCH_OPERATIONS} operations per patch")
+    for i, operation in enumerate(operations):
+        if operation.op in ("add", "replace", "test") and "value" not in operation.model_fields_set:
+            raise JsonPatchError(f"'{operation.op}' requires a value", i)
+        if operation.op in ("move", "copy") and operation.from_ is None:
+            raise JsonPatchError(f"'{operation.op}' requires 'from'", i)
+        path = parse_pointer(operation.path, i)
+        if not path and operation.op != "test":
+            raise JsonPatchError("Replacing the whole document is not supported; use PUT", i)
+        if operation.op == "move":
+            source = parse_pointer(operation.from_, i)
+            if not source or path[:len(source)] == source and len(path) > len(source):
+                raise JsonPatchError("Cannot move a value into itself", i)
+
+
+# --- SQL compilation ---
+
+def _add_sql(doc: str, path: List[str], value: str, p: str, params: Dict[str, Any]) -> str:
+    """Expression adding `value` at `path` in `doc`, or NULL if the parent does not exist."""
+    params[f"{p}_path"] = path
+    params[f"{p}_parent"] = path[:-1]
+    parent = f"{doc} #> CAST(:{p}_parent AS text[])"
+    branches = [f"WHEN jsonb_typeof({parent}) = 'object' THEN jsonb_set({doc}, CAST(:{p}_path AS text[]), {value}, true)"]
+    last = path[-1]
+    if last == "-":
+        params[f"{p}_append"] = path[:-1] + ["-1"]
+        branches.append(
+            f"WHEN jsonb_typeof({parent}) = 'array' "
+            f"THEN jsonb_insert({doc}, CAST(:{p}_append AS text[]), {value}, true)"
+        )
+    elif _ARRAY_INDEX.match(last):
+        # jsonb_insert clamps out-of-range indexes; RFC 6902 requires an error instead
+        branches.append(
+            f"WHEN jsonb_typeof({parent}) = 'array' AND {int(last)} <= jsonb_array_length({parent}) "
+            f"THEN jsonb_insert({doc}, CAST(:{p}_path AS text[]), {value}, false)"
+        )
+    return "CASE " + " ".join(branches) + " END"
+
+
+def compile_patch(operations: List[JsonPatchOperation], source: str) -> Tuple[str, str, Dict[str, Any]]:
+    """
+    Compile operations applied to the jsonb expression `source` (e.g. "c.modules").
+
+    Returns (lateral_sql, result_expr, params): append lateral_sql after a FROM clause that
+    provides `source`; result_expr is the patched document, NULL if any operation failed.
+    """
+    _validate(operations)
+    params: Dict[str, Any] = {}
+    laterals = []
+    doc = source
+    step = 0
+
+    def push(doc_expr: str, val_expr: str = "NULL::jsonb") -> str:
+        nonlocal step
+        alias = f"patch_{step}"
+        laterals.append(f"CROSS JOIN LATERAL (SELECT {doc_expr} AS doc, {val_expr} AS val) AS {alias}")
+        step += 1
+        return alias
+
+    for i, operation in enumerate(operations):
+        p = f"op{i}"
+        path = parse_pointer(operation.path, i)
+        params[f"{p}_path"] = path
+        path_sql = f"CAST(:{p}_path AS text[])"
+        if operation.op in ("add", "replace", "test"):
+            params[f"{p}_value"] = json.dumps(operation.value)
+            value_sql = f"CAST(:{p}_value AS jsonb)"
+
+        if operation.op == "add":
+            alias = push(_add_sql(doc, path, value_sql, p, params))
+        elif operation.op == "remove":
+            alias = push(f"CASE WHEN {doc} #> {path_sql} IS NOT NULL THEN {doc} #- {path_sql} END")
+        elif operation.op == "replace":
+            alias = push(
+                f"CASE WHEN {doc} #> {path_sql} IS NOT NULL "
+                f"THEN jsonb_set({doc}, {path_sql}, {value_sql}, false) END"
+            )
+        elif operation.op == "test":
+            alias = push(f"CASE WHEN {doc} #> {path_sql} = {value_sql} THEN {doc} END")
+        else:
+            params[f"{p}_from"] = parse_pointer(operation.from_, i)
+            from_sql = f"CAST(:{p}_from AS text[])"
+            if operation.op == "copy":
+                alias = push(_add_sql(doc, path, f"({doc} #> {from_sql})", p, params))
+            else:
+                # move = remove the source, carrying its value, then add it at the target
+                carried = push(
+                    f"CASE WHEN {doc} #> {from_sql} IS NOT NULL THEN {doc} #- {from_sql} END",
+                    f"{doc} #> {from_sql}",
+                )
+                alias = push(_add_sql(f"{carried}.doc", path, f"{carried}.val", p, params))
+        doc = f"{alias}.doc"
+
+    return "\n".join(laterals), doc, params
+
+
+# --- Python reference implementation ---
+
+def _resolve(doc: Any, tokens: List[str], index: int) -> Any:
+    for token in tokens:
+        if isinstance(doc, dict) and token in doc:
+            doc = doc[token]
+        elif isinstance(doc, list) and _ARRAY_INDEX.match(token) and int(token) < len(doc):
+            doc = doc[int(token)]
+        else:
+            raise JsonPatchError(f"Path /{'/'.join(tokens)} does not exist", index)
+    return doc
+
+
+def _add(doc: Any, tokens: List[str], value: Any, index: int):
+    parent = _resolve(doc, tokens[:-1], index)
+    last = tokens[-1]
+    if isinstance(parent, dict):
+        parent[last] = value
+    elif isinstance(parent, list):
+        if last == "-":
+            parent.append(value)
+        elif _ARRAY_INDEX.match(last) and int(last) <= len(parent):
+            parent.insert(int(last), value)
+        else:
+            raise JsonPatchError(f"Array index {last!r} out of range", index)
+    else:
+        raise JsonPatchError(f"Cannot add to a scalar at /{'/'.join(tokens[:-1])}", index)
+
+
+def _remove(doc: Any, tokens: List[str], index: int) -> Any:
+    value = _resolve(doc, tokens, index)
+    parent = _resolve(doc, tokens[:-1], index)
+    if isinstance(parent, dict):
+        del parent[tokens[-1]]
+    else:
+        del parent[int(tokens[-1])]
+    return value
+
+
+def apply_patch(document: Any, operations: List[JsonPatchOperation]) -> Any:
+    """Apply operations to a copy of `document`; raises JsonPatchError naming the failing operation."""
+    _validate(operations)
+    doc = copy.deepcopy(document)
+    for i, operation in enumerate(operations):
+        tokens = parse_pointer(operation.path, i)
+        if operation.op == "add":
+            _add(doc, tokens, copy.deepcopy(operation.value), i)
+        elif operation.op == "remove":
+            _remove(doc, tokens, i)
+        elif operation.op == "replace":
+            _remove(doc, tokens, i)
+            _add(doc, tokens, copy.deepcopy(operation.value), i)
+        elif operation.op == "test":
+            if _resolve(doc, tokens, i) != operation.value:
+                raise JsonPatchError(f"Test failed at {operation.path}", i)
+        elif operation.op == "copy":
+            value = _resolve(doc, parse_pointer(operation.from_, i), i)
+            _add(doc, tokens, copy.deepcopy(value), i)
+        else:
+            value = _remove(doc, parse_pointer(operation.from_, i), i)
+            _add(doc, tokens, value, i)
+    return doc
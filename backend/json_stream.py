@@ -0,0 +1,119 @@
+"""
+Incremental scanning of a JSON document that arrives in chunks.
+
+A streamed model response is one JSON object, possibly preceded by prose or a Markdown
+fence. JsonStreamScanner tracks nesting, strings and object keys across feed() calls and
+reports each value the moment its closing character arrives, together with its path from
+the root (object keys and array indexes), so a caller can act on a finished
+"modules"[i] long before the rest of the document has been generated.
+"""
+import json
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple, Union
+
+PathItem = Union[str, int]
+
+
+@dataclass
+class _Frame:
+    kind: str  # "object" or "array"
+    start: int
+    location: Optional[PathItem]  # key or index within the parent; None for the root
+    key: Optional[str] = None
+    expect_key: bool = True
+    index: int = 0
+
+
+@dataclass
+class CompletedValue:
+    path: Tuple[PathItem, ...]
+    raw: str
+
+    def value(self) -> Any:
+        return json.loads(self.raw)
+
+
+class JsonStreamScanner:
+    """
+    Feed text chunks; get back the strings, objects and arrays completed by each chunk.
+    Scalars other than strings are not reported on their own, only as part of their
+    container. Text before the first "{" is skipped; `done` is set once it is closed.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self.started = False
+        self.done = False
+
+    @property
+    def text(self) -> str:
+        """The document from its opening brace up to what has been fed so far."""
+        return self._text
+
+    def _location(self) -> Optional[PathItem]:
+        parent = self._stack[-1]
+        return parent.key if parent.kind == "object" else parent.index
+
+    def _path(self, location: Optional[PathItem]) -> Tuple[PathItem, ...]:
+        return tuple(frame.location for frame in self._stack[1:]) + (
+            () if location is None else (location,)
+        )
+
+    def feed(self, chunk: str) -> List[CompletedValue]:
+        completed: List[CompletedValue] = []
+        if self.done:
+            return completed
+        base = len(self._text)
+        if not self.started:
+            brace = chunk.find("{")
+            if brace < 0:
+                return completed
+            chunk = chunk[brace:]
+        self._text += chunk
+
+        for i, c in enumerate(chunk):
+            pos = base + i
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    raw = self._text[self._string_start:pos + 1]
+                    frame = self._stack[-1]
+                    if frame.kind == "object" and frame.expect_key:
+                        frame.key = json.loads(raw)
+                        frame.expect_key = False
+                    else:
+                        completed.append(CompletedValue(self._path(self._location()), raw))
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif c in "{[":
+                location = self._location() if self._stack else None
+                self._stack.append(_Frame("object" if c == "{" else "array", pos, location))
+                self.started = True
+            elif c in "}]":
+                frame = self._stack.pop()
+                raw = self._text[frame.start:pos + 1]
+                if not self._stack:
+                    completed.append(CompletedValue((), raw))
+                    self.done = True
+                    self._text = raw
+                    break
+                completed.append(CompletedValue(self._path(frame.location), raw))
+            elif c == "," and self._stack:
+                frame = self._stack[-1]
+                if frame.kind == "object":
+                    frame.key = None
+                    frame.expect_key = True
+                else:
+                    frame.index += 1
+        return completed
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from backend.sql_database import Base
+
+
+class LessonModel(Base):
+    """
+    One lesson of a course, materialized from courses.modules on every course write
+    (see crud.sync_lessons) so a single lesson can be served by primary key.
+    """
+    __tablename__ = "lessons"
+
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), primary_key=True)
+    module_idx = Column(Integer, primary_key=True)
+    lesson_idx = Column(Integer, primary_key=True)
+    # "<module id>/<lesson id>", the key used in courses.lesson_ids and progress ticks
+    lesson_id = Column(String, nullable=False)
+    module_title = Column(String)
+    type = Column(String)
+    title = Column(String)
+    text = Column(Text)
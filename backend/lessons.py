@@ -0,0 +1,47 @@
+"""
+The lessons table: courses.modules materialized one row per lesson.
+
+Rows are keyed (course_id, module_idx, lesson_idx), both 0-based positions, and are
+re-derived from the stored document by sync_lessons() inside every course write, so
+they can never disagree with it. Unchanged lessons are not rewritten.
+"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.progress import LESSON_ID_SQL, lesson_rows_sql
+
+LESSON_COLUMNS = "course_id, module_idx, lesson_idx, lesson_id, module_title, type, title, text"
+
+
+def lesson_source_sql(course_filter: str) -> str:
+    """SELECT producing the lessons rows of every course matching `course_filter` (on alias c)."""
+    return f"""
+        SELECT c.id, (module.pos - 1)::int, (lesson.pos - 1)::int, {LESSON_ID_SQL},
+               module.value ->> 'title', lesson.value ->> 'type', lesson.value ->> 'title',
+               lesson.value ->> 'text'
+        FROM courses AS c
+        CROSS JOIN LATERAL {lesson_rows_sql("c.modules")}
+        WHERE {course_filter}
+    """
+
+
+SYNC_LESSONS_SQL = f"""
+    WITH source ({LESSON_COLUMNS}) AS ({lesson_source_sql("c.id = :course_id")}),
+    removed AS (
+        DELETE FROM lessons AS l
+        WHERE l.course_id = :course_id AND NOT EXISTS (
+            SELECT 1 FROM source AS s WHERE s.module_idx = l.module_idx AND s.lesson_idx = l.lesson_idx
+        )
+    )
+    INSERT INTO lessons ({LESSON_COLUMNS})
+    SELECT {LESSON_COLUMNS} FROM source
+    ON CONFLICT (course_id, module_idx, lesson_idx) DO UPDATE
+    SET lesson_id = EXCLUDED.lesson_id, module_title = EXCLUDED.module_title, type = EXCLUDED.type,
+        title = EXCLUDED.title, text = EXCLUDED.text
+    WHERE (lessons.lesson_id, lessons.module_title, lessons.type, lessons.title, lessons.text)
+        IS DISTINCT FROM (EXCLUDED.lesson_id, EXCLUDED.module_title, EXCLUDED.type, EXCLUDED.title, EXCLUDED.text)
+"""
+
+
+async def sync_lessons(db: AsyncSession, course_id: int):
+    """Bring a course's lesson rows in line with its modules; call in the writing transaction."""
+    await db.execute(text(SYNC_LESSONS_SQL), {"course_id": course_id})
@@ -0,0 +1,118 @@
+"""
+Versioned schema migrations.
+
+Each module in backend/migrations/versions is named NNNN_description.py and defines
+`async def upgrade(conn)`. Versions are applied in order and recorded in the
+schema_version table. A module may set TRANSACTIONAL = False (e.g. for
+CREATE INDEX CONCURRENTLY) to run in autocommit mode instead of one transaction.
+
+Apply pending migrations once per deploy, not from every replica:
+    python -m backend.migrations upgrade
+"""
+import importlib
+import logging
+import pkgutil
+import re
+from typing import Iterable, List, Tuple
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+VERSIONS_PACKAGE = "backend.migrations.versions"
+_NAME_PATTERN = re.compile(r"^(\d{4})_(\w+)$")
+# Arbitrary constant shared by every migrator so only one runs at a time
+_ADVISORY_LOCK_KEY = 724_385_001
+
+CREATE_VERSION_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name VARCHAR NOT NULL,
+        applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+    )
+"""
+
+
+def discover() -> List[Tuple[int, str, object]]:
+    """Return (version, name, module) for every migration, in order."""
+    from backend.migrations import versions
+
+    found = []
+    for info in pkgutil.iter_modules(versions.__path__):
+        match = _NAME_PATTERN.match(info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{VERSIONS_PACKAGE}.{info.name}")
+        found.append((int(match.group(1)), match.group(2), module))
+    found.sort(key=lambda item: item[0])
+    versions_seen = [version for version, _, _ in found]
+    if len(versions_seen) != len(set(versions_seen)):
+        raise RuntimeError(f"Duplicate migration versions: {versions_seen}")
+    return found
+
+
+def latest_version() -> int:
+    migrations = discover()
+    return migrations[-1][0] if migrations else 0
+
+
+async def run_statements(conn, statements: Iterable[str]):
+    """Execute DDL one statement at a time (asyncpg rejects multi-statement strings)."""
+    for statement in statements:
+        await conn.execute(text(statement))
+
+
+async def current_version(engine: AsyncEngine) -> int:
+    """Single query; 0 when the schema has never been migrated."""
+    async with engine.connect() as conn:
+        try:
+            result = await conn.execute(text("SELECT max(version) FROM schema_version"))
+        except DBAPIError:
+            return 0
+        return result.scalar() or 0
+
+
+async def check(engine: AsyncEngine) -> Tuple[int, int]:
+    """Return (database version, latest version known to this build)."""
+    return await current_version(engine), latest_version()
+
+
+async def upgrade(engine: AsyncEngine, target: int = None) -> List[int]:
+    """Apply every pending migration up to `target` (default: latest). Returns applied versions."""
+    applied = []
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+        await conn.execute(text(CREATE_VERSION_TABLE_SQL))
+        await conn.commit()
+        try:
+            result = await conn.execute(text("SELECT coalesce(max(version), 0) FROM schema_version"))
+            current = result.scalar()
+            await conn.commit()
+
+            for version, name, module in discover():
+                if version <= current or (target is not None and version > target):
+                    continue
+                logger.info(f"Applying migration {version:04d}_{name}")
+                if getattr(module, "TRANSACTIONAL", True):
+                    async with conn.begin():
+                        await module.upgrade(conn)
+                        await _record(conn, version, name)
+                else:
+                    async with engine.connect() as autocommit_conn:
+                        autocommit_conn = await autocommit_conn.execution_options(isolation_level="AUTOCOMMIT")
+                        await module.upgrade(autocommit_conn)
+                    async with conn.begin():
+                        await _record(conn, version, name)
+                applied.append(version)
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+            await conn.commit()
+    return applied
+
+
+async def _record(conn, version: int, name: str):
+    await conn.execute(
+        text("INSERT INTO schema_version (version, name) VALUES (:version, :name)"),
+        {"version": version, "name": name},
+    )
@@ -0,0 +1,33 @@
+import argparse
+import asyncio
+import logging
+from backend.sql_database import create_migration_engine
+from backend import migrations
+
+
+async def main(command: str, target: int = None):
+    engine = create_migration_engine()
+    try:
+        if command == "upgrade":
+            applied = await migrations.upgrade(engine, target=target)
+            if applied:
+                print(f"Applied migrations: {', '.join(f'{v:04d}' for v in applied)}")
+            else:
+                print("Schema is already up to date.")
+        elif command == "status":
+            current, latest = await migrations.check(engine)
+            print(f"Database schema version: {current} (latest: {latest})")
+            for version, name, _ in migrations.discover():
+                state = "applied" if version <= current else "pending"
+                print(f"  {version:04d}_{name}: {state}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(prog="python -m backend.migrations", description="Apply versioned schema migrations.")
+    parser.add_argument("command", choices=["upgrade", "status"])
+    parser.add_argument("--target", type=int, default=None, help="Stop after this version (upgrade only)")
+    args = parser.parse_args()
+    asyncio.run(main(args.command, args.target))
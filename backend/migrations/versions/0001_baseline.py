@@ -0,0 +1,101 @@
+"""
+Baseline schema: users, resources, courses, enrollments, refresh_tokens, email_outbox.
+
+Safe on empty databases and on databases built earlier by create_all, db/init.sql or
+tmp/db_migration.py: tables are created if missing and late-added columns are backfilled.
+"""
+from backend.migrations import run_statements
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id VARCHAR PRIMARY KEY,
+        email VARCHAR NOT NULL,
+        hashed_password VARCHAR NOT NULL,
+        full_name VARCHAR,
+        disabled BOOLEAN,
+        is_verified BOOLEAN,
+        verification_token VARCHAR,
+        created_at TIMESTAMP WITHOUT TIME ZONE
+    )
+    """,
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS verification_expires_at TIMESTAMP WITH TIME ZONE",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS plan VARCHAR DEFAULT 'basic'",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS role VARCHAR DEFAULT 'learner'",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS subscription_status VARCHAR DEFAULT 'trial'",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS trial_ends_at TIMESTAMP WITHOUT TIME ZONE",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email)",
+    """
+    CREATE INDEX IF NOT EXISTS ix_users_verification_token ON users (verification_token)
+    WHERE verification_token IS NOT NULL
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS resources (
+        id VARCHAR PRIMARY KEY,
+        title VARCHAR NOT NULL,
+        type VARCHAR NOT NULL,
+        description VARCHAR,
+        image VARCHAR,
+        created_at TIMESTAMP WITHOUT TIME ZONE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS courses (
+        id SERIAL PRIMARY KEY,
+        title VARCHAR(255) NOT NULL,
+        description TEXT,
+        modules JSONB,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+    )
+    """,
+    "ALTER TABLE courses ADD COLUMN IF NOT EXISTS price INTEGER DEFAULT 0",
+    """
+    CREATE TABLE IF NOT EXISTS enrollments (
+        id VARCHAR PRIMARY KEY,
+        user_id VARCHAR NOT NULL REFERENCES users (id),
+        course_id INTEGER NOT NULL REFERENCES courses (id),
+        progress_data JSONB,
+        is_completed BOOLEAN,
+        is_paid BOOLEAN,
+        last_accessed TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        enrolled_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS refresh_tokens (
+        id VARCHAR PRIMARY KEY,
+        user_id VARCHAR NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+        family_id VARCHAR NOT NULL,
+        token_hash VARCHAR(64) NOT NULL UNIQUE,
+        expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+        revoked_at TIMESTAMP WITH TIME ZONE,
+        created_at TIMESTAMP WITH TIME ZONE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_refresh_tokens_user_id ON refresh_tokens (user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_refresh_tokens_family_id ON refresh_tokens (family_id)",
+    """
+    CREATE TABLE IF NOT EXISTS email_outbox (
+        id VARCHAR PRIMARY KEY,
+        to_emails JSONB NOT NULL,
+        subject VARCHAR NOT NULL,
+        html_content TEXT NOT NULL,
+        from_email VARCHAR,
+        status VARCHAR NOT NULL,
+        attempts INTEGER NOT NULL,
+        next_attempt_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        last_error TEXT,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        sent_at TIMESTAMP WITH TIME ZONE
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_email_outbox_pending ON email_outbox (next_attempt_at)
+    WHERE status = 'pending'
+    """,
+]
+
+
+async def upgrade(conn):
+    await run_statements(conn, STATEMENTS)
@@ -0,0 +1,29 @@
+"""
+Indexes for keyset pagination on (created_at, id).
+
+Key columns are backfilled and made NOT NULL first: a NULL sort key would never satisfy
+the row comparison and the row would drop out of every page. Indexes are built
+concurrently so large tables stay writable.
+"""
+from backend.migrations import run_statements
+
+TRANSACTIONAL = False
+
+STATEMENTS = [
+    "UPDATE courses SET created_at = now() WHERE created_at IS NULL",
+    "ALTER TABLE courses ALTER COLUMN created_at SET NOT NULL",
+    "UPDATE resources SET created_at = (now() AT TIME ZONE 'utc') WHERE created_at IS NULL",
+    "ALTER TABLE resources ALTER COLUMN created_at SET NOT NULL",
+    "UPDATE enrollments SET enrolled_at = now() WHERE enrolled_at IS NULL",
+    "ALTER TABLE enrollments ALTER COLUMN enrolled_at SET NOT NULL",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_courses_created_at_id ON courses (created_at, id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_resources_created_at_id ON resources (created_at, id)",
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_enrollments_user_enrolled_at_id
+    ON enrollments (user_id, enrolled_at, id)
+    """,
+]
+
+
+async def upgrade(conn):
+    await run_statements(conn, STATEMENTS)
@@ -0,0 +1,15 @@
+"""
+Optimistic-concurrency version for courses.
+
+Every write to a course bumps `version`; clients send it back as an If-Match ETag so
+concurrent editors cannot overwrite each other's changes.
+"""
+from backend.migrations import run_statements
+
+STATEMENTS = [
+    "ALTER TABLE courses ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1",
+]
+
+
+async def upgrade(conn):
+    await run_statements(conn, STATEMENTS)
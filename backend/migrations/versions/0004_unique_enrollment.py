@@ -0,0 +1,44 @@
+"""
+One enrollment per (user_id, course_id).
+
+Existing duplicates are collapsed first, keeping the row that is paid, then completed,
+then the earliest. The unique index is built concurrently; a previous failed build leaves
+an INVALID index behind, which is dropped so the rebuild is not skipped by IF NOT EXISTS.
+"""
+from backend.migrations import run_statements
+
+TRANSACTIONAL = False
+
+STATEMENTS = [
+    """
+    DELETE FROM enrollments AS e
+    USING (
+        SELECT id, row_number() OVER (
+            PARTITION BY user_id, course_id
+            ORDER BY is_paid DESC NULLS LAST, is_completed DESC NULLS LAST, enrolled_at, id
+        ) AS rank
+        FROM enrollments
+    ) AS ranked
+    WHERE e.id = ranked.id AND ranked.rank > 1
+    """,
+    """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = 'uq_enrollments_user_course' AND NOT i.indisvalid
+        ) THEN
+            DROP INDEX uq_enrollments_user_course;
+        END IF;
+    END $$
+    """,
+    """
+    CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_enrollments_user_course
+    ON enrollments (user_id, course_id)
+    """,
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_enrollments_course_id ON enrollments (course_id)",
+]
+
+
+async def upgrade(conn):
+    await run_statements(conn, STATEMENTS)
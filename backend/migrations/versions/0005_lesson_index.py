@@ -0,0 +1,69 @@
+"""
+Per-course lesson index and per-enrollment completion counter.
+
+courses.lesson_ids / lesson_count / quiz_count are derived from modules and rebuilt on
+every write; enrollments.completed_lessons counts the true ticks that match the index, so
+percentages are a division instead of a walk over both JSONB documents. Existing rows are
+backfilled with the SQL backend/progress.py used when this migration was written, frozen
+here so later changes to the application cannot change what it does.
+"""
+from backend.migrations import run_statements
+
+STATEMENTS = [
+    "ALTER TABLE courses ADD COLUMN IF NOT EXISTS lesson_ids JSONB NOT NULL DEFAULT '[]'::jsonb",
+    "ALTER TABLE courses ADD COLUMN IF NOT EXISTS lesson_count INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE courses ADD COLUMN IF NOT EXISTS quiz_count INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE enrollments ADD COLUMN IF NOT EXISTS completed_lessons INTEGER NOT NULL DEFAULT 0",
+    """
+    UPDATE courses SET
+        lesson_ids = coalesce((
+            SELECT jsonb_agg(
+                coalesce(module.value ->> 'id', (module.pos - 1)::text) || '/' ||
+                coalesce(lesson.value ->> 'id', (lesson.pos - 1)::text)
+                ORDER BY module.pos, lesson.pos
+            )
+            FROM jsonb_array_elements(
+                CASE WHEN jsonb_typeof(modules) = 'array' THEN modules ELSE '[]'::jsonb END
+            ) WITH ORDINALITY AS module(value, pos)
+            CROSS JOIN LATERAL jsonb_array_elements(
+                CASE WHEN jsonb_typeof(module.value) = 'object' THEN
+                    CASE WHEN jsonb_typeof(coalesce(module.value -> 'content', module.value -> 'lessons')) = 'array'
+                         THEN coalesce(module.value -> 'content', module.value -> 'lessons') ELSE '[]'::jsonb END
+                ELSE '[]'::jsonb END
+            ) WITH ORDINALITY AS lesson(value, pos)
+        ), '[]'::jsonb),
+        quiz_count = (
+            SELECT count(*)::int
+            FROM jsonb_array_elements(
+                CASE WHEN jsonb_typeof(modules) = 'array' THEN modules ELSE '[]'::jsonb END
+            ) AS module
+            WHERE jsonb_typeof(module -> 'quiz') = 'array' AND jsonb_array_length(module -> 'quiz') > 0
+        )
+    """,
+    "UPDATE courses SET lesson_count = jsonb_array_length(lesson_ids)",
+    """
+    UPDATE enrollments AS e
+    SET (progress_data, completed_lessons) = (
+        SELECT progress.doc || jsonb_build_object('overall_percent',
+                   CASE WHEN c.lesson_count > 0 THEN least(100, round(100.0 * counted.lessons / c.lesson_count))::int ELSE 0 END),
+               counted.lessons
+        FROM (SELECT coalesce(e.progress_data, '{}'::jsonb) AS doc) AS progress
+        CROSS JOIN LATERAL (
+            SELECT count(*)::int AS lessons
+            FROM jsonb_each(
+                CASE WHEN jsonb_typeof(progress.doc) = 'object' THEN progress.doc ELSE '{}'::jsonb END
+            ) AS module
+            CROSS JOIN LATERAL jsonb_each(
+                CASE WHEN jsonb_typeof(module.value) = 'object' THEN module.value ELSE '{}'::jsonb END
+            ) AS lesson
+            WHERE lesson.value = 'true'::jsonb AND c.lesson_ids ? (module.key || '/' || lesson.key)
+        ) AS counted
+    )
+    FROM courses AS c
+    WHERE c.id = e.course_id
+    """,
+]
+
+
+async def upgrade(conn):
+    await run_statements(conn, STATEMENTS)
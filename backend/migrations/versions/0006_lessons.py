@@ -0,0 +1,44 @@
+"""
+Normalized lessons table, materialized from courses.modules (see backend/lessons.py).
+The backfill is the SQL backend/lessons.py used when this migration was written, frozen here.
+"""
+from backend.migrations import run_statements
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS lessons (
+        course_id INTEGER NOT NULL REFERENCES courses (id) ON DELETE CASCADE,
+        module_idx INTEGER NOT NULL,
+        lesson_idx INTEGER NOT NULL,
+        lesson_id VARCHAR NOT NULL,
+        module_title VARCHAR,
+        type VARCHAR,
+        title VARCHAR,
+        text TEXT,
+        PRIMARY KEY (course_id, module_idx, lesson_idx)
+    )
+    """,
+    """
+    INSERT INTO lessons (course_id, module_idx, lesson_idx, lesson_id, module_title, type, title, text)
+    SELECT c.id, (module.pos - 1)::int, (lesson.pos - 1)::int,
+           coalesce(module.value ->> 'id', (module.pos - 1)::text) || '/' ||
+           coalesce(lesson.value ->> 'id', (lesson.pos - 1)::text),
+           module.value ->> 'title', lesson.value ->> 'type', lesson.value ->> 'title',
+           lesson.value ->> 'text'
+    FROM courses AS c
+    CROSS JOIN LATERAL jsonb_array_elements(
+        CASE WHEN jsonb_typeof(c.modules) = 'array' THEN c.modules ELSE '[]'::jsonb END
+    ) WITH ORDINALITY AS module(value, pos)
+    CROSS JOIN LATERAL jsonb_array_elements(
+        CASE WHEN jsonb_typeof(module.value) = 'object' THEN
+            CASE WHEN jsonb_typeof(coalesce(module.value -> 'content', module.value -> 'lessons')) = 'array'
+                 THEN coalesce(module.value -> 'content', module.value -> 'lessons') ELSE '[]'::jsonb END
+        ELSE '[]'::jsonb END
+    ) WITH ORDINALITY AS lesson(value, pos)
+    ON CONFLICT DO NOTHING
+    """,
+]
+
+
+async def upgrade(conn):
+    await run_statements(conn, STATEMENTS)
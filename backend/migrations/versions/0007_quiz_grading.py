@@ -0,0 +1,75 @@
+"""
+Server-side quiz grading: final exams on courses, materialized answer keys and compact
+attempt storage (see backend/grading.py). Keys are backfilled for existing courses with
+the SQL backend/grading.py used when this migration was written, frozen here.
+"""
+from backend.migrations import run_statements
+
+
+def _answer_key(questions: str) -> str:
+    """
+    bytea answer key of a jsonb question array: per question, the index of the option
+    equal to correct_answer (options past 250 ignored), 254 when none matches.
+    """
+    return f"""(
+        SELECT decode(string_agg(lpad(to_hex(coalesce((
+            SELECT (option.pos - 1)::int
+            FROM jsonb_array_elements(
+                CASE WHEN jsonb_typeof(question.value -> 'options') = 'array'
+                     THEN question.value -> 'options' ELSE '[]'::jsonb END
+            ) WITH ORDINALITY AS option(value, pos)
+            WHERE option.value = question.value -> 'correct_answer' AND option.pos <= 250
+            ORDER BY option.pos
+            LIMIT 1
+        ), 254)), 2, '0'), '' ORDER BY question.pos), 'hex')
+        FROM jsonb_array_elements(
+            CASE WHEN jsonb_typeof({questions}) = 'array' THEN {questions} ELSE '[]'::jsonb END
+        ) WITH ORDINALITY AS question(value, pos)
+    )"""
+
+
+STATEMENTS = [
+    "ALTER TABLE courses ADD COLUMN IF NOT EXISTS final_exam JSONB NOT NULL DEFAULT '[]'::jsonb",
+    """
+    CREATE TABLE IF NOT EXISTS quiz_answer_keys (
+        course_id INTEGER NOT NULL REFERENCES courses (id) ON DELETE CASCADE,
+        quiz VARCHAR(16) NOT NULL,
+        answers BYTEA NOT NULL,
+        PRIMARY KEY (course_id, quiz)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS quiz_attempts (
+        id BIGSERIAL PRIMARY KEY,
+        user_id VARCHAR NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+        course_id INTEGER NOT NULL REFERENCES courses (id) ON DELETE CASCADE,
+        quiz VARCHAR(16) NOT NULL,
+        answers BYTEA NOT NULL,
+        score SMALLINT NOT NULL,
+        total SMALLINT NOT NULL,
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_quiz_attempts_user_course_quiz
+    ON quiz_attempts (user_id, course_id, quiz, created_at)
+    """,
+    f"""
+    INSERT INTO quiz_answer_keys (course_id, quiz, answers)
+    SELECT c.id, (module.pos - 1)::text, {_answer_key("module.value -> 'quiz'")}
+    FROM courses AS c
+    CROSS JOIN LATERAL jsonb_array_elements(
+        CASE WHEN jsonb_typeof(c.modules) = 'array' THEN c.modules ELSE '[]'::jsonb END
+    ) WITH ORDINALITY AS module(value, pos)
+    WHERE jsonb_typeof(module.value -> 'quiz') = 'array' AND jsonb_array_length(module.value -> 'quiz') > 0
+    UNION ALL
+    SELECT c.id, 'final', {_answer_key("c.final_exam")}
+    FROM courses AS c
+    WHERE jsonb_typeof(c.final_exam) = 'array' AND jsonb_array_length(c.final_exam) > 0
+    ON CONFLICT DO NOTHING
+    """,
+]
+
+
+async def upgrade(conn):
+    await run_statements(conn, STATEMENTS)
@@ -0,0 +1,42 @@
+"""
+Background course-generation jobs (see backend/services/generation_jobs.py).
+"""
+from backend.migrations import run_statements
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS generation_jobs (
+        id VARCHAR PRIMARY KEY,
+        user_id VARCHAR NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+        idempotency_key VARCHAR(128),
+        status VARCHAR(16) NOT NULL DEFAULT 'queued',
+        topic TEXT NOT NULL,
+        target_audience VARCHAR,
+        save_course BOOLEAN NOT NULL DEFAULT false,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        run_after TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        result JSONB,
+        course_id INTEGER REFERENCES courses (id) ON DELETE SET NULL,
+        error TEXT,
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        started_at TIMESTAMP WITH TIME ZONE,
+        finished_at TIMESTAMP WITH TIME ZONE
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_generation_jobs_runnable
+    ON generation_jobs (run_after) WHERE status IN ('queued', 'running')
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_generation_jobs_user_created
+    ON generation_jobs (user_id, created_at)
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS uq_generation_jobs_user_idempotency_key
+    ON generation_jobs (user_id, idempotency_key) WHERE idempotency_key IS NOT NULL
+    """,
+]
+
+
+async def upgrade(conn):
+    await run_statements(conn, STATEMENTS)
@@ -0,0 +1,26 @@
+"""
+Shared cache of generated courses (see backend/services/generation_cache.py).
+"""
+from backend.migrations import run_statements
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS generation_cache (
+        key VARCHAR(64) PRIMARY KEY,
+        prompt_version VARCHAR(32) NOT NULL,
+        topic TEXT NOT NULL,
+        target_audience TEXT NOT NULL,
+        course JSONB NOT NULL,
+        model_calls INTEGER NOT NULL DEFAULT 0,
+        generation_seconds DOUBLE PRECISION NOT NULL DEFAULT 0,
+        hits INTEGER NOT NULL DEFAULT 0,
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_generation_cache_expires_at ON generation_cache (expires_at)",
+]
+
+
+async def upgrade(conn):
+    await run_statements(conn, STATEMENTS)
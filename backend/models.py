@@ -57,6 +57,10 @@ class User(UserBase):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     email: Optional[str] = None
@@ -75,3 +79,13 @@ class Resource(ResourceBase):
     model_config = ConfigDict(from_attributes=True)
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class ResourcePartial(BaseModel):
+    """Resource with only the fields selected via ?fields= or ?view=summary"""
+    model_config = ConfigDict(from_attributes=True)
+    id: str
+    title: Optional[str] = None
+    type: Optional[str] = None
+    description: Optional[str] = None
+    image: Optional[str] = None
+    created_at: Optional[datetime] = None
@@ -0,0 +1,132 @@
+"""
+Keyset (cursor) pagination.
+
+Lists are ordered newest first by (timestamp, id). A cursor is an opaque base64url token
+holding the sort key of the row a page starts after, plus the direction to read in, so
+every page is a single index range scan no matter how deep the client pages.
+"""
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, List, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+NEXT = "next"
+PREV = "prev"
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+@dataclass
+class Page:
+    items: List[Any]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+def encode_cursor(created_at: datetime, row_id: Any, direction: str = NEXT) -> str:
+    payload = json.dumps({"t": created_at.isoformat(), "i": row_id, "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Return (created_at, id, direction); raises InvalidCursorError on anything malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction = payload["d"]
+        if direction not in (NEXT, PREV):
+            raise ValueError(direction)
+        row_id = payload["i"]
+        if isinstance(row_id, bool) or not isinstance(row_id, (int, str)):
+            raise TypeError(row_id)
+        return datetime.fromisoformat(payload["t"]), row_id, direction
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}") from e
+
+
+def _cursor_key(cursor: str, created_col, id_col):
+    """
+    decode_cursor(), checked against the key columns so a hand-edited cursor is a 400
+    rather than a bind error: the id must have the column's type, and the timestamp is
+    brought to the column's convention (aware, or naive UTC).
+    """
+    created_at, row_id, direction = decode_cursor(cursor)
+    if not isinstance(row_id, id_col.type.python_type):
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}")
+    if created_col.type.timezone:
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+    elif created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return created_at, row_id, direction
+
+
+def bad_cursor(exc: InvalidCursorError) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    created_col,
+    id_col,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    scalars: bool = True,
+) -> Page:
+    """
+    Run `stmt` (already filtered, not yet ordered) as one keyset page.
+
+    The key columns must be NOT NULL and covered by an index on (created_col, id_col),
+    optionally prefixed by equality-filtered columns. With scalars=False the items are
+    result rows, which must expose the key columns under their own names.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    key = tuple_(created_col, id_col)
+    direction = NEXT
+    if cursor:
+        created_at, row_id, direction = _cursor_key(cursor, created_col, id_col)
+        # Newest first: "next" walks towards older rows, "prev" back towards newer ones
+        if direction == NEXT:
+            stmt = stmt.where(key < tuple_(created_at, row_id))
+        else:
+            stmt = stmt.where(key > tuple_(created_at, row_id))
+
+    if direction == NEXT:
+        stmt = stmt.order_by(created_col.desc(), id_col.desc())
+    else:
+        stmt = stmt.order_by(created_col.asc(), id_col.asc())
+
+    # One extra row tells us whether another page exists without a COUNT(*)
+    result = await db.execute(stmt.limit(limit + 1))
+    rows = list(result.scalars().all() if scalars else result.all())
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == PREV:
+        rows.reverse()
+
+    page = Page(items=rows)
+    if not rows:
+        return page
+
+    created_attr, id_attr = created_col.key, id_col.key
+    first, last = rows[0], rows[-1]
+    if direction == NEXT:
+        if has_more:
+            page.next_cursor = encode_cursor(getattr(last, created_attr), getattr(last, id_attr), NEXT)
+        if cursor:
+            page.prev_cursor = encode_cursor(getattr(first, created_attr), getattr(first, id_attr), PREV)
+    else:
+        page.next_cursor = encode_cursor(getattr(last, created_attr), getattr(last, id_attr), NEXT)
+        if has_more:
+            page.prev_cursor = encode_cursor(getattr(first, created_attr), getattr(first, id_attr), PREV)
+    return page
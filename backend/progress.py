@@ -0,0 +1,223 @@
+"""
+Atomic, server-side merging of enrollment progress.
+
+progress_data looks like {"<module_id>": {"<lesson_id>": true/false}, "overall_percent": 0-100}.
+Clients send only the fragment that changed; merge_progress_sql() folds it into the stored
+map inside the UPDATE itself. Because the expression reads the row being updated, two
+concurrent ticks (e.g. two open tabs) serialize on the row lock and the second re-applies
+its delta to the first one's result instead of overwriting it.
+
+Percentages come from counters, not from the course document: each course keeps a lesson
+index (lesson_ids, lesson_count, quiz_count) rebuilt whenever its modules are written, and
+each enrollment keeps completed_lessons, its true ticks that name a lesson in that index.
+"""
+import json
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+OVERALL_PERCENT_KEY = "overall_percent"
+
+EMPTY_OBJECT = "'{}'::jsonb"
+
+
+# --- Lesson index ---
+
+def _key(value: Any, index: int) -> str:
+    """A module or lesson id as Postgres' ->> renders it, or its position when missing."""
+    if value is None:
+        return str(index)
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def _lessons(module: Any) -> List[Any]:
+    if not isinstance(module, dict):
+        return []
+    items = module.get("content")
+    if items is None:
+        items = module.get("lessons")
+    return items if isinstance(items, list) else []
+
+
+def lesson_index(modules: Any) -> Dict[str, Any]:
+    """
+    Column values for courses.lesson_ids / lesson_count / quiz_count.
+
+    Lessons are the items of each module's `content` (or `lessons`) array, identified as
+    "<module id>/<lesson id>", positions standing in for missing ids. A module with a
+    non-empty `quiz` counts as one quiz. Mirrors lesson_ids_sql() and quiz_count_sql().
+    """
+    lesson_ids, quiz_count = [], 0
+    for m_idx, module in enumerate(modules if isinstance(modules, list) else []):
+        module_key = _key(module.get("id") if isinstance(module, dict) else None, m_idx)
+        for l_idx, lesson in enumerate(_lessons(module)):
+            lesson_key = _key(lesson.get("id") if isinstance(lesson, dict) else None, l_idx)
+            lesson_ids.append(f"{module_key}/{lesson_key}")
+        if isinstance(module, dict) and isinstance(module.get("quiz"), list) and module["quiz"]:
+            quiz_count += 1
+    return {"lesson_ids": lesson_ids, "lesson_count": len(lesson_ids), "quiz_count": quiz_count}
+
+
+def _array_sql(value: str) -> str:
+    return f"CASE WHEN jsonb_typeof({value}) = 'array' THEN {value} ELSE '[]'::jsonb END"
+
+
+def lesson_rows_sql(modules: str) -> str:
+    """
+    FROM-clause items yielding one row per lesson of a `modules` jsonb, as `module` and
+    `lesson` (value, 1-based pos), in course order.
+    """
+    items = "coalesce(module.value -> 'content', module.value -> 'lessons')"
+    return f"""jsonb_array_elements({_array_sql(modules)}) WITH ORDINALITY AS module(value, pos)
+        CROSS JOIN LATERAL jsonb_array_elements(
+            CASE WHEN jsonb_typeof(module.value) = 'object' THEN {_array_sql(items)} ELSE '[]'::jsonb END
+        ) WITH ORDINALITY AS lesson(value, pos)"""
+
+
+# The lesson_index() id of the current lesson_rows_sql() row
+LESSON_ID_SQL = (
+    "coalesce(module.value ->> 'id', (module.pos - 1)::text) || '/' || "
+    "coalesce(lesson.value ->> 'id', (lesson.pos - 1)::text)"
+)
+
+
+def lesson_ids_sql(modules: str) -> str:
+    """SQL expression for the ordered lesson id array of a `modules` jsonb (see lesson_index())."""
+    return f"""coalesce((
+        SELECT jsonb_agg({LESSON_ID_SQL} ORDER BY module.pos, lesson.pos)
+        FROM {lesson_rows_sql(modules)}
+    ), '[]'::jsonb)"""
+
+
+def quiz_count_sql(modules: str) -> str:
+    return f"""(
+        SELECT count(*)::int
+        FROM jsonb_array_elements({_array_sql(modules)}) AS module
+        WHERE jsonb_typeof(module -> 'quiz') = 'array' AND jsonb_array_length(module -> 'quiz') > 0
+    )"""
+
+
+# --- Progress merging ---
+
+def completed_lessons_sql(progress: str, lesson_ids: str) -> str:
+    """SQL expression counting the true ticks in `progress` that name a lesson in `lesson_ids`."""
+    return f"""(
+        SELECT count(*)::int
+        FROM jsonb_each(
+            CASE WHEN jsonb_typeof({progress}) = 'object' THEN {progress} ELSE {EMPTY_OBJECT} END
+        ) AS module
+        CROSS JOIN LATERAL jsonb_each(
+            CASE WHEN jsonb_typeof(module.value) = 'object' THEN module.value ELSE {EMPTY_OBJECT} END
+        ) AS lesson
+        WHERE lesson.value = 'true'::jsonb AND {lesson_ids} ? (module.key || '/' || lesson.key)
+    )"""
+
+
+def percent_sql(completed: str, total: str) -> str:
+    return f"CASE WHEN {total} > 0 THEN least(100, round(100.0 * {completed} / {total}))::int ELSE 0 END"
+
+
+def percent(completed: Optional[int], total: Optional[int]) -> int:
+    """Python counterpart of percent_sql(), with the same half-up rounding."""
+    return min(100, int(100 * (completed or 0) / total + 0.5)) if total else 0
+
+
+def merge_progress_sql(progress: str, delta: str, course: str = "c") -> str:
+    """
+    Row expression (progress_data, completed_lessons) for `progress` with the jsonb `delta`
+    merged in two levels deep, counted against the lesson index of the joined `course` row.
+    """
+    return f"""(
+        SELECT merged.doc || jsonb_build_object('{OVERALL_PERCENT_KEY}',
+                   {percent_sql("counted.lessons", course + ".lesson_count")}),
+               counted.lessons
+        FROM (
+            SELECT coalesce({progress}, {EMPTY_OBJECT}) || coalesce((
+                SELECT jsonb_object_agg(
+                    fragment.key,
+                    CASE WHEN jsonb_typeof({progress} -> fragment.key) = 'object'
+                         THEN ({progress} -> fragment.key) || fragment.value
+                         ELSE fragment.value END
+                )
+                FROM jsonb_each({delta}) AS fragment
+            ), {EMPTY_OBJECT}) AS doc
+        ) AS merged
+        CROSS JOIN LATERAL (
+            SELECT {completed_lessons_sql("merged.doc", course + ".lesson_ids")} AS lessons
+        ) AS counted
+    )"""
+
+
+MERGE_PROGRESS_SQL = f"""
+    UPDATE enrollments AS e
+    SET (progress_data, completed_lessons) = {merge_progress_sql("e.progress_data", "CAST(:delta AS jsonb)")},
+        is_completed = coalesce(CAST(:is_completed AS boolean), e.is_completed),
+        last_accessed = now()
+    FROM courses AS c
+    WHERE c.id = e.course_id AND e.id = :enrollment_id AND e.user_id = :user_id
+    RETURNING e.id, (e.progress_data ->> '{OVERALL_PERCENT_KEY}')::int AS overall_percent, e.is_completed
+"""
+
+# Same merge for many enrollments in one statement; :batch is a JSON array of
+# {"id", "user_id", "delta", "is_completed"} objects (see services/progress_buffer.py).
+MERGE_PROGRESS_BATCH_SQL = f"""
+    UPDATE enrollments AS e
+    SET (progress_data, completed_lessons) = {merge_progress_sql("e.progress_data", "v.delta")},
+        is_completed = coalesce(v.is_completed, e.is_completed),
+        last_accessed = now()
+    FROM jsonb_to_recordset(CAST(:batch AS jsonb))
+        AS v(id varchar, user_id varchar, delta jsonb, is_completed boolean),
+        courses AS c
+    WHERE e.id = v.id AND e.user_id = v.user_id AND c.id = e.course_id
+    RETURNING e.id
+"""
+
+# Whole-document replacement (legacy PATCH /enrollments/{id}) is a merge into an empty map
+REPLACE_PROGRESS_SQL = f"""
+    UPDATE enrollments AS e
+    SET (progress_data, completed_lessons) = {merge_progress_sql(EMPTY_OBJECT, "CAST(:progress AS jsonb)")},
+        is_completed = coalesce(CAST(:is_completed AS boolean), e.is_completed)
+    FROM courses AS c
+    WHERE c.id = e.course_id AND e.id = :enrollment_id AND e.user_id = :user_id
+    RETURNING e.*
+"""
+
+# After a course's lesson index changed, recount its enrollments (merging an empty delta)
+RECOUNT_COURSE_PROGRESS_SQL = f"""
+    UPDATE enrollments AS e
+    SET (progress_data, completed_lessons) = {merge_progress_sql("e.progress_data", EMPTY_OBJECT)}
+    FROM courses AS c
+    WHERE c.id = e.course_id AND e.course_id = :course_id
+"""
+
+
+def merge_delta(into: Dict[str, Dict[str, bool]], delta: Dict[str, Dict[str, bool]]):
+    """In-memory counterpart of the SQL merge: later ticks win per lesson."""
+    for module_id, lessons in delta.items():
+        into.setdefault(module_id, {}).update(lessons)
+    return into
+
+
+async def merge_progress(
+    db: AsyncSession,
+    enrollment_id: str,
+    user_id: str,
+    delta: Dict[str, Dict[str, bool]],
+    is_completed: Optional[bool] = None,
+):
+    """One UPDATE ... RETURNING (id, overall_percent, is_completed); None if no owned enrollment matched."""
+    result = await db.execute(
+        text(MERGE_PROGRESS_SQL),
+        {
+            "delta": json.dumps(delta),
+            "is_completed": is_completed,
+            "enrollment_id": enrollment_id,
+            "user_id": user_id,
+        },
+    )
+    return result.one_or_none()
+
+
+async def recount_course_progress(db: AsyncSession, course_id: int):
+    """Re-derive completed_lessons and overall_percent for a course whose lesson index changed."""
+    await db.execute(text(RECOUNT_COURSE_PROGRESS_SQL), {"course_id": course_id})
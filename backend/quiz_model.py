@@ -0,0 +1,28 @@
+from sqlalchemy import Column, BigInteger, Integer, SmallInteger, String, LargeBinary, ForeignKey, DateTime, Index, func
+from backend.sql_database import Base
+
+
+class QuizAnswerKeyModel(Base):
+    """Correct option index per question, one byte each (see backend/grading.py)"""
+    __tablename__ = "quiz_answer_keys"
+
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), primary_key=True)
+    quiz = Column(String(16), primary_key=True)  # module position, or "final"
+    answers = Column(LargeBinary, nullable=False)
+
+
+class QuizAttemptModel(Base):
+    """A graded submission; answers are stored encoded, one byte per question"""
+    __tablename__ = "quiz_attempts"
+    __table_args__ = (
+        Index("ix_quiz_attempts_user_course_quiz", "user_id", "course_id", "quiz", "created_at"),
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), nullable=False)
+    quiz = Column(String(16), nullable=False)
+    answers = Column(LargeBinary, nullable=False)
+    score = Column(SmallInteger, nullable=False)
+    total = Column(SmallInteger, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -4,11 +4,31 @@ except ImportError:
     genai = None
 
 import os
+import re
 import json
+import time
+import asyncio
 import logging
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.sql_database import get_db
+from backend.generation_job_model import GenerationJobModel
+from backend.json_stream import JsonStreamScanner
+from backend.models import User
+from backend.deps import get_current_user
+from backend.services.course_generator import course_generator
+from backend.services.generation_cache import CachedGeneration, generation_cache
+from backend.services.generation_jobs import (
+    COUNT_ACTIVE_SQL, GENERATION_JOB_MAX_ACTIVE_PER_USER, GENERATION_JOB_POLL_INTERVAL, TERMINAL_STATUSES,
+    generation_job_worker,
+)
+from backend.services.worker_pool import PoolSaturatedError
 
 router = APIRouter(prefix="/ai", tags=["ai"])
 logger = logging.getLogger(__name__)
@@ -18,6 +38,23 @@ api_key = os.getenv("GEMINI_API_KEY")
 if genai and api_key:
     genai.configure(api_key=api_key)
 
+# "fanout": outline first, then modules and the final exam in parallel; "single": one prompt
+AI_GENERATION_MODE = os.getenv("AI_GENERATION_MODE", "fanout").lower()
+# Concurrent section calls per fanned-out course
+AI_FANOUT_CONCURRENCY = int(os.getenv("AI_FANOUT_CONCURRENCY", 7))
+# Calls per outline/module/exam before the generation fails
+AI_SECTION_ATTEMPTS = int(os.getenv("AI_SECTION_ATTEMPTS", 3))
+# Part of the generation cache key: bump it when the prompts change so courses
+# generated from the old ones stop being served
+PROMPT_VERSION = "2"
+
+def generator_busy(exc: PoolSaturatedError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Course generation is at capacity. Please try again shortly.",
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 class GenerateCourseRequest(BaseModel):
     topic: str
     target_audience: Optional[str] = "Beginners"
@@ -44,10 +81,57 @@ class CourseStructure(BaseModel):
     modules: List[Module]
     final_exam: Optional[List[QuizQuestion]] = []
 
-@router.post("/generate-course")
-async def generate_course(request: GenerateCourseRequest):
+# Phase one of a fanned-out generation (see generate_fanned_out)
+class OutlineModule(BaseModel):
+    title: str
+    summary: Optional[str] = ""
+
+class GenerationOutline(BaseModel):
+    title: str
+    description: str
+    modules: List[OutlineModule]
+
+class FinalExam(BaseModel):
+    final_exam: List[QuizQuestion]
+
+class GenerationJobCreate(GenerateCourseRequest):
+    # Also store the finished course in `courses` (its id is reported as course_id)
+    save_course: bool = False
+
+class GenerationJob(BaseModel):
+    id: str
+    status: str  # queued, running, succeeded, failed
+    topic: str
+    target_audience: Optional[str] = None
+    save_course: bool
+    attempts: int
+    result: Optional[Dict[str, Any]] = None
+    course_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# Upper bound for ?wait= on job reads
+MAX_JOB_WAIT = 30
+
+MODELS_TO_TRY = [
+    'gemini-2.5-flash',
+    'gemini-flash-latest',
+    'gemini-2.0-flash',
+    'gemini-1.5-flash',
+    'gemini-pro'
+]
+
+# Alternative names models use for the module list
+MODULE_KEYS = ('modules', 'Modules', 'course_modules', 'lessons', 'sections')
+
+def get_model():
     """
-    Generate a full course structure using Google Gemini.
+    Configure Gemini and return the first usable model; raises HTTPException otherwise.
     """
     if not genai:
          raise HTTPException(status_code=500, detail="Gemini AI Library not installed on server (ImportError)")
@@ -63,39 +147,23 @@ async def generate_course(request: GenerateCourseRequest):
     
     genai.configure(api_key=current_api_key)
 
-    try:
-        # Try to find the best available model in 2026 environment
-        # We try 2.0-flash first as it's the stable high-performance choice
-        model_name = 'gemini-2.0-flash'
-        model = None
-        
-        # List of models to try in order of preference (including 2026 stable names)
-        models_to_try = [
-            'gemini-2.5-flash',
-            'gemini-flash-latest',
-            'gemini-2.0-flash',
-            'gemini-1.5-flash',
-            'gemini-pro'
-        ]
-        
-        for name in models_to_try:
-            try:
-                model = genai.GenerativeModel(name)
-                # Test validity by calling a very simple property or just logging
-                model_name = name
-                logger.info(f"Successfully initialized model: {model_name}")
-                break
-            except Exception as e:
-                logger.warning(f"Model {name} not available: {e}")
-                continue
-        
-        if not model:
-            raise HTTPException(status_code=500, detail="No suitable Gemini model found. Check API key permissions.")
-        
-        prompt = f"""
+    # Try to find the best available model in 2026 environment, in order of preference
+    for name in MODELS_TO_TRY:
+        try:
+            model = genai.GenerativeModel(name)
+            logger.info(f"Successfully initialized model: {name}")
+            return model
+        except Exception as e:
+            logger.warning(f"Model {name} not available: {e}")
+            continue
+
+    raise HTTPException(status_code=500, detail="No suitable Gemini model found. Check API key permissions.")
+
+def course_prompt(topic: str, target_audience: Optional[str]) -> str:
+    return f"""
         Act as an expert educational curriculum designer and subject matter expert.
-        Create a comprehensive, deeply educational course for the topic: "{request.topic}".
-        Target Audience: {request.target_audience}.
+        Create a comprehensive, deeply educational course for the topic: "{topic}".
+        Target Audience: {target_audience}.
         
         The output MUST be valid, parseable JSON with the following structure:
         {{
@@ -143,94 +211,302 @@ async def generate_course(request: GenerateCourseRequest):
         4. Include a "final_exam" with 5-10 questions covering all modules.
         5. Ensure the JSON is valid and does not contain any Markdown code blocks or extra text.
         """
+
+def is_rate_limit(exc: Exception) -> bool:
+    return "429" in str(exc) or "Too Many Requests" in str(exc)
+
+def parse_course_json(text_response: str):
+    """Robust JSON extraction: everything between the first { and the last }"""
+    text_response = text_response.strip()
+    json_match = re.search(r'(\{.*\})', text_response, re.DOTALL)
+    if json_match:
+        try:
+            return json.loads(json_match.group(1))
+        except json.JSONDecodeError:
+            # Fallback to original strip logic if regex-extracted JSON is also bad
+            return json.loads(text_response)
+    # Try to load raw text if no braces found (unlikely for valid JSON)
+    return json.loads(text_response)
+
+def clean_module(module, m_idx: int, base_id: int) -> Optional[dict]:
+    """A generated module with an id and defaults filled in; None if it is unusable."""
+    if not isinstance(module, dict):
+        return None
+    
+    cleaned = {
+        "id": f"mod-{base_id}-{m_idx}",
+        "title": module.get("title", f"Module {m_idx + 1}"),
+        "content": [],
+        "quiz": module.get("quiz", [])
+    }
+    
+    # Map content items
+    for item in module.get("content", []):
+        if not isinstance(item, dict): continue
+        cleaned["content"].append({
+            "type": item.get("type", "text"),
+            "title": item.get("title", item.get("text", "New Lesson")[:50]),
+            "text": item.get("text", "Lesson Content"),
+            "icon": item.get("icon", "📄")
+        })
+    
+    return cleaned if cleaned["title"] else None
+
+def normalize_course(course_data, topic: str, base_id: int) -> dict:
+    if not isinstance(course_data, dict):
+        # If the AI returned a list or just a string, wrap it
+        course_data = {"title": topic, "modules": course_data if isinstance(course_data, list) else []}
+
+    # Ensure 'modules' exists and is a list; models sometimes name it differently
+    modules = next(
+        (course_data[key] for key in MODULE_KEYS if isinstance(course_data.get(key), list)), []
+    )
+
+    final_modules = []
+    for m_idx, module in enumerate(modules):
+        cleaned = clean_module(module, m_idx, base_id)
+        if cleaned:
+            final_modules.append(cleaned)
         
-        # Retry logic with exponential backoff
-        max_retries = 3
-        import asyncio
-        response = None
-        for attempt in range(max_retries):
-            try:
-                response = model.generate_content(prompt)
-                break # Success, exit loop
-            except Exception as e:
-                if "429" in str(e) or "Too Many Requests" in str(e):
-                    if attempt < max_retries - 1:
-                        wait_time = 2 ** attempt
-                        logger.warning(f"Rate limit hit. Retrying in {wait_time}s...")
-                        await asyncio.sleep(wait_time)
-                    else:
-                        raise HTTPException(status_code=429, detail="System busy (Rate Limit). Please try again later.")
-                else:
-                    raise e # Re-raise if it's not a rate limit error
+    return {
+        "title": course_data.get("title", topic),
+        "description": course_data.get("description", f"Course about {topic}"),
+        "modules": final_modules,
+        "final_exam": course_data.get("final_exam", [])
+    }
+
+class SectionFailedError(Exception):
+    """A section's answer stayed unusable after every attempt."""
+
+    def __init__(self, label: str, cause: Exception):
+        super().__init__(f"{label}: {cause}")
+        self.cause = cause
+
+def outline_prompt(topic: str, target_audience: Optional[str]) -> str:
+    return f"""
+        Act as an expert educational curriculum designer and subject matter expert.
+        Plan a comprehensive course for the topic: "{topic}".
+        Target Audience: {target_audience}.
         
-        if not response:
-             raise HTTPException(status_code=500, detail="Failed to get valid response from AI after retries")
+        Return ONLY the course outline as valid, parseable JSON with this structure:
+        {{
+            "title": "A Professional and Engaging Course Title",
+            "description": "A compelling 2-3 sentence overview that explains what the student will achieve.",
+            "modules": [
+                {{
+                    "title": "Module 1: Clear and Descriptive Title",
+                    "summary": "One or two sentences on what this module covers."
+                }}
+            ]
+        }}
+        
+        CRITICAL REQUIREMENTS:
+        1. Plan exactly 4-6 modules that build on each other without overlapping.
+        2. Do not write lessons or quizzes yet.
+        3. Ensure the JSON is valid and does not contain any Markdown code blocks or extra text.
+        """
+
+def _outline_summary(outline: GenerationOutline) -> str:
+    return "\n".join(
+        f"        {i + 1}. {module.title} - {module.summary}" for i, module in enumerate(outline.modules)
+    )
 
-        # Robust JSON extraction using regex
-        text_response = response.text.strip()
-        import re
+def module_prompt(topic: str, target_audience: Optional[str], outline: GenerationOutline, index: int) -> str:
+    module = outline.modules[index]
+    return f"""
+        Act as an expert educational curriculum designer and subject matter expert.
+        You are writing one module of the course "{outline.title}" on the topic: "{topic}".
+        Target Audience: {target_audience}.
+        
+        The course outline is:
+{_outline_summary(outline)}
         
-        # Find everything between the first { and the last }
-        json_match = re.search(r'(\{.*\})', text_response, re.DOTALL)
-        if json_match:
-            try:
-                course_data = json.loads(json_match.group(1))
-            except json.JSONDecodeError:
-                # Fallback to original strip logic if regex-extracted JSON is also bad
-                course_data = json.loads(text_response)
-        else:
-            # Try to load raw text if no braces found (unlikely for valid JSON)
-            course_data = json.loads(text_response)
+        Write module {index + 1}, "{module.title}" ({module.summary}), as valid, parseable JSON:
+        {{
+            "title": "{module.title}",
+            "content": [
+                {{ 
+                    "type": "text", 
+                    "title": "Short Lesson Title",
+                    "text": "Detailed educational lesson content (2-3 paragraphs)...", 
+                    "icon": "📄" 
+                }}
+            ],
+            "quiz": [
+                {{
+                    "question": "What is...?",
+                    "options": ["Option A", "Option B", "Option C", "Option D"],
+                    "correct_answer": "Option A"
+                }}
+            ]
+        }}
         
-        if not isinstance(course_data, dict):
-            # If the AI returned a list or just a string, wrap it
-            course_data = {"title": request.topic, "modules": course_data if isinstance(course_data, list) else []}
+        CRITICAL REQUIREMENTS:
+        1. Include 3-5 content items (text/info) AND a quiz with 2-3 questions.
+        2. For "text" type items, provide ACTUAL educational content, not placeholders.
+        3. Stay within this module's scope; other modules cover the rest of the outline.
+        4. Ensure the JSON is valid and does not contain any Markdown code blocks or extra text.
+        """
 
-        # Add IDs and validate structure
-        import time
-        base_id = int(time.time())
+def final_exam_prompt(topic: str, target_audience: Optional[str], outline: GenerationOutline) -> str:
+    return f"""
+        Act as an expert educational curriculum designer and subject matter expert.
+        Write the final exam of the course "{outline.title}" on the topic: "{topic}".
+        Target Audience: {target_audience}.
+        
+        The course modules are:
+{_outline_summary(outline)}
+        
+        Return valid, parseable JSON:
+        {{
+            "final_exam": [
+                {{
+                    "question": "Comprehensive course question...?",
+                    "options": ["Option A", "Option B", "Option C", "Option D"],
+                    "correct_answer": "Option B"
+                }}
+            ]
+        }}
         
-        # Ensure 'modules' exists and is a list
-        if 'modules' not in course_data or not isinstance(course_data['modules'], list):
-            # Try to find modules if it was nested or named differently
-            for key in ['Modules', 'course_modules', 'lessons', 'sections']:
-                if key in course_data and isinstance(course_data[key], list):
-                    course_data['modules'] = course_data.pop(key)
-                    break
+        CRITICAL REQUIREMENTS:
+        1. Write 5-10 questions covering all modules.
+        2. Ensure the JSON is valid and does not contain any Markdown code blocks or extra text.
+        """
+
+async def generate_section(model, prompt: str, parse: Callable[[Any], Any], label: str, admitted: bool = False):
+    """
+    One model call whose JSON answer is checked by `parse`, retried up to
+    AI_SECTION_ATTEMPTS times when it is unusable or rate limited (with backoff).
+    Unless `admitted`, a saturated pool raises PoolSaturatedError; admitted calls wait.
+    """
+    for attempt in range(AI_SECTION_ATTEMPTS):
+        try:
+            # Blocking SDK call: runs on the generation pool, not the event loop
+            response = await course_generator.generate(model, prompt, admitted=admitted)
+            return parse(parse_course_json(response.text))
+        except PoolSaturatedError:
+            raise
+        except Exception as e:
+            if attempt == AI_SECTION_ATTEMPTS - 1:
+                raise SectionFailedError(label, e)
+            wait_time = 2 ** attempt if is_rate_limit(e) else 0
+            logger.warning(f"{label} attempt {attempt + 1} failed ({e}). Retrying in {wait_time}s...")
+            await asyncio.sleep(wait_time)
+
+async def generate_fanned_out(model, topic: str, target_audience: Optional[str]) -> dict:
+    """
+    Two phases: a short call plans the outline, then every module and the final exam are
+    generated concurrently (at most AI_FANOUT_CONCURRENCY calls at once), each retried
+    on its own. Wall time is about the outline plus the slowest section.
+    """
+    base_id = int(time.time())
+    # Only the outline call is shed when the pool is saturated; once a course is under
+    # way, its sections wait for a worker however long it takes (no queue timeout)
+    # rather than failing the course and wasting the calls already made
+    outline = await generate_section(
+        model, outline_prompt(topic, target_audience), GenerationOutline.model_validate, "Outline",
+    )
+    if not outline.modules:
+        raise SectionFailedError("Outline", ValueError("no modules planned"))
+    slots = asyncio.Semaphore(AI_FANOUT_CONCURRENCY)
+
+    def parse_module(index: int):
+        def parse(data):
+            # Keep the planned title when the model drops it
+            if isinstance(data, dict):
+                data.setdefault("title", outline.modules[index].title)
+            module = clean_module(data, index, base_id)
+            if module is None:
+                raise ValueError("not a module object")
+            Module.model_validate(module)
+            return module
+        return parse
+
+    async def section(prompt: str, parse, label: str):
+        async with slots:
+            return await generate_section(model, prompt, parse, label, admitted=True)
+
+    sections = [
+        section(module_prompt(topic, target_audience, outline, i), parse_module(i), f"Module {i + 1}")
+        for i in range(len(outline.modules))
+    ]
+    sections.append(section(
+        final_exam_prompt(topic, target_audience, outline),
+        lambda data: FinalExam.model_validate(data).model_dump()["final_exam"],
+        "Final exam",
+    ))
+    # Let every section finish (its pool slot is held until then) before reporting a failure
+    results = await asyncio.gather(*sections, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    *modules, final_exam = results
+
+    return {
+        "title": outline.title,
+        "description": outline.description,
+        "modules": modules,
+        "final_exam": final_exam
+    }
+
+async def generate_single(model, topic: str, target_audience: Optional[str]) -> dict:
+    """The whole course from one prompt (AI_GENERATION_MODE=single)."""
+    prompt = course_prompt(topic, target_audience)
+    
+    # Retry logic with exponential backoff
+    max_retries = 3
+    response = None
+    for attempt in range(max_retries):
+        try:
+            # Blocking SDK call: runs on the generation pool, not the event loop
+            response = await course_generator.generate(model, prompt)
+            break # Success, exit loop
+        except PoolSaturatedError:
+            raise
+        except Exception as e:
+            if is_rate_limit(e):
+                if attempt < max_retries - 1:
+                    wait_time = 2 ** attempt
+                    logger.warning(f"Rate limit hit. Retrying in {wait_time}s...")
+                    await asyncio.sleep(wait_time)
+                else:
+                    raise HTTPException(status_code=429, detail="System busy (Rate Limit). Please try again later.")
             else:
-                course_data['modules'] = []
-
-        final_modules = []
-        for m_idx, module in enumerate(course_data.get('modules', [])):
-            if not isinstance(module, dict): continue
-            
-            clean_module = {
-                "id": f"mod-{base_id}-{m_idx}",
-                "title": module.get("title", f"Module {m_idx + 1}"),
-                "content": [],
-                "quiz": module.get("quiz", [])
-            }
-            
-            # Map content items
-            for item in module.get("content", []):
-                if not isinstance(item, dict): continue
-                clean_module["content"].append({
-                    "type": item.get("type", "text"),
-                    "title": item.get("title", item.get("text", "New Lesson")[:50]),
-                    "text": item.get("text", "Lesson Content"),
-                    "icon": item.get("icon", "📄")
-                })
-            
-            if clean_module["title"]:
-                final_modules.append(clean_module)
-            
-        return {
-            "title": course_data.get("title", request.topic),
-            "description": course_data.get("description", f"Course about {request.topic}"),
-            "modules": final_modules,
-            "final_exam": course_data.get("final_exam", [])
-        }
+                raise e # Re-raise if it's not a rate limit error
+    
+    if not response:
+         raise HTTPException(status_code=500, detail="Failed to get valid response from AI after retries")
 
+    # Add IDs and validate structure
+    return normalize_course(parse_course_json(response.text), topic, int(time.time()))
+
+async def build_course(topic: str, target_audience: Optional[str] = "Beginners") -> dict:
+    """
+    Generate a full course structure using Google Gemini. Shared by the synchronous
+    endpoint and the background job worker; failures are raised as HTTPExceptions.
+    Near-identical requests are answered from the generation cache, and concurrent
+    identical ones share a single generation.
+    """
+    return await generation_cache.get_or_generate(
+        topic, target_audience, PROMPT_VERSION, lambda: generate_course_uncached(topic, target_audience)
+    )
+
+async def generate_course_uncached(topic: str, target_audience: Optional[str]) -> dict:
+    try:
+        model = get_model()
+        if AI_GENERATION_MODE == "single":
+            return await generate_single(model, topic, target_audience)
+        return await generate_fanned_out(model, topic, target_audience)
+
+    except PoolSaturatedError as e:
+        raise generator_busy(e)
+    except HTTPException:
+        raise
+    except SectionFailedError as e:
+        logger.error(f"AI Generation failed: {e}")
+        if is_rate_limit(e.cause):
+            raise HTTPException(status_code=429, detail="System busy (Rate Limit). Please try again later.")
+        raise HTTPException(status_code=500, detail=f"AI generation failed: {str(e)}")
     except ImportError:
         logger.error("google.generativeai library not found")
         raise HTTPException(status_code=500, detail="Gemini AI Library not installed on server")
@@ -238,3 +514,194 @@ async def generate_course(request: GenerateCourseRequest):
         logger.error(f"AI Generation failed: {e}")
         # Return the actual error string to frontend for easier debugging
         raise HTTPException(status_code=500, detail=f"AI generation failed: {str(e)}")
+
+async def stream_course(topic: str, target_audience: Optional[str] = "Beginners") -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Generate a course through the model's streaming API, parsing the JSON as it arrives.
+    Yields ("meta", {"title"|"description": ...}) as those close, ("module", {"index",
+    "module"}) for each module the moment it closes and validates against Module (or
+    ("module_error", {"index", "errors"})), and finally ("done", course), the same
+    document build_course() returns. A cached course is replayed as the same events.
+    """
+    cached = await generation_cache.lookup(topic, target_audience, PROMPT_VERSION)
+    if cached is not None:
+        yield "meta", {"title": cached["title"]}
+        yield "meta", {"description": cached["description"]}
+        for index, module in enumerate(cached["modules"]):
+            yield "module", {"index": index, "module": module}
+        yield "done", cached
+        return
+
+    model = get_model()
+    prompt = course_prompt(topic, target_audience)
+    base_id = int(time.time())
+    start = time.perf_counter()
+    scanner = JsonStreamScanner()
+    received = []
+    async for chunk in course_generator.stream(model, prompt):
+        received.append(chunk)
+        for completed in scanner.feed(chunk):
+            path = completed.path
+            if len(path) == 1 and path[0] in ("title", "description"):
+                yield "meta", {path[0]: completed.value()}
+            elif len(path) == 2 and path[0] in MODULE_KEYS and isinstance(path[1], int):
+                cleaned = clean_module(completed.value(), path[1], base_id)
+                if cleaned is None:
+                    continue
+                try:
+                    Module.model_validate(cleaned)
+                except ValidationError as e:
+                    errors = e.errors(include_url=False, include_context=False, include_input=False)
+                    yield "module_error", {"index": path[1], "errors": errors}
+                    continue
+                yield "module", {"index": path[1], "module": cleaned}
+
+    # The scanner has the document already when it closed; otherwise fall back to the
+    # same lenient extraction as the non-streaming path
+    document = scanner.text if scanner.done else "".join(received)
+    course = normalize_course(parse_course_json(document), topic, base_id)
+    await generation_cache.store(
+        topic, target_audience, PROMPT_VERSION,
+        CachedGeneration(json.dumps(course), 1, time.perf_counter() - start),
+    )
+    yield "done", course
+
+def sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/generate-course")
+async def generate_course(request: GenerateCourseRequest):
+    """
+    Generate a full course structure using Google Gemini, answering when it is done.
+    This holds the connection for the whole generation; prefer POST /ai/jobs or the
+    streaming variant.
+    """
+    return await build_course(request.topic, request.target_audience)
+
+
+@router.post("/generate-course/stream")
+async def generate_course_stream(request: GenerateCourseRequest):
+    """
+    Generate a course as Server-Sent Events: `meta` (title, then description), `module`
+    for each module as soon as the model has written it, `module_error` for a module that
+    fails validation, then `done` with the complete course, or `error`. EventSource
+    cannot POST, so read the stream with fetch().
+    """
+    events = stream_course(request.topic, request.target_audience)
+    # Wait for the first event so a saturated pool, a rate limit or missing configuration
+    # is still a plain HTTP error rather than an event stream that fails immediately
+    try:
+        first = await anext(events)
+    except PoolSaturatedError as e:
+        raise generator_busy(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        if is_rate_limit(e):
+            raise HTTPException(status_code=429, detail="System busy (Rate Limit). Please try again later.")
+        logger.error(f"AI Generation failed: {e}")
+        raise HTTPException(status_code=500, detail=f"AI generation failed: {str(e)}")
+
+    async def body():
+        yield sse(*first)
+        try:
+            async for event in events:
+                yield sse(*event)
+        except Exception as e:
+            logger.error(f"AI Generation stream failed: {e}")
+            yield sse("error", {"detail": f"AI generation failed: {str(e)}"})
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        # Proxies must pass events through as they are written
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _find_job(db: AsyncSession, **filters) -> Optional[GenerationJobModel]:
+    result = await db.execute(
+        select(GenerationJobModel)
+        .filter_by(**filters)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
+@router.post("/jobs", response_model=GenerationJob, status_code=status.HTTP_202_ACCEPTED)
+async def submit_generation_job(
+    request: GenerationJobCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=128),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Queue a course generation and return its job right away; poll GET /ai/jobs/{id}
+    (optionally with ?wait=) for the result. Resubmitting with the same Idempotency-Key
+    header returns the existing job instead of starting another generation.
+    """
+    if idempotency_key:
+        existing = await _find_job(db, user_id=current_user.id, idempotency_key=idempotency_key)
+        if existing is not None:
+            response.status_code = status.HTTP_200_OK
+            return existing
+
+    active = (await db.execute(COUNT_ACTIVE_SQL, {"user_id": current_user.id})).scalar_one()
+    if active >= GENERATION_JOB_MAX_ACTIVE_PER_USER:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"At most {GENERATION_JOB_MAX_ACTIVE_PER_USER} generations may be pending at once",
+        )
+
+    result = await db.execute(
+        pg_insert(GenerationJobModel)
+        .values(
+            user_id=current_user.id,
+            idempotency_key=idempotency_key,
+            topic=request.topic,
+            target_audience=request.target_audience,
+            save_course=request.save_course,
+        )
+        .on_conflict_do_nothing(
+            index_elements=[GenerationJobModel.user_id, GenerationJobModel.idempotency_key],
+            index_where=GenerationJobModel.idempotency_key.isnot(None),
+        )
+        .returning(GenerationJobModel)
+    )
+    job = result.scalar_one_or_none()
+    if job is None:
+        # A concurrent retry with the same key won the insert
+        await db.rollback()
+        response.status_code = status.HTTP_200_OK
+        return await _find_job(db, user_id=current_user.id, idempotency_key=idempotency_key)
+
+    await db.commit()
+    generation_job_worker.notify()
+    response.headers["Location"] = f"/api/ai/jobs/{job.id}"
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=GenerationJob)
+async def read_generation_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=MAX_JOB_WAIT),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    A generation job of the current user. With `wait` (seconds), a job that is still
+    queued or running is answered once it finishes or when the wait runs out.
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        job = await _find_job(db, id=job_id)
+        if job is None or job.user_id != current_user.id:
+            raise HTTPException(status_code=404, detail="Generation job not found")
+        remaining = deadline - time.monotonic()
+        if job.status in TERMINAL_STATUSES or remaining <= 0:
+            return job
+        # Hand the connection back to the pool while waiting
+        await db.rollback()
+        await generation_job_worker.wait(job_id, min(remaining, GENERATION_JOB_POLL_INTERVAL))
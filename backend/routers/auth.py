@@ -1,88 +1,103 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, or_, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from backend.sql_database import get_db
 from backend.sql_models import SQLUser
-from backend.models import UserCreate, User, Token
-from backend.security import get_password_hash, verify_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from backend.models import UserCreate, User, Token, RefreshRequest
+from backend.security import (
+    create_access_token,
+    build_token_claims,
+    generate_opaque_token,
+    hash_token,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    VERIFICATION_TOKEN_EXPIRE_HOURS,
+)
 from backend.deps import get_current_user
 from backend.services.email import email_service
+from backend.services.email_outbox import email_outbox_worker
+from backend.services.email_templates import render_verification_email
+from backend.services.password_hasher import password_hasher
+from backend.services.principal_cache import principal_cache
+from backend.services.token_versions import token_versions
+from backend.services.refresh_tokens import (
+    RefreshTokenError,
+    issue_refresh_token,
+    rotate_refresh_token,
+    revoke_token_family,
+    revoke_all_for_user,
+)
+from backend.services.worker_pool import PoolSaturatedError
 from datetime import datetime, timezone, timedelta
 import logging
-import secrets
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/token")
 
+def hasher_busy(exc: PoolSaturatedError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service is busy. Please try again shortly.",
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 @router.post("/signup", response_model=User)
 async def signup(user: UserCreate, db: AsyncSession = Depends(get_db)):
     try:
-        # Check existing user
-        result = await db.execute(select(SQLUser).where(SQLUser.email == user.email))
-        existing_user = result.scalar_one_or_none()
-        
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered"
-            )
-            
-        hashed_password = get_password_hash(user.password)
-        verification_token = secrets.token_urlsafe(32)
+        hashed_password = await password_hasher.hash(user.password)
+        verification_token = generate_opaque_token()
         
         # Trial only for creators
         trial_expiry = None
         if user.role == 'creator':
             trial_days = 7
-            trial_expiry = datetime.now(timezone.utc) + timedelta(days=trial_days)
+            trial_expiry = (datetime.now(timezone.utc) + timedelta(days=trial_days)).replace(tzinfo=None)
         
-        new_user = SQLUser(
-            email=user.email,
-            hashed_password=hashed_password,
-            full_name=user.full_name,
-            is_verified=False,
-            verification_token=verification_token,
-            plan=user.plan or 'basic',
-            role=user.role or 'learner',
-            trial_ends_at=trial_expiry
+        # Single round trip: the unique email index arbitrates concurrent signups
+        result = await db.execute(
+            pg_insert(SQLUser)
+            .values(
+                email=user.email,
+                hashed_password=hashed_password,
+                full_name=user.full_name,
+                is_verified=False,
+                verification_token=hash_token(verification_token),
+                verification_expires_at=datetime.now(timezone.utc) + timedelta(hours=VERIFICATION_TOKEN_EXPIRE_HOURS),
+                plan=user.plan or 'basic',
+                role=user.role or 'learner',
+                trial_ends_at=trial_expiry
+            )
+            .on_conflict_do_nothing(index_elements=[SQLUser.email])
+            .returning(SQLUser)
         )
+        new_user = result.scalar_one_or_none()
         
-        db.add(new_user)
-        await db.commit()
-        await db.refresh(new_user)
+        if new_user is None:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
         
-        # Send verification email
+        # The verification email is committed with the user and sent by the outbox
+        # worker, so signup never waits on the email provider
         verify_url = f"https://pohei.de/verify-email?token={verification_token}"
-        welcome_msg = "To start your journey, please verify your email address:"
-        if user.role == 'creator':
-            welcome_msg = "To start your 7-day free trial and access your academy, please verify your email address:"
-
-        try:
-            await email_service.send_email(
-                to_emails=[user.email],
-                subject="Verify your LearnFlow account 🛡️",
-                html_content=f"""
-                    <div style="font-family: sans-serif; max-width: 600px; margin: auto; padding: 20px; border: 1px solid #e5e7eb; border-radius: 12px;">
-                        <h1 style="color: #2563eb;">Welcome to LearnFlow, {user.full_name or 'there'}!</h1>
-                        <p>{welcome_msg}</p>
-                        <div style="margin: 30px 0;">
-                            <a href="{verify_url}" style="background-color: #2563eb; color: white; padding: 12px 24px; border-radius: 8px; text-decoration: none; font-weight: bold; display: inline-block;">Verify Email Address</a>
-                        </div>
-                        <p style="color: #6b7280; font-size: 0.875rem;">If you didn't create an account, you can safely ignore this email.</p>
-                    </div>
-                """
-            )
-        except Exception as e:
-            logger.error(f"Non-blocking email error in signup: {e}")
+        subject, html_content = render_verification_email(user.full_name, verify_url, user.role)
+        email_service.enqueue(db, to_emails=[user.email], subject=subject, html_content=html_content)
+        
+        await db.commit()
+        email_outbox_worker.notify()
         
         # Explicit model validation for SQLAlchemy
         return User.model_validate(new_user)
         
     except HTTPException as he:
         raise he
+    except PoolSaturatedError as e:
+        raise hasher_busy(e)
     except Exception as e:
         import traceback
         logger.error(f"CRITICAL SIGNUP ERROR: {str(e)}")
@@ -94,18 +109,31 @@ async def signup(user: UserCreate, db: AsyncSession = Depends(get_db)):
 
 @router.get("/verify-email")
 async def verify_email(token: str, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(SQLUser).where(SQLUser.verification_token == token))
-    user = result.scalar_one_or_none()
+    # One indexed UPDATE ... RETURNING. Tokens are stored hashed; the raw comparison
+    # only matches links sent before tokens were hashed.
+    result = await db.execute(
+        update(SQLUser)
+        .where(
+            SQLUser.verification_token.in_([hash_token(token), token]),
+            or_(
+                SQLUser.verification_expires_at.is_(None),
+                SQLUser.verification_expires_at > func.now(),
+            ),
+        )
+        .values(is_verified=True, verification_token=None, verification_expires_at=None)
+        .returning(SQLUser.email)
+        .execution_options(synchronize_session=False)
+    )
+    email = result.scalar_one_or_none()
     
-    if not user:
+    if not email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid or expired verification token"
         )
     
-    user.is_verified = True
-    user.verification_token = None
     await db.commit()
+    principal_cache.invalidate(email)
     
     return {"message": "Email verified successfully! You can now sign in."}
 
@@ -114,7 +142,12 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
     result = await db.execute(select(SQLUser).where(SQLUser.email == form_data.username))
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    try:
+        password_ok = bool(user) and await password_hasher.verify(form_data.password, user.hashed_password)
+    except PoolSaturatedError as e:
+        raise hasher_busy(e)
+
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -127,12 +160,51 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
             detail="Please verify your email address before signing in."
         )
     
+    refresh_token = issue_refresh_token(db, user.id)
+    await db.commit()
+    return _token_response(user, refresh_token)
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(request: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Exchange a refresh token for a new access token and a rotated refresh token.
+    Costs one indexed lookup and an HMAC instead of a password verification.
+    """
+    try:
+        user, refresh_token = await rotate_refresh_token(db, request.refresh_token)
+    except RefreshTokenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return _token_response(user, refresh_token)
+
+@router.post("/logout")
+async def logout(request: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Revoke the refresh token (and its whole rotation family) for this session.
+    """
+    await revoke_token_family(db, request.refresh_token)
+    return {"message": "Signed out."}
+
+def _token_response(user, refresh_token: str) -> dict:
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data=build_token_claims(user), expires_delta=access_token_expires
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
 
 @router.get("/me", response_model=User)
 async def read_users_me(current_user: User = Depends(get_current_user)):
     return current_user
+
+@router.post("/logout-all")
+async def logout_all(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """
+    Revoke every access and refresh token issued to the current user.
+    """
+    await revoke_all_for_user(db, current_user.id)
+    await token_versions.bump(db, current_user.id)
+    principal_cache.invalidate(current_user.email)
+    return {"message": "All sessions have been signed out."}
@@ -1,42 +1,206 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from backend.sql_database import get_db
-from backend.schemas import Course, CourseCreate, CourseUpdate
+from typing import List, Optional, Tuple
+from backend.sql_database import get_db, get_read_db
+from backend.schemas import (
+    Course, CourseCreate, CourseUpdate, CoursePartial, CourseModulesPatched, CursorPage,
+    CourseOutline, ModuleOutline, LessonSummary, Lesson,
+)
+from backend.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursorError, bad_cursor
+from backend.fieldsets import FieldSet
+from backend.course_model import CourseModel
+from backend.services.course_cache import course_cache, course_etag, version_from_if_match
+from backend.json_patch import JsonPatchError, JsonPatchOperation
+from backend.grading import modules_without_answers, without_answers
+from backend.models import User
+from backend.deps import get_current_user
 from backend import crud
 
 router = APIRouter(prefix="/courses", tags=["courses"])
 
+CoursePage = CursorPage[CoursePartial]
 
-@router.get("/", response_model=List[Course])
-async def read_courses(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
+EDITOR_ROLES = ("creator", "admin")
+
+
+def expected_version(if_match: Optional[str], course_id: int) -> Optional[int]:
+    if if_match is None:
+        return None
+    try:
+        return version_from_if_match(if_match, course_id)
+    except ValueError as e:
+        raise HTTPException(status_code=412, detail=str(e))
+
+
+def version_conflict(exc: crud.VersionConflictError) -> HTTPException:
+    return HTTPException(
+        status_code=412,
+        detail=f"Course was modified concurrently (now at version {exc.current_version}); reload and retry",
+    )
+
+def require_editor(current_user: User = Depends(get_current_user)) -> User:
+    """Course writes are for creators and admins; learners only read."""
+    if current_user.role not in EDITOR_ROLES:
+        raise HTTPException(status_code=403, detail="Only course creators can edit courses")
+    return current_user
+
+
+def hide_answers(course):
+    """
+    Drop correct_answer from a Course/CoursePartial's module quizzes and final exam, in
+    place. Public reads go through this; learners are graded by the quiz endpoints.
+    """
+    if course.modules is not None:
+        course.modules = modules_without_answers(course.modules)
+    if course.final_exam is not None:
+        course.final_exam = without_answers(course.final_exam)
+    return course
+
+course_fields = FieldSet(
+    CourseModel,
+    Course,
+    summary=("id", "title", "description", "price", "lesson_count", "quiz_count", "created_at"),
+    keys=("id", "created_at"),
+)
+
+
+@router.get("/", response_model=CoursePage, response_model_exclude_unset=True)
+async def read_courses(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    selected: Optional[Tuple[str, ...]] = Depends(course_fields.params()),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
     """
-    Retrieve all courses with pagination.
+    Retrieve courses, newest first, with cursor pagination.
     
-    - **skip**: Number of records to skip (default: 0)
-    - **limit**: Maximum number of records to return (default: 100)
+    - **limit**: Maximum number of records to return (default: 50, max: 100)
+    - **cursor**: `next_cursor` or `prev_cursor` from a previous page (omit for the first page)
+    - **fields** / **view**: Sparse fieldset; `view=summary` leaves out `modules`
+
+    Responses carry an ETag; send it back as If-None-Match to get a 304.
     """
-    courses = await crud.get_courses(db, skip=skip, limit=limit)
-    return courses
+    # Cache misses read the primary, not the replica: right after a write invalidates
+    # the cache, a lagging replica would hand back the old rows to be cached for the TTL
+    key = (limit, cursor, selected)
+    cached = course_cache.get_page(key)
+    if cached is None:
+        generation = course_cache.generation
+        try:
+            page = await crud.get_courses(db, limit=limit, cursor=cursor, options=course_fields.load_options(selected))
+        except InvalidCursorError as e:
+            raise bad_cursor(e)
+        page.items = [course_fields.project(course, selected) for course in page.items]
+        public_page = CoursePage.model_validate(page)
+        for item in public_page.items:
+            hide_answers(item)
+        body = public_page.model_dump_json(exclude_unset=True).encode()
+        cached = course_cache.put_page(key, body, generation)
+    return course_cache.respond(cached, if_none_match)
 
 
 @router.get("/{course_id}", response_model=Course)
-async def read_course(course_id: int, db: AsyncSession = Depends(get_db)):
+async def read_course(
+    course_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
     """
-    Retrieve a single course by ID.
+    Retrieve a single course by ID, without quiz and exam answers (editors read those
+    from `GET /courses/{course_id}/full`).
     
     - **course_id**: The ID of the course to retrieve
+
+    Responses carry an ETag; send it back as If-None-Match to get a 304.
+    """
+    # Misses read the primary (see read_courses); a replica's old version would also
+    # be served as the ETag editors send back as If-Match, failing every retry with 412
+    cached = course_cache.get_course(course_id)
+    if cached is None:
+        generation = course_cache.generation
+        course = await crud.get_course(db, course_id=course_id)
+        if course is None:
+            raise HTTPException(status_code=404, detail="Course not found")
+        body = hide_answers(Course.model_validate(course)).model_dump_json().encode()
+        cached = course_cache.put_course(course_id, body, generation, etag=course_etag(course_id, course.version))
+    return course_cache.respond(cached, if_none_match)
+
+
+@router.get("/{course_id}/full", response_model=Course)
+async def read_course_full(
+    course_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
     """
+    The complete course document, correct answers included, for creators editing it.
+    Not cached; its ETag is the one If-Match expects on writes.
+    """
+    if current_user.role not in EDITOR_ROLES:
+        raise HTTPException(status_code=403, detail="Only course creators can read answer keys")
     course = await crud.get_course(db, course_id=course_id)
     if course is None:
         raise HTTPException(status_code=404, detail="Course not found")
+    response.headers["ETag"] = course_etag(course_id, course.version)
     return course
 
 
+@router.get("/{course_id}/outline", response_model=CourseOutline)
+async def read_course_outline(course_id: int, db: AsyncSession = Depends(get_read_db)):
+    """
+    Course title, counts and module/lesson titles for navigation, without lesson text or
+    quizzes. Modules without lessons are not listed. Open a lesson with
+    `GET /courses/{course_id}/lessons/{module_idx}/{lesson_idx}`.
+    """
+    rows = await crud.get_course_outline(db, course_id)
+    if not rows:
+        raise HTTPException(status_code=404, detail="Course not found")
+
+    head = rows[0]
+    outline = CourseOutline(
+        id=head.id,
+        title=head.title,
+        description=head.description,
+        version=head.version,
+        lesson_count=head.lesson_count,
+        quiz_count=head.quiz_count,
+    )
+    for row in rows:
+        if row.module_idx is None:
+            continue
+        if not outline.modules or outline.modules[-1].index != row.module_idx:
+            outline.modules.append(ModuleOutline(index=row.module_idx, title=row.module_title))
+        outline.modules[-1].lessons.append(LessonSummary(
+            module_idx=row.module_idx,
+            lesson_idx=row.lesson_idx,
+            lesson_id=row.lesson_id,
+            type=row.type,
+            title=row.lesson_title,
+        ))
+    return outline
+
+
+@router.get("/{course_id}/lessons/{module_idx}/{lesson_idx}", response_model=Lesson)
+async def read_lesson(course_id: int, module_idx: int, lesson_idx: int, db: AsyncSession = Depends(get_read_db)):
+    """
+    A single lesson by its 0-based module and lesson position.
+    """
+    lesson = await crud.get_lesson(db, course_id, module_idx, lesson_idx)
+    if lesson is None:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    return lesson
+
+
 @router.post("/", response_model=Course, status_code=201)
-async def create_course(course: CourseCreate, db: AsyncSession = Depends(get_db)):
+async def create_course(
+    course: CourseCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_editor)
+):
     """
-    Create a new course.
+    Create a new course. Creators and admins only, as for every course write below.
     
     - **title**: Course title (required)
     - **description**: Course description (optional)
@@ -46,7 +210,14 @@ async def create_course(course: CourseCreate, db: AsyncSession = Depends(get_db)
 
 
 @router.put("/{course_id}", response_model=Course)
-async def update_course(course_id: int, course: CourseUpdate, db: AsyncSession = Depends(get_db)):
+async def update_course(
+    course_id: int,
+    course: CourseUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_editor)
+):
     """
     Update an existing course.
     
@@ -54,15 +225,57 @@ async def update_course(course_id: int, course: CourseUpdate, db: AsyncSession =
     - **title**: New course title (optional)
     - **description**: New course description (optional)
     - **modules**: New course modules (optional)
+
+    Send the course's ETag as If-Match to fail with 412 instead of overwriting a concurrent edit.
     """
-    updated_course = await crud.update_course(db=db, course_id=course_id, course=course)
+    try:
+        updated_course = await crud.update_course(
+            db=db, course_id=course_id, course=course, expected_version=expected_version(if_match, course_id)
+        )
+    except crud.VersionConflictError as e:
+        raise version_conflict(e)
     if updated_course is None:
         raise HTTPException(status_code=404, detail="Course not found")
+    response.headers["ETag"] = course_etag(course_id, updated_course.version)
     return updated_course
 
 
+@router.patch("/{course_id}/modules", response_model=CourseModulesPatched)
+async def patch_course_modules(
+    course_id: int,
+    operations: List[JsonPatchOperation],
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_editor)
+):
+    """
+    Edit a course's modules with RFC 6902 JSON Patch operations, applied inside Postgres.
+
+    Paths are relative to the modules array, e.g.
+    `[{"op": "replace", "path": "/0/lessons/2/content", "value": "..."}]`.
+    If-Match (the course ETag, or `*`) is required; a stale ETag gets 412 and nothing is written.
+    """
+    if if_match is None:
+        raise HTTPException(status_code=428, detail="If-Match header required")
+    try:
+        version = await crud.patch_course_modules(db, course_id, operations, expected_version(if_match, course_id))
+    except crud.VersionConflictError as e:
+        raise version_conflict(e)
+    except JsonPatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if version is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+    response.headers["ETag"] = course_etag(course_id, version)
+    return CourseModulesPatched(id=course_id, version=version)
+
+
 @router.delete("/{course_id}", status_code=204)
-async def delete_course(course_id: int, db: AsyncSession = Depends(get_db)):
+async def delete_course(
+    course_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_editor)
+):
     """
     Delete a course by ID.
     
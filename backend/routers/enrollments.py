@@ -1,22 +1,78 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional, Sequence, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from backend.sql_database import get_db
 from backend.enrollment_model import EnrollmentModel
+from backend.course_model import CourseModel
 from backend.models import User
-from backend.schemas import Enrollment, EnrollmentCreate, EnrollmentUpdate
+from backend.schemas import (
+    Enrollment, EnrollmentCreate, EnrollmentUpdate, EnrollmentPartial, CursorPage,
+    ProgressDelta, ProgressState, ProgressAccepted, EnrollmentWithCourse, EnrollmentCourseSummary,
+)
+from backend.progress import REPLACE_PROGRESS_SQL, merge_progress, percent
+from backend.services.progress_buffer import progress_buffer
+from backend.pagination import Page, paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursorError, bad_cursor
+from backend.fieldsets import FieldSet
 from backend.deps import get_current_user
+import json
 import logging
 
 router = APIRouter(prefix="/enrollments", tags=["enrollments"])
 logger = logging.getLogger(__name__)
 
+enrollment_fields = FieldSet(
+    EnrollmentModel,
+    Enrollment,
+    summary=("id", "course_id", "completed_lessons", "is_completed", "is_paid", "enrolled_at", "last_accessed"),
+    keys=("id", "enrolled_at"),
+)
+
 # --- CRUD Functions (Inline for now, could be moved to crud.py) ---
 
-async def get_user_enrollments(db: AsyncSession, user_id: str) -> List[EnrollmentModel]:
-    result = await db.execute(select(EnrollmentModel).where(EnrollmentModel.user_id == user_id))
-    return result.scalars().all()
+async def get_user_enrollments(db: AsyncSession, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None, options: Sequence = ()) -> Page:
+    stmt = select(EnrollmentModel).where(EnrollmentModel.user_id == user_id).options(*options)
+    return await paginate(db, stmt, EnrollmentModel.enrolled_at, EnrollmentModel.id, limit=limit, cursor=cursor)
+
+async def get_user_enrollments_with_courses(db: AsyncSession, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Page:
+    # Percentages come from the lesson counters, so neither JSONB document is read
+    stmt = (
+        select(
+            EnrollmentModel.id,
+            EnrollmentModel.course_id,
+            EnrollmentModel.completed_lessons,
+            func.coalesce(EnrollmentModel.is_completed, False).label("is_completed"),
+            func.coalesce(EnrollmentModel.is_paid, False).label("is_paid"),
+            EnrollmentModel.enrolled_at,
+            EnrollmentModel.last_accessed,
+            CourseModel.title,
+            CourseModel.description,
+            CourseModel.lesson_count,
+        )
+        .join(CourseModel, CourseModel.id == EnrollmentModel.course_id)
+        .where(EnrollmentModel.user_id == user_id)
+    )
+    page = await paginate(
+        db, stmt, EnrollmentModel.enrolled_at, EnrollmentModel.id, limit=limit, cursor=cursor, scalars=False
+    )
+    page.items = [
+        EnrollmentWithCourse(
+            id=row.id,
+            course_id=row.course_id,
+            is_completed=row.is_completed,
+            is_paid=row.is_paid,
+            enrolled_at=row.enrolled_at,
+            last_accessed=row.last_accessed,
+            completed_lessons=row.completed_lessons,
+            percent_complete=percent(row.completed_lessons, row.lesson_count),
+            course=EnrollmentCourseSummary(
+                id=row.course_id, title=row.title, description=row.description, lesson_count=row.lesson_count
+            ),
+        )
+        for row in page.items
+    ]
+    return page
 
 async def get_enrollment(db: AsyncSession, enrollment_id: str) -> Optional[EnrollmentModel]:
     result = await db.execute(select(EnrollmentModel).where(EnrollmentModel.id == enrollment_id))
@@ -26,6 +82,16 @@ async def get_enrollment_by_course(db: AsyncSession, user_id: str, course_id: in
     result = await db.execute(select(EnrollmentModel).where(EnrollmentModel.user_id == user_id, EnrollmentModel.course_id == course_id))
     return result.scalar_one_or_none()
 
+async def merge_progress_or_raise(db: AsyncSession, enrollment_id: str, user_id: str, delta: ProgressDelta):
+    row = await merge_progress(db, enrollment_id, user_id, delta.progress, delta.is_completed)
+    if row is None:
+        await db.rollback()
+        if await get_enrollment(db, enrollment_id) is None:
+            raise HTTPException(status_code=404, detail="Enrollment not found")
+        raise HTTPException(status_code=403, detail="Not authorized to update this enrollment")
+    await db.commit()
+    return row
+
 # --- Endpoints ---
 
 @router.post("/", response_model=Enrollment, status_code=status.HTTP_201_CREATED)
@@ -41,30 +107,45 @@ async def enroll_student(
     if enrollment.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Cannot enroll another user")
 
-    # Check if already enrolled
-    existing = await get_enrollment_by_course(db, enrollment.user_id, enrollment.course_id)
-    if existing:
+    # Single round trip: the unique (user_id, course_id) index arbitrates concurrent clicks
+    result = await db.execute(
+        pg_insert(EnrollmentModel)
+        .values(
+            user_id=enrollment.user_id,
+            course_id=enrollment.course_id,
+            progress_data={}
+        )
+        .on_conflict_do_nothing(index_elements=[EnrollmentModel.user_id, EnrollmentModel.course_id])
+        .returning(EnrollmentModel)
+    )
+    new_enrollment = result.scalar_one_or_none()
+    if new_enrollment is None:
+        await db.rollback()
         raise HTTPException(status_code=400, detail="User already enrolled in this course")
 
-    new_enrollment = EnrollmentModel(
-        user_id=enrollment.user_id,
-        course_id=enrollment.course_id,
-        progress_data={}
-    )
-    db.add(new_enrollment)
     await db.commit()
-    await db.refresh(new_enrollment)
     return new_enrollment
 
-@router.get("/", response_model=List[Enrollment])
+@router.get("/", response_model=CursorPage[EnrollmentPartial], response_model_exclude_unset=True)
 async def read_my_enrollments(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    selected: Optional[Tuple[str, ...]] = Depends(enrollment_fields.params()),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Get all enrollments for the current user.
+    Get the current user's enrollments, most recent first, with cursor pagination.
+    `view=summary` leaves out `progress_data`.
     """
-    return await get_user_enrollments(db, current_user.id)
+    try:
+        page = await get_user_enrollments(
+            db, current_user.id, limit=limit, cursor=cursor, options=enrollment_fields.load_options(selected)
+        )
+    except InvalidCursorError as e:
+        raise bad_cursor(e)
+    page.items = [enrollment_fields.project(enrollment, selected) for enrollment in page.items]
+    return page
 
 @router.get("/check", response_model=Optional[Enrollment])
 async def check_enrollment(
@@ -78,6 +159,22 @@ async def check_enrollment(
     enrollment = await get_enrollment_by_course(db, current_user.id, course_id)
     return enrollment
 
+@router.get("/dashboard", response_model=CursorPage[EnrollmentWithCourse])
+async def read_my_dashboard(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    The current user's enrollments with each course's title, description, lesson count and
+    percent complete, from one joined query. Neither `modules` nor `progress_data` is sent.
+    """
+    try:
+        return await get_user_enrollments_with_courses(db, current_user.id, limit=limit, cursor=cursor)
+    except InvalidCursorError as e:
+        raise bad_cursor(e)
+
 @router.get("/{enrollment_id}", response_model=Enrollment)
 async def read_enrollment(
     enrollment_id: str, 
@@ -103,25 +200,63 @@ async def update_progress(
     """
     Update progress data for a specific enrollment.
     """
-    enrollment = await get_enrollment(db, enrollment_id)
-    if not enrollment:
-        raise HTTPException(status_code=404, detail="Enrollment not found")
-        
-    if enrollment.user_id != current_user.id:
+    # The client sends the FULL progress object; prefer PATCH /{enrollment_id}/progress for ticks.
+    # Ownership is part of the WHERE clause, so the happy path is a single round trip, and
+    # completed_lessons / overall_percent are recounted by the same statement.
+    statement = text(REPLACE_PROGRESS_SQL).bindparams(
+        progress=json.dumps(update_data.progress_data),
+        is_completed=update_data.is_completed,
+        enrollment_id=enrollment_id,
+        user_id=current_user.id,
+    )
+    result = await db.execute(
+        select(EnrollmentModel).from_statement(statement).execution_options(populate_existing=True)
+    )
+    enrollment = result.scalar_one_or_none()
+    if enrollment is None:
+        await db.rollback()
+        if await get_enrollment(db, enrollment_id) is None:
+            raise HTTPException(status_code=404, detail="Enrollment not found")
         raise HTTPException(status_code=403, detail="Not authorized to update this enrollment")
-    
-    # Update fields
-    # Note: For JSONB, we usually need to replace the entire dict or use specialized update queries
-    # Here we typically expect the client to send the FULL updated progress object or merged payload
-    enrollment.progress_data = update_data.progress_data
-    
-    if update_data.is_completed is not None:
-        enrollment.is_completed = update_data.is_completed
-        
+
     await db.commit()
-    await db.refresh(enrollment)
     return enrollment
 
+@router.patch("/{enrollment_id}/progress", response_model=ProgressState)
+async def update_progress_delta(
+    enrollment_id: str,
+    delta: ProgressDelta,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Merge changed lesson ticks into the stored progress and recompute overall_percent.
+
+    Send only what changed, e.g. `{"progress": {"mod-1": {"3": true}}}`. The merge happens
+    atomically in one UPDATE, so concurrent ticks from several tabs are never lost.
+    """
+    row = await merge_progress_or_raise(db, enrollment_id, current_user.id, delta)
+    return ProgressState(id=row.id, overall_percent=row.overall_percent, is_completed=bool(row.is_completed))
+
+@router.post("/{enrollment_id}/progress/ping", response_model=ProgressAccepted, status_code=status.HTTP_202_ACCEPTED)
+async def ping_progress(
+    enrollment_id: str,
+    delta: ProgressDelta,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Fire-and-forget progress tick for players that report many times a minute.
+
+    With PROGRESS_BUFFER_ENABLED the tick is acknowledged immediately and coalesced with
+    others for the same enrollment until the next batched flush; ticks for enrollments the
+    user does not own are dropped at flush time. Otherwise it is merged synchronously.
+    """
+    if progress_buffer.submit(enrollment_id, current_user.id, delta.progress, delta.is_completed):
+        return ProgressAccepted(id=enrollment_id, buffered=True)
+    await merge_progress_or_raise(db, enrollment_id, current_user.id, delta)
+    return ProgressAccepted(id=enrollment_id, buffered=False)
+
 @router.post("/pay-certificate", response_model=Enrollment)
 async def pay_certificate(
     course_id: int,
@@ -131,11 +266,16 @@ async def pay_certificate(
     """
     Mark an enrollment as paid for certificate collection.
     """
-    enrollment = await get_enrollment_by_course(db, current_user.id, course_id)
+    result = await db.execute(
+        update(EnrollmentModel)
+        .where(EnrollmentModel.user_id == current_user.id, EnrollmentModel.course_id == course_id)
+        .values(is_paid=True)
+        .returning(EnrollmentModel)
+        .execution_options(synchronize_session=False)
+    )
+    enrollment = result.scalar_one_or_none()
     if not enrollment:
         raise HTTPException(status_code=404, detail="Enrollment not found")
-        
-    enrollment.is_paid = True
+
     await db.commit()
-    await db.refresh(enrollment)
     return enrollment
@@ -0,0 +1,165 @@
+import os
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.sql_database import get_db, get_read_db
+from backend.quiz_model import QuizAttemptModel
+from backend.models import User
+from backend.schemas import (
+    QuizView, QuizSubmission, QuizResult, QuizAttemptSummary, BatchGradeRequest, BatchGradeResult,
+)
+from backend.grading import (
+    NotEnrolledError, QuizNotFoundError, SubmissionLengthError, correct_flags, encode_answers,
+    find_unknown_users, get_answer_key, get_quiz_questions, grade_batch, is_quiz_name, lock_attempt_count,
+    record_attempts,
+)
+from backend.deps import get_current_user
+import logging
+
+router = APIRouter(prefix="/courses", tags=["quizzes"])
+logger = logging.getLogger(__name__)
+
+GRADER_ROLES = ("creator", "admin")
+MAX_BATCH_SUBMISSIONS = 20000
+# Attempts a learner gets at each quiz; which questions were right is only revealed on the last
+QUIZ_MAX_ATTEMPTS = max(1, int(os.getenv("QUIZ_MAX_ATTEMPTS", 3)))
+
+
+def check_quiz_name(quiz: str):
+    if not is_quiz_name(quiz):
+        raise HTTPException(status_code=404, detail="Quiz not found")
+
+
+async def answer_key_or_404(db: AsyncSession, course_id: int, quiz: str) -> bytes:
+    check_quiz_name(quiz)
+    try:
+        return await get_answer_key(db, course_id, quiz)
+    except QuizNotFoundError:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+
+
+def encode_or_422(answers, length: int) -> bytes:
+    try:
+        return encode_answers(answers, length)
+    except SubmissionLengthError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@router.get("/{course_id}/quizzes/{quiz}", response_model=QuizView)
+async def read_quiz(course_id: int, quiz: str, db: AsyncSession = Depends(get_read_db)):
+    """
+    A module quiz (`quiz` = module position, from 0) or the final exam (`quiz` = "final"),
+    without correct answers. Submit choices to the attempts endpoint to be graded.
+    """
+    check_quiz_name(quiz)
+    try:
+        questions = await get_quiz_questions(db, course_id, quiz)
+    except QuizNotFoundError:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    return QuizView(course_id=course_id, quiz=quiz, questions=questions)
+
+
+@router.post("/{course_id}/quizzes/{quiz}/attempts", response_model=QuizResult, status_code=status.HTTP_201_CREATED)
+async def submit_attempt(
+    course_id: int,
+    quiz: str,
+    submission: QuizSubmission,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Grade the current user's answers (option index per question) and record the attempt.
+
+    Only enrolled learners can submit, at most QUIZ_MAX_ATTEMPTS times per quiz. Earlier
+    attempts get just the score; the per-question `correct` flags come with the last one,
+    so they can't be used to work out the key and then resubmit.
+    """
+    key = await answer_key_or_404(db, course_id, quiz)
+    answers = encode_or_422(submission.answers, len(key))
+    try:
+        used = await lock_attempt_count(db, current_user.id, course_id, quiz)
+    except NotEnrolledError:
+        raise HTTPException(status_code=403, detail="Enroll in the course to submit its quizzes")
+    if used >= QUIZ_MAX_ATTEMPTS:
+        raise HTTPException(status_code=403, detail=f"All {QUIZ_MAX_ATTEMPTS} attempts at this quiz have been used")
+
+    graded = grade_batch(key, [answers])
+    attempt_ids = await record_attempts(db, course_id, quiz, len(key), [current_user.id], [answers], graded.scores)
+    await db.commit()
+    attempts_left = QUIZ_MAX_ATTEMPTS - used - 1
+    return QuizResult(
+        attempt_id=attempt_ids[0],
+        quiz=quiz,
+        score=graded.scores[0],
+        total=len(key),
+        attempts_left=attempts_left,
+        correct=correct_flags(key, answers) if attempts_left == 0 else None,
+    )
+
+
+@router.get("/{course_id}/quizzes/{quiz}/attempts", response_model=List[QuizAttemptSummary])
+async def read_my_attempts(
+    course_id: int,
+    quiz: str,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    The current user's attempts at a quiz, most recent first.
+    """
+    check_quiz_name(quiz)
+    result = await db.execute(
+        select(QuizAttemptModel.id, QuizAttemptModel.quiz, QuizAttemptModel.score, QuizAttemptModel.total, QuizAttemptModel.created_at)
+        .where(
+            QuizAttemptModel.user_id == current_user.id,
+            QuizAttemptModel.course_id == course_id,
+            QuizAttemptModel.quiz == quiz,
+        )
+        .order_by(QuizAttemptModel.created_at.desc())
+        .limit(limit)
+    )
+    return result.all()
+
+
+@router.post("/{course_id}/quizzes/{quiz}/grade-batch", response_model=BatchGradeResult)
+async def grade_cohort(
+    course_id: int,
+    quiz: str,
+    request: BatchGradeRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Grade many submissions at once (e.g. a cohort's final exams), for creators.
+
+    Returns scores in submission order and per-question correct counts. With `store`,
+    every submission is also recorded as an attempt, in a single INSERT; unknown user ids
+    then fail the whole batch with 422 before anything is written.
+    """
+    if current_user.role not in GRADER_ROLES:
+        raise HTTPException(status_code=403, detail="Only course creators can grade in bulk")
+    if len(request.submissions) > MAX_BATCH_SUBMISSIONS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_SUBMISSIONS} submissions per batch")
+
+    key = await answer_key_or_404(db, course_id, quiz)
+    encoded = [encode_or_422(submission.answers, len(key)) for submission in request.submissions]
+    graded = grade_batch(key, encoded)
+
+    attempt_ids = []
+    if request.store and encoded:
+        user_ids = [submission.user_id for submission in request.submissions]
+        unknown = await find_unknown_users(db, user_ids)
+        if unknown:
+            raise HTTPException(status_code=422, detail=f"Unknown user ids: {', '.join(unknown)}")
+        attempt_ids = await record_attempts(db, course_id, quiz, len(key), user_ids, encoded, graded.scores)
+        await db.commit()
+    return BatchGradeResult(
+        quiz=quiz,
+        total=len(key),
+        scores=graded.scores,
+        question_correct=graded.question_correct,
+        mean_score=sum(graded.scores) / len(encoded) if encoded else 0.0,
+        attempt_ids=attempt_ids,
+    )
@@ -1,21 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from backend.sql_database import get_db
+from sqlalchemy import select, insert
+from backend.sql_database import get_db, get_read_db
 from backend.sql_models import SQLResource
-from backend.models import Resource, ResourceCreate, User
+from backend.models import Resource, ResourceCreate, ResourcePartial, User
 from backend.deps import get_current_user
+from backend.schemas import CursorPage
+from backend.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursorError, bad_cursor, paginate
+from backend.fieldsets import FieldSet
 
 router = APIRouter()
 
-@router.get("/", response_model=List[Resource])
-async def get_resources(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(SQLResource))
-    # scalars() returns Python objects (SQLResource instances)
-    # Pydantic's from_attributes=True on Resource model will convert them
-    resources = result.scalars().all()
-    return resources
+resource_fields = FieldSet(
+    SQLResource,
+    Resource,
+    summary=("id", "title", "type", "image", "created_at"),
+    keys=("id", "created_at"),
+)
+
+@router.get("/", response_model=CursorPage[ResourcePartial], response_model_exclude_unset=True)
+async def get_resources(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    selected: Optional[Tuple[str, ...]] = Depends(resource_fields.params()),
+    db: AsyncSession = Depends(get_read_db),
+):
+    stmt = select(SQLResource).options(*resource_fields.load_options(selected))
+    try:
+        page = await paginate(db, stmt, SQLResource.created_at, SQLResource.id, limit=limit, cursor=cursor)
+    except InvalidCursorError as e:
+        raise bad_cursor(e)
+    # Full view keeps SQLResource instances;
+    # Pydantic's from_attributes=True on the response model will convert them
+    page.items = [resource_fields.project(resource, selected) for resource in page.items]
+    return page
 
 @router.post("/", response_model=Resource)
 async def create_resource(
@@ -25,15 +44,18 @@ async def create_resource(
 ):
     # Only allow creation if user is admin? For now no check, as before.
     
-    new_resource = SQLResource(
-        title=resource.title,
-        type=resource.type,
-        description=resource.description,
-        image=resource.image
+    # INSERT ... RETURNING hands back the stored row without a refresh SELECT
+    result = await db.execute(
+        insert(SQLResource)
+        .values(
+            title=resource.title,
+            type=resource.type,
+            description=resource.description,
+            image=resource.image
+        )
+        .returning(SQLResource)
     )
-    
-    db.add(new_resource)
+    new_resource = result.scalar_one()
     await db.commit()
-    await db.refresh(new_resource)
     
     return Resource.model_validate(new_resource)
@@ -1,7 +1,9 @@
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, field_validator
+from typing import Optional, List, Dict, Any, Generic, TypeVar
 from datetime import datetime
 
+T = TypeVar("T")
+
 
 class ModuleItem(BaseModel):
     """Individual module within a course"""
@@ -17,6 +19,7 @@ class CourseBase(BaseModel):
     description: Optional[str] = None
     price: Optional[int] = 0
     modules: List[Dict[str, Any]] = []
+    final_exam: List[Dict[str, Any]] = []
 
 
 class CourseCreate(CourseBase):
@@ -29,17 +32,135 @@ class CourseUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     modules: Optional[List[Dict[str, Any]]] = None
+    final_exam: Optional[List[Dict[str, Any]]] = None
 
 
 class Course(CourseBase):
     """Complete course model with database fields"""
     id: int
+    version: int = 1
+    lesson_ids: List[str] = []
+    lesson_count: int = 0
+    quiz_count: int = 0
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class CoursePartial(BaseModel):
+    """Course with only the fields selected via ?fields= or ?view=summary (unset ones are omitted)"""
+    id: int
+    title: Optional[str] = None
+    description: Optional[str] = None
+    price: Optional[int] = None
+    modules: Optional[List[Dict[str, Any]]] = None
+    final_exam: Optional[List[Dict[str, Any]]] = None
+    version: Optional[int] = None
+    lesson_ids: Optional[List[str]] = None
+    lesson_count: Optional[int] = None
+    quiz_count: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class CourseModulesPatched(BaseModel):
+    """Result of a JSON Patch on a course's modules; the document itself is not echoed back"""
+    id: int
+    version: int
+
+
+class LessonSummary(BaseModel):
+    """A lesson's place in the outline; `lesson_id` is the key progress ticks use"""
+    module_idx: int
+    lesson_idx: int
+    lesson_id: str
+    type: Optional[str] = None
+    title: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class Lesson(LessonSummary):
+    """A single lesson with its content"""
+    course_id: int
+    module_title: Optional[str] = None
+    text: Optional[str] = None
+
+
+class ModuleOutline(BaseModel):
+    index: int
+    title: Optional[str] = None
+    lessons: List[LessonSummary] = []
+
+
+class CourseOutline(BaseModel):
+    """Course header and lesson titles, without lesson text or quizzes"""
+    id: int
+    title: str
+    description: Optional[str] = None
+    version: int = 1
+    lesson_count: int = 0
+    quiz_count: int = 0
+    modules: List[ModuleOutline] = []
+
+
+class QuizView(BaseModel):
+    """A quiz as learners see it: questions and options, no correct answers"""
+    course_id: int
+    quiz: str
+    questions: List[Dict[str, Any]]
+
+
+class QuizSubmission(BaseModel):
+    """Chosen option index per question, in order; null for unanswered"""
+    answers: List[Optional[int]]
+
+
+class QuizResult(BaseModel):
+    attempt_id: int
+    quiz: str
+    score: int
+    total: int
+    attempts_left: int
+    # Per question, only once no attempts are left
+    correct: Optional[List[bool]] = None
+
+
+class QuizAttemptSummary(BaseModel):
+    id: int
+    quiz: str
+    score: int
+    total: int
     created_at: datetime
 
     class Config:
         from_attributes = True
 
 
+class CohortSubmission(BaseModel):
+    user_id: str
+    answers: List[Optional[int]]
+
+
+class BatchGradeRequest(BaseModel):
+    submissions: List[CohortSubmission]
+    store: bool = False
+
+
+class BatchGradeResult(BaseModel):
+    """Scores in submission order plus per-question correct counts"""
+    quiz: str
+    total: int
+    scores: List[int]
+    question_correct: List[int]
+    mean_score: float
+    attempt_ids: List[int] = []
+
+
 class EnrollmentBase(BaseModel):
     user_id: str
     course_id: int
@@ -54,9 +175,34 @@ class EnrollmentUpdate(BaseModel):
     is_completed: Optional[bool] = None
 
 
+class ProgressDelta(BaseModel):
+    """Only the lesson ticks that changed: {module_id: {lesson_id: true/false}}"""
+    progress: Dict[str, Dict[str, bool]]
+    is_completed: Optional[bool] = None
+
+    @field_validator("progress")
+    @classmethod
+    def no_reserved_keys(cls, progress):
+        if "overall_percent" in progress:
+            raise ValueError("overall_percent is computed by the server")
+        return progress
+
+
+class ProgressState(BaseModel):
+    id: str
+    overall_percent: int
+    is_completed: bool
+
+
+class ProgressAccepted(BaseModel):
+    id: str
+    buffered: bool
+
+
 class Enrollment(EnrollmentBase):
     id: str
     progress_data: Dict[str, Any] = {}
+    completed_lessons: int = 0
     is_completed: bool
     is_paid: bool = False
     enrolled_at: datetime
@@ -64,3 +210,50 @@ class Enrollment(EnrollmentBase):
 
     class Config:
         from_attributes = True
+
+
+class EnrollmentCourseSummary(BaseModel):
+    """The course fields a dashboard card needs, without the modules document"""
+    id: int
+    title: str
+    description: Optional[str] = None
+    lesson_count: int = 0
+
+
+class EnrollmentWithCourse(BaseModel):
+    """Enrollment joined with its course summary and computed progress"""
+    id: str
+    course_id: int
+    is_completed: bool
+    is_paid: bool = False
+    enrolled_at: datetime
+    last_accessed: Optional[datetime] = None
+    completed_lessons: int = 0
+    percent_complete: int = 0
+    course: EnrollmentCourseSummary
+
+
+class EnrollmentPartial(BaseModel):
+    """Enrollment with only the fields selected via ?fields= or ?view=summary"""
+    id: str
+    user_id: Optional[str] = None
+    course_id: Optional[int] = None
+    progress_data: Optional[Dict[str, Any]] = None
+    completed_lessons: Optional[int] = None
+    is_completed: Optional[bool] = None
+    is_paid: Optional[bool] = None
+    enrolled_at: Optional[datetime] = None
+    last_accessed: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class CursorPage(BaseModel, Generic[T]):
+    """One page of a keyset-paginated list; pass a cursor back as ?cursor= to move"""
+    items: List[T]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+    class Config:
+        from_attributes = True
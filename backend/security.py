@@ -2,7 +2,10 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import jwt
 from passlib.context import CryptContext
+import hashlib
+import hmac
 import os
+import secrets
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -12,6 +15,12 @@ load_dotenv(ROOT_DIR / '.env')
 SECRET_KEY = os.environ.get("SECRET_KEY", "supersecretkey123")
 ALGORITHM = os.environ.get("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+VERIFICATION_TOKEN_EXPIRE_HOURS = int(os.environ.get("VERIFICATION_TOKEN_EXPIRE_HOURS", 48))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.environ.get("REFRESH_TOKEN_EXPIRE_DAYS", 14))
+# A client retrying a refresh (timeout, two tabs) within this window is not treated as theft
+REFRESH_TOKEN_REUSE_GRACE_SECONDS = int(os.environ.get("REFRESH_TOKEN_REUSE_GRACE_SECONDS", 30))
+# Opt-in: embed the authorization-relevant user fields in the access token
+JWT_EMBED_CLAIMS = os.environ.get("JWT_EMBED_CLAIMS", "false").lower() in ("1", "true", "yes")
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -30,3 +39,42 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
+
+def _epoch(value: Optional[datetime]) -> Optional[int]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        # Timestamps are stored as naive UTC
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+def build_token_claims(user) -> dict:
+    """
+    Access-token payload for a user row. With JWT_EMBED_CLAIMS enabled the token is
+    self-contained: routes can authorize from it, and `ver` must match the user's
+    current token_version for the claims to be trusted.
+    """
+    if not JWT_EMBED_CLAIMS:
+        return {"sub": user.email}
+    return {
+        "sub": user.email,
+        "uid": user.id,
+        "name": user.full_name,
+        "role": user.role,
+        "plan": user.plan,
+        "sub_status": user.subscription_status,
+        "trial_ends_at": _epoch(user.trial_ends_at),
+        "disabled": bool(user.disabled),
+        "verified": bool(user.is_verified),
+        "ver": user.token_version or 0,
+    }
+
+def generate_opaque_token() -> str:
+    return secrets.token_urlsafe(32)
+
+def hash_token(token: str) -> str:
+    """
+    Keyed digest for opaque tokens (refresh and email-verification tokens) stored server-side.
+    Unlike passwords they are high-entropy, so a single HMAC is enough.
+    """
+    return hmac.new(SECRET_KEY.encode(), token.encode(), hashlib.sha256).hexdigest()
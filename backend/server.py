@@ -3,11 +3,25 @@ from starlette.middleware.cors import CORSMiddleware
 import logging
 import os
 from fastapi.staticfiles import StaticFiles
-from backend.sql_database import engine, Base
+from backend.sql_database import engine, pool_stats, create_migration_engine
+from backend import migrations
 import backend.sql_models  # Ensure models are registered
 import backend.course_model # Ensure course models are registered
 import backend.enrollment_model # Ensure enrollment models are registered
-from backend.routers import auth, resources, payments, courses, enrollments, media, ai
+import backend.lesson_model # Ensure lesson models are registered
+import backend.quiz_model # Ensure quiz models are registered
+import backend.generation_job_model # Ensure generation job models are registered
+import backend.generation_cache_model # Ensure generation cache models are registered
+from backend.routers import auth, resources, payments, courses, enrollments, quizzes, media, ai
+from backend.services.password_hasher import password_hasher
+from backend.services.principal_cache import principal_cache
+from backend.services.token_versions import token_versions
+from backend.services.email_outbox import email_outbox_worker
+from backend.services.course_cache import course_cache
+from backend.services.progress_buffer import progress_buffer
+from backend.services.course_generator import course_generator
+from backend.services.generation_jobs import generation_job_worker
+from backend.services.generation_cache import generation_cache
 from dotenv import load_dotenv
 
 # Load environment variables from .env
@@ -16,6 +30,8 @@ load_dotenv()
 # App init
 app = FastAPI()
 
+AUTO_MIGRATE = os.environ.get("AUTO_MIGRATE", "false").lower() in ("1", "true", "yes")
+
 # CORS Architecture
 # We pull from env but provide a comprehensive default for local development.
 raw_origins = os.environ.get('CORS_ORIGINS', 'http://localhost:3000,http://localhost:8080,http://localhost:8081,http://localhost:8082,https://pohei.de,https://www.pohei.de')
@@ -62,6 +78,24 @@ async def root():
     """
     return {"message": "LearnFlow API is Pulse-Ready", "status": "active"}
 
+@api_router.get("/metrics")
+async def metrics():
+    """
+    In-process runtime counters (worker pools, caches) for capacity tuning.
+    """
+    return {
+        "db_pool": pool_stats(),
+        "password_hasher": password_hasher.stats(),
+        "principal_cache": principal_cache.stats(),
+        "token_versions": token_versions.stats(),
+        "email_outbox": email_outbox_worker.stats(),
+        "course_cache": course_cache.stats(),
+        "progress_buffer": progress_buffer.stats(),
+        "ai_generation": course_generator.stats(),
+        "generation_jobs": generation_job_worker.stats(),
+        "generation_cache": generation_cache.stats(),
+    }
+
 # Include sub-routers under /api
 # We standardize everything under /api/{router_prefix}
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -70,6 +104,7 @@ api_router.include_router(payments.router, prefix="/payments", tags=["payments"]
 api_router.include_router(ai.router) # Already has /ai prefix
 api_router.include_router(courses.router) # Already has /courses prefix
 api_router.include_router(enrollments.router) # Already has /enrollments prefix
+api_router.include_router(quizzes.router) # Nested under /courses
 api_router.include_router(media.router, prefix="/media", tags=["media"])
 
 app.include_router(api_router)
@@ -85,13 +120,42 @@ elif os.path.exists("static") and any(os.scandir("static")):
 # Events
 @app.on_event("startup")
 async def startup_event():
+    # One version query instead of create_all's per-table catalog lookups. Schema changes
+    # run once per deploy via `python -m backend.migrations upgrade`; AUTO_MIGRATE=true
+    # applies them here instead (single-instance/local setups).
     try:
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        logging.info("Database tables created/verified successfully.")
+        current_version, latest_version = await migrations.check(engine)
+        if current_version < latest_version:
+            if AUTO_MIGRATE:
+                migration_engine = create_migration_engine()
+                try:
+                    applied = await migrations.upgrade(migration_engine)
+                finally:
+                    await migration_engine.dispose()
+                logging.info(f"Applied database migrations: {applied}")
+            else:
+                logging.warning(
+                    f"Database schema is at version {current_version} but this build expects {latest_version}. "
+                    "Run `python -m backend.migrations upgrade`."
+                )
+        else:
+            logging.info(f"Database schema is current (version {current_version}).")
     except Exception as e:
         logging.error(f"Failed to initialize database: {e}")
         logging.warning("Application starting WITHOUT database connection. Some features may be limited.")
+    email_outbox_worker.start()
+    progress_buffer.start()
+    generation_job_worker.start(ai.build_course)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Flush buffered progress before the connection pool goes away
+    await progress_buffer.stop()
+    await email_outbox_worker.stop()
+    # Interrupted jobs are released back to the queue before the pools go away
+    await generation_job_worker.stop()
+    password_hasher.shutdown()
+    course_generator.shutdown()
 
 # Logging
 logging.basicConfig(
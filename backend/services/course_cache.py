@@ -0,0 +1,129 @@
+import os
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Hashable, Optional
+from fastapi import Response
+from backend.services.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Course content changes rarely; the TTL only bounds staleness in *other* worker
+# processes, since writes invalidate this process's copy immediately.
+COURSE_CACHE_TTL = float(os.getenv("COURSE_CACHE_TTL", 300))
+COURSE_CACHE_SIZE = int(os.getenv("COURSE_CACHE_SIZE", 2000))
+COURSE_CACHE_MAX_BYTES = int(os.getenv("COURSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+COURSE_PAGE_CACHE_MAX_BYTES = int(os.getenv("COURSE_PAGE_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+
+
+@dataclass(frozen=True, slots=True)
+class CachedBody:
+    """A pre-serialized JSON response body and its strong ETag."""
+    body: bytes
+    etag: str
+
+    def __len__(self):
+        return len(self.body)
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def course_etag(course_id: int, version: int) -> str:
+    """Single courses are tagged by version, so If-Match can be checked without reading the document."""
+    return f'"course-{course_id}-v{version}"'
+
+
+def version_from_if_match(if_match: str, course_id: int) -> Optional[int]:
+    """
+    Expected version from an If-Match header; None for "*" (any version).
+    Raises ValueError for tags that cannot belong to this course (If-Match never matches weak tags).
+    """
+    tag = if_match.strip()
+    if tag == "*":
+        return None
+    prefix = f'"course-{course_id}-v'
+    if not (tag.startswith(prefix) and tag.endswith('"') and tag[len(prefix):-1].isdigit()):
+        raise ValueError(f"If-Match {if_match!r} is not an ETag of course {course_id}")
+    return int(tag[len(prefix):-1])
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+class CourseCache:
+    """
+    Read-through cache of serialized course responses, keyed by course id and by list query.
+
+    crud.create_course/update_course/delete_course invalidate it after commit. A
+    generation counter stops a read that raced a write from caching what it read.
+    """
+
+    def __init__(self):
+        self._courses = TTLCache(maxsize=COURSE_CACHE_SIZE, ttl=COURSE_CACHE_TTL, maxbytes=COURSE_CACHE_MAX_BYTES)
+        self._pages = TTLCache(maxsize=COURSE_CACHE_SIZE, ttl=COURSE_CACHE_TTL, maxbytes=COURSE_PAGE_CACHE_MAX_BYTES)
+        self.generation = 0
+        self.not_modified = 0
+        self.bytes_saved = 0
+        self.stale_puts_skipped = 0
+
+    def get_course(self, course_id: int) -> Optional[CachedBody]:
+        return self._courses.get(course_id)
+
+    def put_course(self, course_id: int, body: bytes, generation: int, etag: Optional[str] = None) -> CachedBody:
+        cached = CachedBody(body, etag or make_etag(body))
+        if generation == self.generation:
+            self._courses.put(course_id, cached)
+        else:
+            self.stale_puts_skipped += 1
+        return cached
+
+    def get_page(self, key: Hashable) -> Optional[CachedBody]:
+        return self._pages.get(key)
+
+    def put_page(self, key: Hashable, body: bytes, generation: int) -> CachedBody:
+        cached = CachedBody(body, make_etag(body))
+        if generation == self.generation:
+            self._pages.put(key, cached)
+        else:
+            self.stale_puts_skipped += 1
+        return cached
+
+    def invalidate_course(self, course_id: int):
+        """A course changed or was deleted: drop it and every list page (any page may show it)."""
+        self.generation += 1
+        self._courses.invalidate(course_id)
+        self._pages.clear()
+
+    def invalidate_pages(self):
+        """A course was created: existing detail entries stay valid, list pages do not."""
+        self.generation += 1
+        self._pages.clear()
+
+    def respond(self, cached: CachedBody, if_none_match: Optional[str]) -> Response:
+        headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, cached.etag):
+            self.not_modified += 1
+            self.bytes_saved += len(cached.body)
+            return Response(status_code=304, headers=headers)
+        return Response(content=cached.body, media_type="application/json", headers=headers)
+
+    def stats(self):
+        return {
+            "courses": self._courses.stats(),
+            "pages": self._pages.stats(),
+            "not_modified": self.not_modified,
+            "bytes_saved": self.bytes_saved,
+            "stale_puts_skipped": self.stale_puts_skipped,
+        }
+
+# Global instance
+course_cache = CourseCache()
@@ -0,0 +1,91 @@
+import os
+import asyncio
+import logging
+import threading
+from contextvars import ContextVar
+from typing import AsyncIterator, List, Optional
+from backend.services.worker_pool import BoundedExecutor
+
+logger = logging.getLogger(__name__)
+
+# A Gemini call holds a worker thread for 10-60s while it waits on the network; the cap
+# bounds both threads and concurrent upstream requests (and so quota burn) per process.
+# A fanned-out course (routers/ai.py) makes one call per module plus the final exam.
+AI_GENERATION_WORKERS = int(os.getenv("AI_GENERATION_WORKERS", 8))
+AI_GENERATION_QUEUE_SIZE = int(os.getenv("AI_GENERATION_QUEUE_SIZE", 16))
+# How long a request may wait for a free worker before it is answered 503
+AI_GENERATION_QUEUE_TIMEOUT = float(os.getenv("AI_GENERATION_QUEUE_TIMEOUT", 15))
+
+# Set (to [0]) around a course generation to count the model calls it makes, including
+# those of tasks it fans out to, which inherit the context (see generation_cache.py)
+model_calls: ContextVar[Optional[List[int]]] = ContextVar("model_calls", default=None)
+
+
+def _count_call():
+    calls = model_calls.get()
+    if calls is not None:
+        calls[0] += 1
+
+
+class CourseGenerator:
+    """
+    Runs blocking Gemini calls on a dedicated bounded thread pool so a long generation
+    never stalls the event loop. Raises PoolSaturatedError when the pool is saturated.
+    """
+
+    def __init__(self):
+        self.pool = BoundedExecutor(
+            "ai-generation",
+            max_workers=AI_GENERATION_WORKERS,
+            max_queue=AI_GENERATION_QUEUE_SIZE,
+            queue_timeout=AI_GENERATION_QUEUE_TIMEOUT,
+        )
+
+    async def generate(self, model, prompt: str, admitted: bool = False):
+        """
+        One blocking model call on the pool. `admitted` calls continue a generation whose
+        first call was accepted: they wait for a worker instead of being turned away.
+        """
+        _count_call()
+        return await self.pool.run(model.generate_content, prompt, admitted=admitted)
+
+    async def stream(self, model, prompt: str) -> AsyncIterator[str]:
+        """
+        Yield the text chunks of a streamed generation as the worker thread receives them.
+        The call holds one pool slot until the model finishes or the consumer stops
+        iterating; errors from the SDK are raised after the chunks received before them.
+        """
+        _count_call()
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        stopped = threading.Event()
+
+        def pump():
+            for chunk in model.generate_content(prompt, stream=True):
+                if stopped.is_set():
+                    break
+                loop.call_soon_threadsafe(chunks.put_nowait, chunk.text)
+
+        # Chunks are scheduled on the loop before the run's own completion, so the
+        # end marker always comes last
+        run = asyncio.ensure_future(self.pool.run(pump))
+        run.add_done_callback(lambda _: chunks.put_nowait(None))
+        try:
+            while (chunk := await chunks.get()) is not None:
+                yield chunk
+            await run
+        finally:
+            if not run.done():
+                # Consumer went away: let the thread wind down at its next chunk rather
+                # than cancelling, which would free the slot while the thread still runs
+                stopped.set()
+                run.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    def stats(self):
+        return self.pool.stats()
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+# Global instance
+course_generator = CourseGenerator()
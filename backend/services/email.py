@@ -1,8 +1,12 @@
 import os
+import asyncio
 import logging
+import smtplib
+from email.message import EmailMessage
 from typing import List, Optional
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
+from backend.sql_models import SQLEmailOutbox
 
 logger = logging.getLogger(__name__)
 
@@ -11,37 +15,85 @@ class EmailService:
         self.api_key = os.getenv("SENDGRID_API_KEY")
         self.from_email = os.getenv("FROM_EMAIL", "noreply@learnflow.ai")
         self.client = SendGridAPIClient(self.api_key) if self.api_key else None
+        # "sendgrid" (default when an API key is set), "smtp" (e.g. a local sink for
+        # offline load tests) or "log" (development: nothing is sent)
+        self.transport = os.getenv("EMAIL_TRANSPORT", "sendgrid" if self.client else "log")
+        self.smtp_host = os.getenv("SMTP_HOST", "localhost")
+        self.smtp_port = int(os.getenv("SMTP_PORT", 1025))
 
-    async def send_email(
-        self, 
-        to_emails: List[str], 
-        subject: str, 
+    def deliver(
+        self,
+        to_emails: List[str],
+        subject: str,
         html_content: str,
         from_email: Optional[str] = None
     ):
         """
-        Send an email using SendGrid. 
-        If no API key is set, it logs the email content to console (for development).
+        Blocking delivery through the configured transport. Raises on failure.
+        Call from a worker thread, never directly from a request handler.
         """
-        if not self.client:
+        sender = from_email or self.from_email
+
+        if self.transport == "smtp":
+            message = EmailMessage()
+            message["From"] = sender
+            message["To"] = ", ".join(to_emails)
+            message["Subject"] = subject
+            message.set_content(html_content, subtype="html")
+            with smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=10) as smtp:
+                smtp.send_message(message)
+            return
+
+        if self.transport != "sendgrid" or not self.client:
             logger.info(f"DEMO MODE: Email not sent (no API key). To: {to_emails}, Subject: {subject}")
-            # In a real dev environment, we would log the content or use a local SMTP tester
-            return True
+            return
 
-        message = Mail(
-            from_email=from_email or self.from_email,
+        response = self.client.send(Mail(
+            from_email=sender,
             to_emails=to_emails,
             subject=subject,
             html_content=html_content
-        )
+        ))
+        if response.status_code >= 300:
+            raise RuntimeError(f"SendGrid returned status {response.status_code}")
+        logger.info(f"Email sent! Status code: {response.status_code}")
 
+    async def send_email(
+        self,
+        to_emails: List[str],
+        subject: str,
+        html_content: str,
+        from_email: Optional[str] = None
+    ):
+        """
+        Send an email immediately, off the event loop.
+        Prefer `enqueue` inside request handlers so the response never waits on the provider.
+        """
         try:
-            response = self.client.send(message)
-            logger.info(f"Email sent! Status code: {response.status_code}")
+            await asyncio.to_thread(self.deliver, to_emails, subject, html_content, from_email)
             return True
         except Exception as e:
             logger.error(f"Failed to send email: {e}")
             return False
 
+    def enqueue(
+        self,
+        db,
+        to_emails: List[str],
+        subject: str,
+        html_content: str,
+        from_email: Optional[str] = None
+    ):
+        """
+        Stage an outbox row on `db`; it is delivered by the outbox worker once the
+        caller's transaction commits.
+        """
+        db.add(SQLEmailOutbox(
+            to_emails=to_emails,
+            subject=subject,
+            html_content=html_content,
+            from_email=from_email or self.from_email,
+        ))
+
 # Global instance
 email_service = EmailService()
@@ -0,0 +1,160 @@
+import os
+import asyncio
+import logging
+from typing import Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import JSONB
+from backend.sql_database import AsyncSessionLocal
+from backend.services.email import email_service, EmailService
+
+logger = logging.getLogger(__name__)
+
+EMAIL_OUTBOX_ENABLED = os.getenv("EMAIL_OUTBOX_ENABLED", "true").lower() in ("1", "true", "yes")
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", 50))
+EMAIL_OUTBOX_POLL_INTERVAL = float(os.getenv("EMAIL_OUTBOX_POLL_INTERVAL", 2))
+EMAIL_OUTBOX_SEND_CONCURRENCY = int(os.getenv("EMAIL_OUTBOX_SEND_CONCURRENCY", 8))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", 8))
+EMAIL_OUTBOX_RETRY_BASE = float(os.getenv("EMAIL_OUTBOX_RETRY_BASE", 30))
+EMAIL_OUTBOX_RETRY_MAX = float(os.getenv("EMAIL_OUTBOX_RETRY_MAX", 3600))
+# A claimed row that is neither sent nor rescheduled within this window (crashed worker)
+# becomes claimable again.
+EMAIL_OUTBOX_LEASE_SECONDS = int(os.getenv("EMAIL_OUTBOX_LEASE_SECONDS", 300))
+
+# Claim a batch by pushing next_attempt_at out by the lease; SKIP LOCKED lets several
+# replicas drain the same table without blocking each other.
+CLAIM_BATCH_SQL = text("""
+    UPDATE email_outbox
+    SET attempts = attempts + 1,
+        next_attempt_at = now() + make_interval(secs => :lease)
+    WHERE id IN (
+        SELECT id FROM email_outbox
+        WHERE status = 'pending' AND next_attempt_at <= now()
+        ORDER BY next_attempt_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, to_emails, subject, html_content, from_email, attempts
+""").columns(to_emails=JSONB)
+
+MARK_SENT_SQL = text("""
+    UPDATE email_outbox SET status = 'sent', sent_at = now(), last_error = NULL
+    WHERE id = ANY(:ids)
+""")
+
+MARK_FAILED_SQL = text("""
+    UPDATE email_outbox
+    SET status = CASE WHEN attempts >= :max_attempts THEN 'failed' ELSE 'pending' END,
+        next_attempt_at = now() + make_interval(secs => :delay),
+        last_error = :error
+    WHERE id = :id
+""")
+
+
+def retry_delay(attempts: int) -> float:
+    return min(EMAIL_OUTBOX_RETRY_MAX, EMAIL_OUTBOX_RETRY_BASE * (2 ** max(0, attempts - 1)))
+
+
+class EmailOutboxWorker:
+    """
+    Background task that drains email_outbox in batches with retry and exponential backoff.
+    Request handlers only insert rows (EmailService.enqueue) and call `notify()`.
+    """
+
+    def __init__(self, service: EmailService):
+        self.service = service
+        self._task = None
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._send_slots = asyncio.Semaphore(EMAIL_OUTBOX_SEND_CONCURRENCY)
+        self._stats = {"batches": 0, "sent": 0, "retried": 0, "failed": 0, "errors": 0}
+
+    def start(self):
+        if self._task is None and EMAIL_OUTBOX_ENABLED:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=10)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = None
+
+    def notify(self):
+        """Wake the worker right away instead of waiting for the next poll."""
+        self._wakeup.set()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                drained = await self.drain_once()
+            except Exception as e:
+                self._stats["errors"] += 1
+                logger.error(f"Email outbox drain failed: {e}")
+                drained = 0
+            if drained >= EMAIL_OUTBOX_BATCH_SIZE:
+                continue  # more is probably waiting
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=EMAIL_OUTBOX_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def drain_once(self) -> int:
+        """Claim one batch, deliver it and record the outcome. Returns the batch size."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                CLAIM_BATCH_SQL,
+                {"lease": EMAIL_OUTBOX_LEASE_SECONDS, "batch_size": EMAIL_OUTBOX_BATCH_SIZE},
+            )
+            rows = result.mappings().all()
+            await db.commit()
+            if not rows:
+                return 0
+
+            self._stats["batches"] += 1
+            outcomes = await asyncio.gather(*(self._deliver(row) for row in rows))
+
+            sent_ids: List[str] = []
+            for row, error in zip(rows, outcomes):
+                if error is None:
+                    sent_ids.append(row["id"])
+                    continue
+                gave_up = row["attempts"] >= EMAIL_OUTBOX_MAX_ATTEMPTS
+                self._stats["failed" if gave_up else "retried"] += 1
+                await db.execute(MARK_FAILED_SQL, {
+                    "id": row["id"],
+                    "max_attempts": EMAIL_OUTBOX_MAX_ATTEMPTS,
+                    "delay": retry_delay(row["attempts"]),
+                    "error": error[:1000],
+                })
+            if sent_ids:
+                await db.execute(MARK_SENT_SQL, {"ids": sent_ids})
+                self._stats["sent"] += len(sent_ids)
+            await db.commit()
+            return len(rows)
+
+    async def _deliver(self, row) -> Optional[str]:
+        async with self._send_slots:
+            try:
+                await asyncio.to_thread(
+                    self.service.deliver,
+                    row["to_emails"],
+                    row["subject"],
+                    row["html_content"],
+                    row["from_email"],
+                )
+                return None
+            except Exception as e:
+                logger.warning(f"Email {row['id']} attempt {row['attempts']} failed: {e}")
+                return str(e) or e.__class__.__name__
+
+    def stats(self) -> Dict[str, int]:
+        return {"running": self._task is not None, **self._stats}
+
+# Global instance
+email_outbox_worker = EmailOutboxWorker(email_service)
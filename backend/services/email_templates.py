@@ -0,0 +1,29 @@
+from html import escape
+from string import Template
+from typing import Optional, Tuple
+
+# Compiled once at import; rendering is a single substitute() per email.
+VERIFY_EMAIL_SUBJECT = "Verify your LearnFlow account 🛡️"
+VERIFY_EMAIL_TEMPLATE = Template("""
+    <div style="font-family: sans-serif; max-width: 600px; margin: auto; padding: 20px; border: 1px solid #e5e7eb; border-radius: 12px;">
+        <h1 style="color: #2563eb;">Welcome to LearnFlow, $name!</h1>
+        <p>$welcome_msg</p>
+        <div style="margin: 30px 0;">
+            <a href="$verify_url" style="background-color: #2563eb; color: white; padding: 12px 24px; border-radius: 8px; text-decoration: none; font-weight: bold; display: inline-block;">Verify Email Address</a>
+        </div>
+        <p style="color: #6b7280; font-size: 0.875rem;">If you didn't create an account, you can safely ignore this email.</p>
+    </div>
+""")
+
+LEARNER_WELCOME = "To start your journey, please verify your email address:"
+CREATOR_WELCOME = "To start your 7-day free trial and access your academy, please verify your email address:"
+
+
+def render_verification_email(full_name: Optional[str], verify_url: str, role: Optional[str]) -> Tuple[str, str]:
+    """Return (subject, html) for the signup verification email."""
+    html = VERIFY_EMAIL_TEMPLATE.substitute(
+        name=escape(full_name or "there"),
+        welcome_msg=CREATOR_WELCOME if role == "creator" else LEARNER_WELCOME,
+        verify_url=escape(verify_url, quote=True),
+    )
+    return VERIFY_EMAIL_SUBJECT, html
@@ -0,0 +1,246 @@
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+from sqlalchemy import text
+from backend.sql_database import AsyncSessionLocal
+from backend.services.ttl_cache import TTLCache
+from backend.services.course_generator import model_calls
+
+logger = logging.getLogger(__name__)
+
+GENERATION_CACHE_ENABLED = os.getenv("GENERATION_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+GENERATION_CACHE_TTL = float(os.getenv("GENERATION_CACHE_TTL", 3600))
+GENERATION_CACHE_SIZE = int(os.getenv("GENERATION_CACHE_SIZE", 256))
+GENERATION_CACHE_MAX_BYTES = int(os.getenv("GENERATION_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+# The table is shared by every process and outlives deploys
+GENERATION_CACHE_DB_TTL = int(os.getenv("GENERATION_CACHE_DB_TTL", 7 * 24 * 3600))
+
+DEFAULT_AUDIENCE = "beginners"
+
+_NON_WORD = re.compile(r"[\W_]+")
+_LEADING_ARTICLE = re.compile(r"^(a|an|the) ")
+
+# One round trip per lookup: the hit counter moves with the read
+LOOKUP_SQL = text("""
+    UPDATE generation_cache SET hits = hits + 1
+    WHERE key = :key AND expires_at > now()
+    RETURNING course, model_calls, generation_seconds
+""")
+
+STORE_SQL = text("""
+    INSERT INTO generation_cache
+        (key, prompt_version, topic, target_audience, course, model_calls, generation_seconds, expires_at)
+    VALUES (:key, :prompt_version, :topic, :target_audience, CAST(:course AS jsonb), :model_calls,
+            :generation_seconds, now() + make_interval(secs => :ttl))
+    ON CONFLICT (key) DO UPDATE SET
+        course = EXCLUDED.course, model_calls = EXCLUDED.model_calls,
+        generation_seconds = EXCLUDED.generation_seconds, hits = 0,
+        created_at = now(), expires_at = EXCLUDED.expires_at
+""")
+
+# Misses are rare (each costs a generation), so they also sweep expired rows
+PURGE_EXPIRED_SQL = text("DELETE FROM generation_cache WHERE expires_at <= now()")
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Case-, width- and punctuation-insensitive form: "Intro to Python!" -> "intro to python"."""
+    value = unicodedata.normalize("NFKC", value or "").casefold()
+    return _NON_WORD.sub(" ", value).strip()
+
+
+def normalize_request(topic: str, target_audience: Optional[str]):
+    """
+    (topic, audience) as cached. An audience spelled out at the end of the topic
+    ("intro to python for beginners") is folded into the audience.
+    """
+    audience = normalize_text(target_audience) or DEFAULT_AUDIENCE
+    topic = _LEADING_ARTICLE.sub("", normalize_text(topic))
+    suffix = f" for {audience}"
+    if topic.endswith(suffix) and len(topic) > len(suffix):
+        topic = topic[:-len(suffix)]
+    return topic, audience
+
+
+def cache_key(topic: str, target_audience: Optional[str], prompt_version: str) -> str:
+    topic, audience = normalize_request(topic, target_audience)
+    return hashlib.sha256(f"{prompt_version}\0{topic}\0{audience}".encode()).hexdigest()
+
+
+@dataclass(frozen=True, slots=True)
+class CachedGeneration:
+    """A generated course, kept serialized so every hit hands out a fresh copy."""
+    body: str
+    model_calls: int
+    generation_seconds: float
+
+    def __len__(self):
+        return len(self.body)
+
+    def course(self) -> Dict[str, Any]:
+        return json.loads(self.body)
+
+
+class GenerationCache:
+    """
+    Generated courses keyed by normalized (topic, audience, prompt version): an LRU+TTL
+    map per process in front of the shared generation_cache table. Identical requests
+    that arrive while one is being generated wait for it instead of starting their own
+    (single flight). Savings are credited with what the cached generation cost.
+    """
+
+    def __init__(self):
+        self._memory = TTLCache(
+            maxsize=GENERATION_CACHE_SIZE, ttl=GENERATION_CACHE_TTL, maxbytes=GENERATION_CACHE_MAX_BYTES
+        )
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._stats = {
+            "requests": 0,
+            "memory_hits": 0,
+            "db_hits": 0,
+            "coalesced": 0,
+            "generations": 0,
+            "db_errors": 0,
+            "model_calls_made": 0,
+            "model_calls_saved": 0,
+            "generation_seconds_saved": 0.0,
+        }
+
+    def _credit(self, cached: CachedGeneration, kind: str):
+        self._stats[kind] += 1
+        self._stats["model_calls_saved"] += cached.model_calls
+        self._stats["generation_seconds_saved"] += cached.generation_seconds
+
+    async def get_or_generate(
+        self,
+        topic: str,
+        target_audience: Optional[str],
+        prompt_version: str,
+        generate: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """The cached course for this request, or the result of `generate()` (then cached)."""
+        if not GENERATION_CACHE_ENABLED:
+            return await generate()
+        self._stats["requests"] += 1
+        key = cache_key(topic, target_audience, prompt_version)
+
+        cached = self._memory.get(key)
+        if cached is not None:
+            self._credit(cached, "memory_hits")
+            return cached.course()
+
+        task = self._inflight.get(key)
+        if task is not None:
+            cached, _ = await asyncio.shield(task)
+            self._credit(cached, "coalesced")
+            return cached.course()
+
+        # The load runs in its own task so a caller that goes away (client disconnect)
+        # does not cancel it for the others waiting on it
+        task = asyncio.ensure_future(self._load(key, topic, target_audience, prompt_version, generate))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finished(key, done))
+        cached, source = await asyncio.shield(task)
+        if source == "db":
+            self._credit(cached, "db_hits")
+        return cached.course()
+
+    def _finished(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        # Retrieve a failure even when every waiter went away, so it is not reported as
+        # never retrieved; the waiters still present get it from their own await
+        if not task.cancelled():
+            task.exception()
+
+    async def _load(self, key, topic, target_audience, prompt_version, generate):
+        cached = await self._lookup(key)
+        if cached is not None:
+            self._memory.put(key, cached)
+            return cached, "db"
+
+        calls = [0]
+        model_calls.set(calls)  # this task's own context
+        start = time.perf_counter()
+        course = await generate()
+        cached = CachedGeneration(json.dumps(course), calls[0], time.perf_counter() - start)
+        await self.store(topic, target_audience, prompt_version, cached)
+        return cached, "generated"
+
+    async def lookup(self, topic: str, target_audience: Optional[str], prompt_version: str) -> Optional[Dict[str, Any]]:
+        """Cache read without generating on a miss (streamed generations)."""
+        if not GENERATION_CACHE_ENABLED:
+            return None
+        self._stats["requests"] += 1
+        key = cache_key(topic, target_audience, prompt_version)
+        cached = self._memory.get(key)
+        if cached is not None:
+            self._credit(cached, "memory_hits")
+            return cached.course()
+        cached = await self._lookup(key)
+        if cached is None:
+            return None
+        self._memory.put(key, cached)
+        self._credit(cached, "db_hits")
+        return cached.course()
+
+    async def _lookup(self, key: str) -> Optional[CachedGeneration]:
+        try:
+            async with AsyncSessionLocal() as db:
+                row = (await db.execute(LOOKUP_SQL, {"key": key})).one_or_none()
+                await db.commit()
+        except Exception as e:
+            self._stats["db_errors"] += 1
+            logger.warning(f"Generation cache lookup failed: {e}")
+            return None
+        if row is None:
+            return None
+        return CachedGeneration(json.dumps(row.course), row.model_calls, row.generation_seconds)
+
+    async def store(
+        self, topic: str, target_audience: Optional[str], prompt_version: str, cached: CachedGeneration
+    ):
+        """Keep a generated course in memory and in the table; a failed write only loses the sharing."""
+        self._stats["generations"] += 1
+        self._stats["model_calls_made"] += cached.model_calls
+        if not GENERATION_CACHE_ENABLED:
+            return
+        key = cache_key(topic, target_audience, prompt_version)
+        self._memory.put(key, cached)
+        normalized_topic, audience = normalize_request(topic, target_audience)
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(PURGE_EXPIRED_SQL)
+                await db.execute(STORE_SQL, {
+                    "key": key,
+                    "prompt_version": prompt_version,
+                    "topic": normalized_topic,
+                    "target_audience": audience,
+                    "course": cached.body,
+                    "model_calls": cached.model_calls,
+                    "generation_seconds": cached.generation_seconds,
+                    "ttl": GENERATION_CACHE_DB_TTL,
+                })
+                await db.commit()
+        except Exception as e:
+            self._stats["db_errors"] += 1
+            logger.warning(f"Generation cache store failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self._stats["memory_hits"] + self._stats["db_hits"] + self._stats["coalesced"]
+        requests = self._stats["requests"]
+        return {
+            "enabled": GENERATION_CACHE_ENABLED,
+            "memory": self._memory.stats(),
+            "inflight": len(self._inflight),
+            **self._stats,
+            "hit_ratio": hits / requests if requests else 0.0,
+        }
+
+# Global instance
+generation_cache = GenerationCache()
@@ -0,0 +1,312 @@
+import os
+import json
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from sqlalchemy import text
+from backend.sql_database import AsyncSessionLocal
+from backend.schemas import CourseCreate
+from backend import crud
+from backend.services.course_cache import course_cache
+from backend.services.course_generator import AI_GENERATION_WORKERS
+
+logger = logging.getLogger(__name__)
+
+GENERATION_JOBS_ENABLED = os.getenv("GENERATION_JOBS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Jobs this process runs at once; a fanned-out course keeps several pool workers busy,
+# so by default a quarter of them, leaving room for interactive generations
+GENERATION_JOB_CONCURRENCY = int(os.getenv("GENERATION_JOB_CONCURRENCY", max(1, AI_GENERATION_WORKERS // 4)))
+GENERATION_JOB_POLL_INTERVAL = float(os.getenv("GENERATION_JOB_POLL_INTERVAL", 2))
+GENERATION_JOB_MAX_ATTEMPTS = int(os.getenv("GENERATION_JOB_MAX_ATTEMPTS", 3))
+GENERATION_JOB_RETRY_DELAY = float(os.getenv("GENERATION_JOB_RETRY_DELAY", 30))
+# A running job's worker renews its lease every third of this window; a job whose lease
+# ran out anyway (crashed process) becomes claimable again, up to MAX_ATTEMPTS claims.
+GENERATION_JOB_LEASE_SECONDS = int(os.getenv("GENERATION_JOB_LEASE_SECONDS", 60))
+# Queued or running jobs one user may have before submissions are refused
+GENERATION_JOB_MAX_ACTIVE_PER_USER = int(os.getenv("GENERATION_JOB_MAX_ACTIVE_PER_USER", 3))
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+# Upstream answers worth another attempt later (rate limit, generation pool saturated)
+RETRIABLE_STATUS_CODES = (429, 503)
+
+# Expired leases that already used every attempt fail instead of being claimed again,
+# so a job that crashes its worker is not retried forever
+CLAIM_JOB_SQL = text("""
+    WITH exhausted AS (
+        UPDATE generation_jobs
+        SET status = 'failed', finished_at = now(),
+            error = 'Generation did not finish: its worker stopped ' || attempts || ' times'
+        WHERE status = 'running' AND run_after <= now() AND attempts >= :max_attempts
+    )
+    UPDATE generation_jobs
+    SET status = 'running',
+        attempts = attempts + 1,
+        started_at = now(),
+        run_after = now() + make_interval(secs => :lease)
+    WHERE id = (
+        SELECT id FROM generation_jobs
+        WHERE status IN ('queued', 'running') AND run_after <= now()
+            AND (status = 'queued' OR attempts < :max_attempts)
+        ORDER BY run_after
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, topic, target_audience, save_course, attempts
+""")
+
+RENEW_LEASE_SQL = text("""
+    UPDATE generation_jobs
+    SET run_after = now() + make_interval(secs => :lease)
+    WHERE id = :id AND status = 'running' AND attempts = :attempts
+""")
+
+# The attempts fence keeps a worker whose lease expired from overwriting the reclaimer
+MARK_SUCCEEDED_SQL = text("""
+    UPDATE generation_jobs
+    SET status = 'succeeded', result = CAST(:result AS jsonb), course_id = :course_id,
+        error = NULL, finished_at = now()
+    WHERE id = :id AND status = 'running' AND attempts = :attempts
+""")
+
+MARK_FAILED_SQL = text("""
+    UPDATE generation_jobs
+    SET status = CASE WHEN :retry AND attempts < :max_attempts THEN 'queued' ELSE 'failed' END,
+        run_after = now() + make_interval(secs => :delay),
+        error = :error,
+        finished_at = CASE WHEN :retry AND attempts < :max_attempts THEN NULL ELSE now() END
+    WHERE id = :id AND status = 'running' AND attempts = :attempts
+    RETURNING status
+""")
+
+# Jobs interrupted by shutdown go back to the queue without spending an attempt
+RELEASE_JOBS_SQL = text("""
+    UPDATE generation_jobs
+    SET status = 'queued', attempts = attempts - 1, run_after = now()
+    WHERE id = ANY(:ids) AND status = 'running'
+""")
+
+COUNT_ACTIVE_SQL = text("""
+    SELECT count(*) FROM generation_jobs
+    WHERE user_id = :user_id AND status IN ('queued', 'running')
+""")
+
+
+class GenerationJobError(Exception):
+    """A generation attempt failed; `retriable` marks upstream throttling worth another try."""
+
+    def __init__(self, message: str, retriable: bool = False):
+        super().__init__(message)
+        self.retriable = retriable
+
+
+GenerateFn = Callable[[str, Optional[str]], Awaitable[Dict[str, Any]]]
+
+
+class GenerationJobWorker:
+    """
+    Background tasks that claim queued generation_jobs rows, run them through `generate`
+    (which uses the bounded generation pool) and store the result, optionally saving it
+    as a course. Request handlers only insert rows and call `notify()`; clients poll or
+    long-poll the row, so no HTTP connection is held for the length of a generation.
+    """
+
+    def __init__(self):
+        self._generate: Optional[GenerateFn] = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._running: Set[str] = set()
+        self._listeners: Dict[str, List[asyncio.Event]] = {}
+        self._stats = {
+            "claimed": 0, "succeeded": 0, "retried": 0, "failed": 0, "saved": 0,
+            "leases_lost": 0, "stale_results": 0, "errors": 0,
+        }
+
+    def start(self, generate: GenerateFn):
+        if not self._tasks and GENERATION_JOBS_ENABLED:
+            self._generate = generate
+            self._stopping = False
+            self._tasks = [asyncio.create_task(self._run()) for _ in range(max(1, GENERATION_JOB_CONCURRENCY))]
+
+    async def stop(self):
+        if not self._tasks:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        done, pending = await asyncio.wait(self._tasks, timeout=10)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+        self._tasks = []
+        if self._running:
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(RELEASE_JOBS_SQL, {"ids": list(self._running)})
+                    await db.commit()
+            except Exception as e:
+                logger.error(f"Releasing interrupted generation jobs failed: {e}")
+            self._running.clear()
+
+    def notify(self):
+        """Wake an idle worker right away instead of waiting for the next poll."""
+        self._wakeup.set()
+
+    async def wait(self, job_id: str, timeout: float):
+        """
+        Sleep until this process finishes `job_id` or `timeout` passes. Callers re-read the
+        row afterwards; a job finished by another replica is seen at the next poll.
+        """
+        event = asyncio.Event()
+        listeners = self._listeners.setdefault(job_id, [])
+        listeners.append(event)
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            listeners.remove(event)
+            if not listeners:
+                del self._listeners[job_id]
+
+    def _finished(self, job_id: str):
+        for event in self._listeners.get(job_id, []):
+            event.set()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                ran = await self.run_once()
+            except Exception as e:
+                self._stats["errors"] += 1
+                logger.error(f"Generation job poll failed: {e}")
+                ran = False
+            if ran:
+                continue  # more is probably waiting
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=GENERATION_JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def run_once(self) -> bool:
+        """Claim and run one job. Returns False when none was runnable."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                CLAIM_JOB_SQL, {"lease": GENERATION_JOB_LEASE_SECONDS, "max_attempts": GENERATION_JOB_MAX_ATTEMPTS}
+            )
+            job = result.mappings().one_or_none()
+            await db.commit()
+        if job is None:
+            return False
+
+        self._stats["claimed"] += 1
+        self._running.add(job["id"])
+        try:
+            course_data, course = await self._leased(job, self._execute(job))
+        except GenerationJobError as e:
+            await self._record_failure(job, str(e), e.retriable)
+        except Exception as e:
+            logger.error(f"Generation job {job['id']} attempt {job['attempts']} failed: {e}")
+            await self._record_failure(job, str(e) or e.__class__.__name__, False)
+        else:
+            await self._record_success(job, course_data, course)
+        # Not in a finally: a job cancelled by stop() stays listed so it can be released
+        self._running.discard(job["id"])
+        self._finished(job["id"])
+        return True
+
+    async def _leased(self, job, work: Awaitable):
+        """Await `work` while renewing the job's lease; renewals stop before the outcome is recorded."""
+        heartbeat = asyncio.create_task(self._keep_lease(job))
+        try:
+            return await work
+        finally:
+            heartbeat.cancel()
+
+    async def _keep_lease(self, job):
+        """Renew the job's lease until cancelled, so a long generation is not claimed again."""
+        while True:
+            await asyncio.sleep(GENERATION_JOB_LEASE_SECONDS / 3)
+            try:
+                async with AsyncSessionLocal() as db:
+                    result = await db.execute(RENEW_LEASE_SQL, {
+                        "id": job["id"],
+                        "attempts": job["attempts"],
+                        "lease": GENERATION_JOB_LEASE_SECONDS,
+                    })
+                    await db.commit()
+            except Exception as e:
+                logger.warning(f"Renewing the lease of generation job {job['id']} failed: {e}")
+                continue
+            if result.rowcount == 0:
+                # Reclaimed after renewals failed for a whole lease; the fenced writes drop our result
+                self._stats["leases_lost"] += 1
+                logger.warning(f"Generation job {job['id']} attempt {job['attempts']} lost its lease")
+                return
+
+    async def _execute(self, job):
+        """Generate the course; returns (course data, CourseCreate to save or None)."""
+        try:
+            course_data = await self._generate(job["topic"], job["target_audience"])
+        except Exception as e:
+            # The generation code reports upstream outcomes as HTTPExceptions
+            status_code = getattr(e, "status_code", None)
+            detail = getattr(e, "detail", None) or str(e) or e.__class__.__name__
+            raise GenerationJobError(str(detail), retriable=status_code in RETRIABLE_STATUS_CODES)
+        return course_data, CourseCreate(**course_data) if job["save_course"] else None
+
+    async def _record_success(self, job, course_data, course: Optional[CourseCreate]):
+        """
+        Save the course (if asked) and mark the job succeeded in one transaction, so an
+        attempt that lost its lease leaves neither a result nor a duplicate course.
+        """
+        course_id = None
+        async with AsyncSessionLocal() as db:
+            if course is not None:
+                course_id = (await crud.insert_course(db, course)).id
+            result = await db.execute(MARK_SUCCEEDED_SQL, {
+                "id": job["id"],
+                "attempts": job["attempts"],
+                "result": json.dumps(course_data),
+                "course_id": course_id,
+            })
+            if result.rowcount == 0:
+                await db.rollback()
+                self._stats["stale_results"] += 1
+                logger.warning(f"Generation job {job['id']} attempt {job['attempts']} was superseded; result dropped")
+                return
+            await db.commit()
+        if course_id is not None:
+            course_cache.invalidate_pages()
+            self._stats["saved"] += 1
+        self._stats["succeeded"] += 1
+
+    async def _record_failure(self, job, error: str, retriable: bool):
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(MARK_FAILED_SQL, {
+                "id": job["id"],
+                "attempts": job["attempts"],
+                "retry": retriable,
+                "max_attempts": GENERATION_JOB_MAX_ATTEMPTS,
+                "delay": GENERATION_JOB_RETRY_DELAY * job["attempts"] if retriable else 0,
+                "error": error[:1000],
+            })
+            outcome = result.scalar_one_or_none()
+            await db.commit()
+        if outcome == "queued":
+            self._stats["retried"] += 1
+        else:
+            self._stats["failed"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": bool(self._tasks),
+            "workers": len(self._tasks),
+            "in_progress": len(self._running),
+            "long_polls": sum(len(listeners) for listeners in self._listeners.values()),
+            **self._stats,
+        }
+
+# Global instance
+generation_job_worker = GenerationJobWorker()
@@ -0,0 +1,43 @@
+import os
+import logging
+from backend.security import get_password_hash, verify_password
+from backend.services.worker_pool import BoundedExecutor
+
+logger = logging.getLogger(__name__)
+
+# "thread" works well because bcrypt releases the GIL; "process" isolates hashing completely.
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 2))
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", 64))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", 5))
+
+
+class PasswordHasher:
+    """
+    Async facade over bcrypt so auth handlers never hash on the event loop.
+    Raises PoolSaturatedError when the pool is saturated.
+    """
+
+    def __init__(self):
+        self.pool = BoundedExecutor(
+            "password-hash",
+            max_workers=PASSWORD_HASH_WORKERS,
+            max_queue=PASSWORD_HASH_QUEUE_SIZE,
+            queue_timeout=PASSWORD_HASH_QUEUE_TIMEOUT,
+            kind=PASSWORD_HASH_EXECUTOR,
+        )
+
+    async def hash(self, password: str) -> str:
+        return await self.pool.run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.pool.run(verify_password, plain_password, hashed_password)
+
+    def stats(self):
+        return self.pool.stats()
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+# Global instance
+password_hasher = PasswordHasher()
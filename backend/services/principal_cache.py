@@ -0,0 +1,83 @@
+import os
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+from backend.services.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", 60))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000))
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """
+    Immutable snapshot of the authenticated user.
+    Attribute-compatible with models.User, so `User.model_validate(principal)` works.
+    """
+    id: str
+    email: str
+    full_name: Optional[str] = None
+    disabled: Optional[bool] = False
+    is_verified: bool = False
+    plan: Optional[str] = 'basic'
+    role: Optional[str] = 'learner'
+    subscription_status: Optional[str] = 'trial'
+    trial_ends_at: Optional[datetime] = None
+
+    @classmethod
+    def from_row(cls, user) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            disabled=user.disabled,
+            is_verified=bool(user.is_verified),
+            plan=user.plan,
+            role=user.role,
+            subscription_status=user.subscription_status,
+            trial_ends_at=user.trial_ends_at,
+        )
+
+    @classmethod
+    def from_claims(cls, claims: dict) -> "Principal":
+        """Build a principal from a self-contained token (see security.build_token_claims)."""
+        trial_ends_at = claims.get("trial_ends_at")
+        return cls(
+            id=claims["uid"],
+            email=claims["sub"],
+            full_name=claims.get("name"),
+            disabled=bool(claims.get("disabled")),
+            is_verified=bool(claims.get("verified")),
+            plan=claims.get("plan"),
+            role=claims.get("role"),
+            subscription_status=claims.get("sub_status"),
+            trial_ends_at=datetime.fromtimestamp(trial_ends_at, tz=timezone.utc) if trial_ends_at else None,
+        )
+
+
+class PrincipalCache:
+    """
+    Principals keyed by token subject (email).
+    Call `invalidate(email)` after committing any change to that user's row.
+    """
+
+    def __init__(self):
+        self._cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+    def get(self, subject: str) -> Optional[Principal]:
+        return self._cache.get(subject)
+
+    def put(self, subject: str, principal: Principal):
+        self._cache.put(subject, principal)
+
+    def invalidate(self, subject: str):
+        self._cache.invalidate(subject)
+
+    def stats(self):
+        return self._cache.stats()
+
+# Global instance
+principal_cache = PrincipalCache()
@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+from sqlalchemy import text
+from backend.sql_database import AsyncSessionLocal
+from backend.progress import MERGE_PROGRESS_BATCH_SQL, merge_delta
+
+logger = logging.getLogger(__name__)
+
+# Opt-in: acknowledged-but-unflushed ticks live only in this process's memory until the
+# next flush, so a hard crash can lose up to one interval of progress.
+PROGRESS_BUFFER_ENABLED = os.getenv("PROGRESS_BUFFER_ENABLED", "false").lower() in ("1", "true", "yes")
+PROGRESS_FLUSH_INTERVAL_MS = int(os.getenv("PROGRESS_FLUSH_INTERVAL_MS", 500))
+PROGRESS_FLUSH_MAX_ENTRIES = int(os.getenv("PROGRESS_FLUSH_MAX_ENTRIES", 500))
+# Beyond this many pending enrollments, submit() refuses and callers write through
+PROGRESS_BUFFER_MAX_PENDING = int(os.getenv("PROGRESS_BUFFER_MAX_PENDING", 50000))
+
+BATCH_SQL = text(MERGE_PROGRESS_BATCH_SQL)
+
+
+@dataclass
+class PendingProgress:
+    delta: Dict[str, Dict[str, bool]] = field(default_factory=dict)
+    is_completed: Optional[bool] = None
+    first_seen: float = field(default_factory=time.monotonic)
+
+
+class ProgressBuffer:
+    """
+    Coalesces progress ticks per enrollment in memory and writes them with one multi-row
+    UPDATE per flush, every PROGRESS_FLUSH_INTERVAL_MS or as soon as
+    PROGRESS_FLUSH_MAX_ENTRIES enrollments are pending. stop() flushes what is left.
+    """
+
+    def __init__(self):
+        self._pending: Dict[Tuple[str, str], PendingProgress] = {}
+        self._task = None
+        self._stopping = False
+        self._full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._stats = {
+            "accepted": 0,
+            "coalesced": 0,
+            "rejected": 0,
+            "flushes": 0,
+            "rows_written": 0,
+            "rows_dropped": 0,
+            "flush_errors": 0,
+        }
+        self._flush_time_total = 0.0
+        self._flush_time_max = 0.0
+        self._lag_total = 0.0
+        self._lag_max = 0.0
+        self._lag_count = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        if self._task is None and PROGRESS_BUFFER_ENABLED:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopping = True
+        self._full.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=10)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = None
+        # Whatever arrived during the last flush
+        await self.flush()
+
+    def submit(
+        self, enrollment_id: str, user_id: str, delta: Dict[str, Dict[str, bool]], is_completed: Optional[bool] = None
+    ) -> bool:
+        """Queue a tick. Returns False when not running or over capacity; the caller should write through."""
+        if self._task is None or self._stopping:
+            return False
+        key = (enrollment_id, user_id)
+        entry = self._pending.get(key)
+        if entry is None:
+            if len(self._pending) >= PROGRESS_BUFFER_MAX_PENDING:
+                self._stats["rejected"] += 1
+                return False
+            entry = self._pending[key] = PendingProgress()
+        else:
+            self._stats["coalesced"] += 1
+        merge_delta(entry.delta, delta)
+        if is_completed is not None:
+            entry.is_completed = is_completed
+        self._stats["accepted"] += 1
+        if len(self._pending) >= PROGRESS_FLUSH_MAX_ENTRIES:
+            self._full.set()
+        return True
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=PROGRESS_FLUSH_INTERVAL_MS / 1000)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write every pending tick; on failure they are merged back and retried next time."""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            items = sorted(batch.items())
+            written = 0
+            start = time.perf_counter()
+            try:
+                for i in range(0, len(items), PROGRESS_FLUSH_MAX_ENTRIES):
+                    written += await self._write(items[i:i + PROGRESS_FLUSH_MAX_ENTRIES])
+            except Exception as e:
+                self._stats["flush_errors"] += 1
+                logger.error(f"Progress flush of {len(items)} enrollments failed, will retry: {e}")
+                self._requeue(batch)
+                return 0
+
+            elapsed = time.perf_counter() - start
+            now = time.monotonic()
+            self._stats["flushes"] += 1
+            self._stats["rows_written"] += written
+            self._stats["rows_dropped"] += len(items) - written
+            self._flush_time_total += elapsed
+            self._flush_time_max = max(self._flush_time_max, elapsed)
+            for _, entry in items:
+                lag = now - entry.first_seen
+                self._lag_total += lag
+                self._lag_max = max(self._lag_max, lag)
+            self._lag_count += len(items)
+            return written
+
+    async def _write(self, items) -> int:
+        payload = [
+            {"id": enrollment_id, "user_id": user_id, "delta": entry.delta, "is_completed": entry.is_completed}
+            for (enrollment_id, user_id), entry in items
+        ]
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(BATCH_SQL, {"batch": json.dumps(payload)})
+            written = len(result.all())
+            await db.commit()
+        return written
+
+    def _requeue(self, batch: Dict[Tuple[str, str], PendingProgress]):
+        # Ticks that arrived during the failed flush are newer, so they are applied on top
+        for key, newer in self._pending.items():
+            older = batch.get(key)
+            if older is None:
+                batch[key] = newer
+                continue
+            merge_delta(older.delta, newer.delta)
+            if newer.is_completed is not None:
+                older.is_completed = newer.is_completed
+        self._pending = batch
+
+    def stats(self):
+        flushes = self._stats["flushes"]
+        return {
+            "running": self._task is not None,
+            "pending": len(self._pending),
+            **self._stats,
+            "flush_time_avg": self._flush_time_total / flushes if flushes else 0.0,
+            "flush_time_max": self._flush_time_max,
+            "flush_lag_avg": self._lag_total / self._lag_count if self._lag_count else 0.0,
+            "flush_lag_max": self._lag_max,
+        }
+
+# Global instance
+progress_buffer = ProgressBuffer()
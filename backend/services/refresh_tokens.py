@@ -0,0 +1,174 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from sqlalchemy import select, update, func, exists, and_
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.sql_models import SQLUser, SQLRefreshToken
+from backend.security import (
+    generate_opaque_token,
+    hash_token,
+    REFRESH_TOKEN_EXPIRE_DAYS,
+    REFRESH_TOKEN_REUSE_GRACE_SECONDS,
+)
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# The user fields a refresh needs to mint the new access token
+USER_CLAIM_COLUMNS = (
+    SQLUser.id,
+    SQLUser.email,
+    SQLUser.full_name,
+    SQLUser.disabled,
+    SQLUser.is_verified,
+    SQLUser.plan,
+    SQLUser.role,
+    SQLUser.subscription_status,
+    SQLUser.trial_ends_at,
+    SQLUser.token_version,
+)
+
+
+class RefreshTokenError(Exception):
+    """Refresh token is unknown, expired, revoked or was replayed."""
+
+    def __init__(self, message: str, reused: bool = False):
+        super().__init__(message)
+        self.reused = reused
+
+
+def issue_refresh_token(db: AsyncSession, user_id: str, family_id: Optional[str] = None) -> str:
+    """
+    Stage a new refresh token row (the caller commits) and return the raw token.
+    Only its HMAC is stored.
+    """
+    raw_token = generate_opaque_token()
+    db.add(SQLRefreshToken(
+        user_id=user_id,
+        family_id=family_id or str(uuid.uuid4()),
+        token_hash=hash_token(raw_token),
+        expires_at=datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return raw_token
+
+
+async def rotate_refresh_token(db: AsyncSession, raw_token: str) -> Tuple[object, str]:
+    """
+    Consume `raw_token` and issue its successor in the same family (commits).
+
+    The happy path is one indexed UPDATE ... RETURNING that atomically marks the token
+    used and returns the owning user's claim fields, so two concurrent refreshes with
+    the same token cannot both succeed. Presenting an already-rotated token is treated
+    as theft and revokes the whole family, unless it is the family's latest rotated
+    token, rotated less than REFRESH_TOKEN_REUSE_GRACE_SECONDS ago, and its successor
+    is still live: that is a client retrying a refresh whose answer it never saw, and
+    it gets a new successor that replaces the unseen one.
+    """
+    token_hash = hash_token(raw_token)
+    result = await db.execute(
+        update(SQLRefreshToken)
+        .where(
+            SQLRefreshToken.token_hash == token_hash,
+            SQLRefreshToken.revoked_at.is_(None),
+            SQLRefreshToken.expires_at > func.now(),
+            SQLUser.id == SQLRefreshToken.user_id,
+        )
+        .values(revoked_at=func.now())
+        .returning(SQLRefreshToken.family_id, *USER_CLAIM_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    user = result.first()
+
+    if user is None:
+        await db.rollback()
+        user = await _retried_rotation(db, token_hash)
+
+    if user.disabled:
+        await db.rollback()
+        raise RefreshTokenError("Inactive user")
+
+    new_token = issue_refresh_token(db, user.id, family_id=user.family_id)
+    await db.commit()
+    return user, new_token
+
+
+async def _retried_rotation(db: AsyncSession, token_hash: str):
+    """
+    The family and claim fields for a rotated token presented again within the grace
+    window, with the family's live successor revoked in the caller's transaction so the
+    family keeps exactly one live token. Revoking the successor also ends the grace:
+    the token is no longer the latest rotated, so presenting it again is reuse. Any
+    other rotated token revokes its family. Raises RefreshTokenError.
+    """
+    sibling = aliased(SQLRefreshToken)
+    in_grace = and_(
+        SQLRefreshToken.revoked_at > func.now() - timedelta(seconds=REFRESH_TOKEN_REUSE_GRACE_SECONDS),
+        SQLRefreshToken.expires_at > func.now(),
+        # Logout and reuse detection revoke the successor too
+        exists().where(sibling.family_id == SQLRefreshToken.family_id, sibling.revoked_at.is_(None)),
+        # Only the token rotated last; an older one replayed is still theft
+        ~exists().where(
+            sibling.family_id == SQLRefreshToken.family_id,
+            sibling.revoked_at > SQLRefreshToken.revoked_at,
+        ),
+    )
+    result = await db.execute(
+        select(SQLRefreshToken.family_id, SQLRefreshToken.revoked_at, in_grace.label("in_grace"), *USER_CLAIM_COLUMNS)
+        .join(SQLUser, SQLUser.id == SQLRefreshToken.user_id)
+        .where(SQLRefreshToken.token_hash == token_hash)
+    )
+    known = result.first()
+    if known is None or known.revoked_at is None:
+        raise RefreshTokenError("Invalid or expired refresh token")
+    if known.in_grace:
+        replaced = await db.execute(
+            update(SQLRefreshToken)
+            .where(SQLRefreshToken.family_id == known.family_id, SQLRefreshToken.revoked_at.is_(None))
+            .values(revoked_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        if replaced.rowcount == 0:
+            # A concurrent retry replaced the successor first
+            await db.rollback()
+            raise RefreshTokenError("Refresh token was already rotated")
+        logger.info(f"Refresh retried within the grace window; replaced the successor in family {known.family_id}")
+        return known
+    await revoke_family(db, known.family_id)
+    logger.warning(f"Refresh token reuse detected; revoked family {known.family_id}")
+    raise RefreshTokenError("Refresh token reuse detected", reused=True)
+
+
+async def revoke_family(db: AsyncSession, family_id: str) -> int:
+    """Revoke every live token in a rotation family (commits)."""
+    result = await db.execute(
+        update(SQLRefreshToken)
+        .where(SQLRefreshToken.family_id == family_id, SQLRefreshToken.revoked_at.is_(None))
+        .values(revoked_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def revoke_token_family(db: AsyncSession, raw_token: str) -> int:
+    """Log out the session that owns `raw_token`."""
+    result = await db.execute(
+        select(SQLRefreshToken.family_id).where(SQLRefreshToken.token_hash == hash_token(raw_token))
+    )
+    family_id = result.scalar_one_or_none()
+    if family_id is None:
+        return 0
+    return await revoke_family(db, family_id)
+
+
+async def revoke_all_for_user(db: AsyncSession, user_id: str) -> int:
+    """Bulk-revoke every live refresh token the user holds (commits)."""
+    result = await db.execute(
+        update(SQLRefreshToken)
+        .where(SQLRefreshToken.user_id == user_id, SQLRefreshToken.revoked_at.is_(None))
+        .values(revoked_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
@@ -0,0 +1,63 @@
+import os
+import logging
+from typing import Optional
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.sql_models import SQLUser
+from backend.services.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# How long a worker trusts its copy of a user's token_version. A revocation made through
+# another worker takes at most this long to be seen here.
+TOKEN_VERSION_TTL = float(os.getenv("TOKEN_VERSION_TTL", 300))
+TOKEN_VERSION_CACHE_SIZE = int(os.getenv("TOKEN_VERSION_CACHE_SIZE", 50000))
+
+
+class TokenVersionRegistry:
+    """
+    Tracks each user's current token_version so self-contained tokens can be
+    checked without loading the user row on every request.
+    """
+
+    def __init__(self):
+        self._cache = TTLCache(maxsize=TOKEN_VERSION_CACHE_SIZE, ttl=TOKEN_VERSION_TTL)
+
+    async def _load(self, db: AsyncSession, user_id: str) -> Optional[int]:
+        result = await db.execute(select(SQLUser.token_version).where(SQLUser.id == user_id))
+        version = result.scalar_one_or_none()
+        if version is not None:
+            self._cache.put(user_id, version)
+        return version
+
+    async def is_current(self, db: AsyncSession, user_id: str, token_version: int) -> bool:
+        """
+        True if `token_version` is the user's latest version. The database is only
+        consulted on a cold cache or when the token reports a newer version than we know.
+        """
+        known = self._cache.get(user_id)
+        if known is None or token_version > known:
+            known = await self._load(db, user_id)
+        return known is not None and token_version == known
+
+    async def bump(self, db: AsyncSession, user_id: str) -> Optional[int]:
+        """
+        Invalidate every outstanding access token for the user (commits).
+        """
+        result = await db.execute(
+            update(SQLUser)
+            .where(SQLUser.id == user_id)
+            .values(token_version=SQLUser.token_version + 1)
+            .returning(SQLUser.token_version)
+        )
+        version = result.scalar_one_or_none()
+        await db.commit()
+        if version is not None:
+            self._cache.put(user_id, version)
+        return version
+
+    def stats(self):
+        return self._cache.stats()
+
+# Global instance
+token_versions = TokenVersionRegistry()
@@ -0,0 +1,90 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache whose entries also expire after `ttl` seconds.
+
+    Meant for per-process caches touched only from the event loop, so it does no locking.
+    Each worker process keeps its own copy; TTL bounds how stale a peer's copy can get.
+    With `maxbytes`, entries are also evicted to keep the sum of `sizeof(value)` under it.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, maxbytes: Optional[int] = None, sizeof: Callable[[Any], int] = len):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self.bytes = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at, size = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.bytes -= size
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        size = self.sizeof(value) if self.maxbytes is not None else 0
+        old = self._data.pop(key, None)
+        if old is not None:
+            self.bytes -= old[2]
+        if self.maxbytes is not None and size > self.maxbytes:
+            return
+        self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl), size)
+        self.bytes += size
+        while len(self._data) > self.maxsize or (self.maxbytes is not None and self.bytes > self.maxbytes):
+            _, evicted = self._data.popitem(last=False)
+            self.bytes -= evicted[2]
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return False
+        self.bytes -= entry[2]
+        self.invalidations += 1
+        return True
+
+    def clear(self):
+        self.invalidations += len(self._data)
+        self._data.clear()
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        stats = {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+        if self.maxbytes is not None:
+            stats["bytes"] = self.bytes
+            stats["maxbytes"] = self.maxbytes
+        return stats
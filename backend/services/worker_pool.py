@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturatedError(Exception):
+    """Raised when a bounded pool cannot accept more work (queue full or wait timed out)."""
+
+    def __init__(self, pool_name: str, retry_after: int = 1):
+        super().__init__(f"{pool_name} pool is saturated")
+        self.pool_name = pool_name
+        self.retry_after = retry_after
+
+
+def _timed_call(fn: Callable[..., Any], *args: Any):
+    # Runs inside the worker so the measured time excludes queueing and IPC.
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class BoundedExecutor:
+    """
+    Runs blocking callables off the event loop on a fixed-size thread or process pool.
+
+    At most `max_workers` calls run at once and at most `max_queue` callers wait for a
+    slot. Callers beyond that, or callers that wait longer than `queue_timeout` seconds,
+    get a PoolSaturatedError so the route can answer 503 instead of piling up.
+
+    Calls made with `admitted=True` belong to work that already got past those limits
+    (e.g. the rest of a job whose first call was accepted): they are never rejected and
+    wait for a slot as long as it takes, while still counting towards the queue.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue: int,
+        queue_timeout: float,
+        kind: str = "thread",
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.kind = kind
+        self._executor: Optional[Executor] = None
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._waiting = 0
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "queue_wait_total": 0.0,
+            "queue_wait_max": 0.0,
+            "run_time_total": 0.0,
+            "run_time_max": 0.0,
+        }
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=self.name
+                )
+        return self._executor
+
+    def _reject(self) -> PoolSaturatedError:
+        self._stats["rejected"] += 1
+        return PoolSaturatedError(self.name, retry_after=max(1, int(self.queue_timeout)))
+
+    async def run(self, fn: Callable[..., Any], *args: Any, admitted: bool = False) -> Any:
+        """Run `fn(*args)` on the pool, waiting for a free slot within the queue limits."""
+        enqueued_at = time.perf_counter()
+        if not self._slots.locked():
+            # Free slot: take it synchronously. Going through wait_for() would defer the
+            # acquire to a new task, and a burst arriving in one tick would all see free
+            # slots and bypass the queue limit.
+            await self._slots.acquire()
+        else:
+            if self._waiting >= self.max_queue and not admitted:
+                raise self._reject()
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=None if admitted else self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise self._reject()
+            finally:
+                self._waiting -= 1
+
+        queue_wait = time.perf_counter() - enqueued_at
+        self._stats["submitted"] += 1
+        self._stats["queue_wait_total"] += queue_wait
+        self._stats["queue_wait_max"] = max(self._stats["queue_wait_max"], queue_wait)
+
+        try:
+            loop = asyncio.get_running_loop()
+            result, run_time = await loop.run_in_executor(
+                self._get_executor(), _timed_call, fn, *args
+            )
+        except Exception:
+            self._stats["failed"] += 1
+            raise
+        finally:
+            self._slots.release()
+
+        self._stats["completed"] += 1
+        self._stats["run_time_total"] += run_time
+        self._stats["run_time_max"] = max(self._stats["run_time_max"], run_time)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        completed = self._stats["completed"] or 1
+        submitted = self._stats["submitted"] or 1
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "waiting": self._waiting,
+            **self._stats,
+            "queue_wait_avg": self._stats["queue_wait_total"] / submitted,
+            "run_time_avg": self._stats["run_time_total"] / completed,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
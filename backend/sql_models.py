@@ -1,10 +1,24 @@
-from sqlalchemy import Column, String, Boolean, DateTime
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, ForeignKey, Index, Text, func
+from sqlalchemy.dialects.postgresql import JSONB
 from backend.sql_database import Base
 import uuid
 from datetime import datetime, timezone
 
+def utcnow_naive():
+    # users/resources timestamps are TIMESTAMP WITHOUT TIME ZONE holding UTC;
+    # asyncpg rejects aware datetimes for those columns
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 class SQLUser(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Partial: only unverified accounts carry a token, so the index stays tiny
+        Index(
+            "ix_users_verification_token",
+            "verification_token",
+            postgresql_where="verification_token IS NOT NULL",
+        ),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     email = Column(String, unique=True, index=True, nullable=False)
@@ -12,19 +26,61 @@ class SQLUser(Base):
     full_name = Column(String)
     disabled = Column(Boolean, default=False)
     is_verified = Column(Boolean, default=False)
-    verification_token = Column(String, nullable=True)
+    verification_token = Column(String, nullable=True)  # hash_token() of the emailed token
+    verification_expires_at = Column(DateTime(timezone=True), nullable=True)
     plan = Column(String, default="basic")
     role = Column(String, default="learner")
     subscription_status = Column(String, default="trial")
     trial_ends_at = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # Bumped to revoke every outstanding self-contained access token
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime, default=utcnow_naive)
 
 class SQLResource(Base):
     __tablename__ = "resources"
-    
+    __table_args__ = (
+        # Keyset pagination order (see backend/pagination.py)
+        Index("ix_resources_created_at_id", "created_at", "id"),
+    )
+
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     title = Column(String, nullable=False)
     type = Column(String, nullable=False)
     description = Column(String)
     image = Column(String, nullable=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, nullable=False, default=utcnow_naive)
+
+class SQLRefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Every token rotated from the same login shares a family; reuse revokes the family
+    family_id = Column(String, nullable=False, index=True)
+    token_hash = Column(String(64), unique=True, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+class SQLEmailOutbox(Base):
+    """Transactional outbox: rows are committed with the triggering change and sent by EmailOutboxWorker."""
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index(
+            "ix_email_outbox_pending",
+            "next_attempt_at",
+            postgresql_where="status = 'pending'",
+        ),
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    to_emails = Column(JSONB, nullable=False)
+    subject = Column(String, nullable=False)
+    html_content = Column(Text, nullable=False)
+    from_email = Column(String, nullable=True)
+    status = Column(String, nullable=False, default="pending")  # pending, sent, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,113 @@
+"""
+Generation cache and single flight: model calls and latency for a realistic request mix.
+
+Fires --requests course generations through ai.build_course() at a stand-in Gemini
+client (each call takes --call-seconds). Topics come from --topics base topics, each
+asked in several spellings ("Intro to Python", "intro to python for beginners", ...),
+and every --double-click-th request is sent twice at once, as a double click does.
+Runs once with the cache disabled and once enabled, and reports model calls, wall time
+and the cache's own counters. Cached rows are removed afterwards.
+
+Usage (from the repo root, DATABASE_URL pointing at a migrated scratch database):
+    python -m benchmarks.ai_cache --requests 60 --topics 8 --concurrency 12
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+from sqlalchemy import text
+
+from backend.routers import ai
+from backend.services import generation_cache as cache_module
+from backend.sql_database import AsyncSessionLocal, engine
+
+COURSE = {
+    "title": "Benchmark course",
+    "description": "Generated by the benchmark stand-in.",
+    "modules": [{"title": "Module 1", "content": [{"type": "text", "title": "Lesson", "text": "...", "icon": "x"}]}],
+    "final_exam": [],
+}
+
+SPELLINGS = ("{}", "{} for beginners", "  {}!", "The {}", "{} (for Beginners)")
+
+
+class CountingModel:
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt: str):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.seconds)
+        if "Plan a comprehensive course" in prompt:
+            return SimpleNamespace(text=json.dumps({**COURSE, "modules": [{"title": "Module 1"}]}))
+        return SimpleNamespace(text=json.dumps(COURSE))
+
+
+def request_mix(requests: int, topics: int, double_click: int):
+    rnd = random.Random(11)
+    for i in range(requests):
+        topic = rnd.choice(SPELLINGS).format(f"Intro to Topic {rnd.randrange(topics)}")
+        yield [topic] * (2 if double_click and i % double_click == 0 else 1)
+
+
+async def run(enabled: bool, requests: int, topics: int, concurrency: int, double_click: int, seconds: float):
+    model = CountingModel(seconds)
+    ai.genai = SimpleNamespace(configure=lambda api_key: None, GenerativeModel=lambda name: model)
+    cache_module.GENERATION_CACHE_ENABLED = enabled
+    cache = cache_module.generation_cache = ai.generation_cache = cache_module.GenerationCache()
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def generate(topic: str):
+        async with gate:
+            start = time.perf_counter()
+            await ai.build_course(topic)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(generate(topic) for batch in request_mix(requests, topics, double_click) for topic in batch))
+    elapsed = time.perf_counter() - start
+    label = "cached" if enabled else "uncached"
+    latencies.sort()
+    print(
+        f"[{label}] {len(latencies)} generations in {elapsed:.2f}s, {model.calls} model calls, "
+        f"p50 latency {latencies[len(latencies) // 2]:.2f}s"
+    )
+    if enabled:
+        stats = cache.stats()
+        stats.pop("memory")
+        print(f"[{label}] cache stats: {stats}")
+
+
+async def main(requests: int, topics: int, concurrency: int, double_click: int, seconds: float):
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    ai.PROMPT_VERSION = f"bench-{uuid.uuid4().hex[:8]}"
+    try:
+        await run(False, requests, topics, concurrency, double_click, seconds)
+        await run(True, requests, topics, concurrency, double_click, seconds)
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("DELETE FROM generation_cache WHERE prompt_version = :v"), {"v": ai.PROMPT_VERSION})
+            await db.commit()
+        ai.course_generator.shutdown()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--topics", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=12)
+    parser.add_argument("--double-click", type=int, default=5)
+    parser.add_argument("--call-seconds", type=float, default=0.3)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.topics, args.concurrency, args.double_click, args.call_seconds))
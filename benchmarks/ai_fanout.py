@@ -0,0 +1,104 @@
+"""
+Course generation wall time: one big prompt vs. outline-then-fan-out.
+
+Runs ai.build_course() in both AI_GENERATION_MODEs against a stand-in Gemini client
+whose latency grows with the length of its answer (--seconds-per-module for each
+module's worth of text, as token generation does), and reports wall time and calls per
+section. --malformed N makes the first answer for N modules unparseable, to show that
+only those modules are generated again. No database is needed.
+
+Usage (from the repo root):
+    python -m benchmarks.ai_fanout --modules 6 --seconds-per-module 1.5 --malformed 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+from backend.routers import ai
+from backend.services import generation_cache as cache_module
+
+QUESTION = {"question": "Which?", "options": ["A", "B", "C", "D"], "correct_answer": "A"}
+
+
+def module(index: int) -> dict:
+    lesson = {"type": "text", "title": "Lesson", "text": "Lorem ipsum dolor sit amet. " * 40, "icon": "x"}
+    return {"title": f"Module {index + 1}", "content": [lesson] * 4, "quiz": [QUESTION] * 3}
+
+
+class SizedModel:
+    """Answers each kind of prompt with a matching document, sleeping per character."""
+
+    def __init__(self, modules: int, seconds_per_module: float, malformed: int):
+        self.modules = modules
+        self.seconds_per_char = seconds_per_module / len(json.dumps(module(0)))
+        self.malformed = set(range(malformed))
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def _answer(self, prompt: str):
+        if "Plan a comprehensive course" in prompt:
+            return "Outline", {
+                "title": "Benchmark course",
+                "description": "Generated by the benchmark stand-in.",
+                "modules": [{"title": f"Module {i + 1}", "summary": "..."} for i in range(self.modules)],
+            }
+        match = re.search(r"Write module (\d+)", prompt)
+        if match:
+            return f"Module {match.group(1)}", module(int(match.group(1)) - 1)
+        if "Write the final exam" in prompt:
+            return "Final exam", {"final_exam": [QUESTION] * 8}
+        return "Single prompt", {
+            "title": "Benchmark course",
+            "description": "Generated by the benchmark stand-in.",
+            "modules": [module(i) for i in range(self.modules)],
+            "final_exam": [QUESTION] * 8,
+        }
+
+    def generate_content(self, prompt: str):
+        label, document = self._answer(prompt)
+        text = json.dumps(document)
+        with self._lock:
+            self.calls[label] += 1
+            first_call = self.calls[label] == 1
+        time.sleep(len(text) * self.seconds_per_char)
+        index = int(label.split()[1]) - 1 if label.startswith("Module") else None
+        if first_call and index in self.malformed:
+            text = text[: len(text) // 2]
+        return SimpleNamespace(text=text)
+
+
+async def run(mode: str, modules: int, seconds_per_module: float, malformed: int):
+    model = SizedModel(modules, seconds_per_module, malformed if mode == "fanout" else 0)
+    ai.genai = SimpleNamespace(configure=lambda api_key: None, GenerativeModel=lambda name: model)
+    ai.AI_GENERATION_MODE = mode
+    start = time.perf_counter()
+    course = await ai.build_course("Benchmarks")
+    elapsed = time.perf_counter() - start
+    print(
+        f"[{mode}] {len(course['modules'])} modules, {len(course['final_exam'])} exam questions "
+        f"in {elapsed:.2f}s, {sum(model.calls.values())} calls: {dict(sorted(model.calls.items()))}"
+    )
+
+
+async def main(modules: int, seconds_per_module: float, malformed: int):
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    # Every run must really generate; identical topics would otherwise be served from cache
+    cache_module.GENERATION_CACHE_ENABLED = False
+    await run("single", modules, seconds_per_module, malformed)
+    await run("fanout", modules, seconds_per_module, malformed)
+    ai.course_generator.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", type=int, default=6)
+    parser.add_argument("--seconds-per-module", type=float, default=1.5)
+    parser.add_argument("--malformed", type=int, default=2)
+    args = parser.parse_args()
+    asyncio.run(main(args.modules, args.seconds_per_module, args.malformed))
@@ -0,0 +1,122 @@
+"""
+Catalog latency while AI course generations run: SDK call inline vs. the generation pool.
+
+Drives the real POST /api/ai/generate-course handler in-process with a stand-in Gemini
+client whose generate_content() blocks for --generation-seconds (as the SDK does while it
+waits on the network), and meanwhile probes GET /api/courses/ every few milliseconds.
+"inline" restores the old behaviour of calling the SDK on the event loop; "pool" uses
+services/course_generator.py. Generations over capacity are answered 503 and counted.
+
+Usage (from the repo root, DATABASE_URL pointing at a migrated scratch database):
+    python -m benchmarks.ai_generation --generations 6 --generation-seconds 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from backend.routers import ai
+from backend.services import generation_cache as cache_module
+from backend.server import app
+from backend.services import course_generator as generator_module
+from backend.sql_database import engine
+
+COURSE = {
+    "title": "Benchmark course",
+    "description": "Generated by the benchmark stand-in.",
+    "modules": [{"title": "Module 1", "content": [{"type": "text", "title": "Lesson", "text": "...", "icon": "x"}]}],
+    "final_exam": [],
+}
+
+
+class BlockingModel:
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def generate_content(self, prompt: str):
+        time.sleep(self.seconds)
+        return SimpleNamespace(text=json.dumps(COURSE))
+
+
+def stand_in_genai(seconds: float):
+    return SimpleNamespace(configure=lambda api_key: None, GenerativeModel=lambda name: BlockingModel(seconds))
+
+
+class InlineGenerator:
+    """The pre-pool behaviour: the blocking call runs on the event loop."""
+
+    async def generate(self, model, prompt: str):
+        return model.generate_content(prompt)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, latencies: list, interval: float = 0.02):
+    # Latency counts from when the request was due, so time spent waiting for a blocked loop is included
+    while not stop.is_set():
+        due = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        await client.get("/api/courses/", params={"limit": 20, "view": "summary"})
+        latencies.append((time.perf_counter() - due) * 1000)
+
+
+async def run(mode: str, client: httpx.AsyncClient, generations: int):
+    ai.course_generator = InlineGenerator() if mode == "inline" else generator_module.CourseGenerator()
+    statuses = []
+
+    async def generate():
+        response = await client.post("/api/ai/generate-course", json={"topic": "Benchmarks"})
+        statuses.append(response.status_code)
+
+    stop = asyncio.Event()
+    latencies = []
+    probe_task = asyncio.create_task(probe(client, stop, latencies))
+    await asyncio.sleep(0.2)
+    start = time.perf_counter()
+    await asyncio.gather(*(generate() for _ in range(generations)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+
+    print(
+        f"[{mode}] {statuses.count(200)} generations in {elapsed:.2f}s, "
+        f"{statuses.count(503)} shed with 503, other statuses: {[s for s in statuses if s not in (200, 503)]}"
+    )
+    print(
+        f"[{mode}] catalog latency over {len(latencies)} requests: p50={statistics.median(latencies or [0]):.1f}ms "
+        f"p99={percentile(latencies, 99):.1f}ms max={max(latencies or [0]):.1f}ms"
+    )
+    if mode == "pool":
+        print(f"[{mode}] pool stats: {ai.course_generator.stats()}")
+        ai.course_generator.shutdown()
+
+
+async def main(generations: int, seconds: float):
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    # Every run must really generate; identical topics would otherwise be served from cache
+    cache_module.GENERATION_CACHE_ENABLED = False
+    ai.genai = stand_in_genai(seconds)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        await client.get("/api/courses/")  # warm up the pool and the catalog cache
+        await run("inline", client, generations)
+        await run("pool", client, generations)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--generations", type=int, default=6)
+    parser.add_argument("--generation-seconds", type=float, default=2.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.generations, args.generation_seconds))
@@ -0,0 +1,146 @@
+"""
+Time to first module: blocking course generation vs. the SSE stream.
+
+Drives POST /api/ai/generate-course and POST /api/ai/generate-course/stream in-process
+with a stand-in Gemini client that writes a --modules module course over
+--generation-seconds, in --chunks evenly spaced chunks (as the streaming API delivers
+them). Reports when the first module reached the client and when the course was
+complete, for each endpoint.
+
+Usage (from the repo root, DATABASE_URL pointing at a migrated scratch database):
+    python -m benchmarks.ai_streaming --modules 5 --generation-seconds 10 --chunks 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from backend.routers import ai
+from backend.services import generation_cache as cache_module
+from backend.server import app
+from backend.sql_database import engine
+
+
+def course_text(modules: int) -> str:
+    lesson = {"type": "text", "title": "Lesson", "text": "Lorem ipsum dolor sit amet. " * 40, "icon": "x"}
+    question = {"question": "Which?", "options": ["A", "B", "C", "D"], "correct_answer": "A"}
+    return "```json\n" + json.dumps({
+        "title": "Benchmark course",
+        "description": "Generated by the benchmark stand-in.",
+        "modules": [
+            {"title": f"Module {i + 1}", "content": [lesson] * 4, "quiz": [question] * 3}
+            for i in range(modules)
+        ],
+        "final_exam": [question] * 8,
+    }, indent=2) + "\n```"
+
+
+class StreamingModel:
+    """Emits the course over `seconds`, whole (stream=False) or in `chunks` pieces."""
+
+    def __init__(self, text: str, seconds: float, chunks: int):
+        self.text, self.seconds, self.chunks = text, seconds, chunks
+
+    def generate_content(self, prompt: str, stream: bool = False):
+        if not stream:
+            time.sleep(self.seconds)
+            return SimpleNamespace(text=self.text)
+        return self._stream()
+
+    def _stream(self):
+        size = -(-len(self.text) // self.chunks)
+        for start in range(0, len(self.text), size):
+            time.sleep(self.seconds / self.chunks)
+            yield SimpleNamespace(text=self.text[start:start + size])
+
+
+async def blocking(client: httpx.AsyncClient):
+    start = time.perf_counter()
+    response = await client.post("/api/ai/generate-course", json={"topic": "Benchmarks"})
+    elapsed = time.perf_counter() - start
+    modules = len(response.json()["modules"])
+    print(f"[blocking] status {response.status_code}: first module and full course ({modules} modules) after {elapsed:.2f}s")
+
+
+async def asgi_post_stream(path: str, payload: dict):
+    """
+    POST to the app and yield body chunks as the app sends them. httpx's ASGITransport
+    buffers whole responses, which would hide exactly what is being measured.
+    """
+    body = json.dumps(payload).encode()
+    chunks: asyncio.Queue = asyncio.Queue()
+    requested, disconnected = False, asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            await chunks.put(message.get("body", b""))
+            if not message.get("more_body", False):
+                await chunks.put(None)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    task = asyncio.create_task(app(scope, receive, send))
+    try:
+        while (chunk := await chunks.get()) is not None:
+            yield chunk
+    finally:
+        disconnected.set()
+        await task
+
+
+async def streamed():
+    start = time.perf_counter()
+    arrivals, event, buffer, modules = {}, None, "", 0
+    async for chunk in asgi_post_stream("/api/ai/generate-course/stream", {"topic": "Benchmarks"}):
+        buffer += chunk.decode()
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+                arrivals.setdefault(event, []).append(time.perf_counter() - start)
+            elif line.startswith("data: ") and event == "done":
+                modules = len(json.loads(line[len("data: "):])["modules"])
+    module_times = arrivals.get("module", [])
+    print(
+        f"[stream] first module after {module_times[0]:.2f}s, {len(module_times)} modules streamed, "
+        f"full course ({modules} modules) after {arrivals['done'][0]:.2f}s"
+    )
+    print(f"[stream] module arrival times: {', '.join(f'{t:.2f}s' for t in module_times)}")
+
+
+async def main(modules: int, seconds: float, chunks: int):
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    # Every run must really generate; identical topics would otherwise be served from cache
+    cache_module.GENERATION_CACHE_ENABLED = False
+    model = StreamingModel(course_text(modules), seconds, chunks)
+    ai.genai = SimpleNamespace(configure=lambda api_key: None, GenerativeModel=lambda name: model)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        await blocking(client)
+    await streamed()
+    ai.course_generator.shutdown()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", type=int, default=5)
+    parser.add_argument("--generation-seconds", type=float, default=10.0)
+    parser.add_argument("--chunks", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.modules, args.generation_seconds, args.chunks))
@@ -0,0 +1,112 @@
+"""
+Course write benchmark: SELECT + ORM mutate + commit + refresh vs. UPDATE/DELETE ... RETURNING.
+
+Runs N update and N delete operations against a real database with each strategy and
+reports database round trips per operation (statements plus BEGIN/COMMIT, counted with
+engine events) and p50/p99 latency. The saving per operation is roughly the removed
+round trips times the network RTT to Postgres, so run it against a remote database to
+see production-like numbers.
+
+Usage (from the repo root, DATABASE_URL pointing at a migrated scratch database):
+    python -m benchmarks.course_writes --ops 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import event, select
+
+from backend import crud
+from backend.course_model import CourseModel
+from backend.schemas import CourseCreate, CourseUpdate
+from backend.sql_database import AsyncSessionLocal, engine
+
+MODULES = [{"id": i, "title": f"Module {i}", "type": "text", "content": "x" * 2000} for i in range(8)]
+
+
+class RoundTrips:
+    def __init__(self):
+        self.count = 0
+        sync_engine = engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self.bump)
+        event.listen(sync_engine, "begin", self.bump)
+        event.listen(sync_engine, "commit", self.bump)
+        event.listen(sync_engine, "rollback", self.bump)
+
+    def bump(self, *args, **kwargs):
+        self.count += 1
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def legacy_update(db, course_id: int, course: CourseUpdate):
+    # The pre-RETURNING implementation of crud.update_course
+    result = await db.execute(select(CourseModel).where(CourseModel.id == course_id))
+    db_course = result.scalar_one_or_none()
+    if db_course is None:
+        return None
+    if course.title is not None:
+        db_course.title = course.title
+    await db.commit()
+    await db.refresh(db_course)
+    return db_course
+
+
+async def legacy_delete(db, course_id: int):
+    result = await db.execute(select(CourseModel).where(CourseModel.id == course_id))
+    db_course = result.scalar_one_or_none()
+    if db_course is None:
+        return False
+    await db.delete(db_course)
+    await db.commit()
+    return True
+
+
+async def seed(count: int):
+    ids = []
+    for i in range(count):
+        async with AsyncSessionLocal() as db:
+            course = await crud.create_course(db, CourseCreate(title=f"bench {i}", modules=MODULES))
+            ids.append(course.id)
+    return ids
+
+
+async def measure(label: str, ids, op, trips: RoundTrips):
+    latencies = []
+    before = trips.count
+    for course_id in ids:
+        async with AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            await op(db, course_id)
+            latencies.append((time.perf_counter() - start) * 1000)
+    per_op = (trips.count - before) / len(ids)
+    print(
+        f"[{label}] {per_op:.1f} round trips/op, "
+        f"p50={statistics.median(latencies):.2f}ms p99={percentile(latencies, 99):.2f}ms"
+    )
+
+
+async def main(ops: int):
+    trips = RoundTrips()
+    update = CourseUpdate(title="renamed")
+    ids = await seed(ops)
+
+    await measure("update legacy", ids, lambda db, i: legacy_update(db, i, update), trips)
+    await measure("update returning", ids, lambda db, i: crud.update_course(db, i, update), trips)
+
+    half = len(ids) // 2
+    await measure("delete legacy", ids[:half], legacy_delete, trips)
+    await measure("delete returning", ids[half:], crud.delete_course, trips)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.ops))
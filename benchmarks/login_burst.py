@@ -0,0 +1,94 @@
+"""
+Login burst benchmark: bcrypt inline on the event loop vs. the bounded hashing pool.
+
+Simulates N concurrent logins (one bcrypt verify each) while an "unrelated endpoint"
+probe runs every few milliseconds on the same loop, then reports login throughput and
+the p50/p99 latency seen by the probe.
+
+Usage (from the repo root):
+    python -m benchmarks.login_burst --logins 200 --concurrency 50
+
+Pool sizing comes from the usual PASSWORD_HASH_* environment variables. Logins shed by
+backpressure (the API would answer 503) are counted separately from completed ones.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from backend.security import get_password_hash, verify_password
+from backend.services.password_hasher import PasswordHasher
+from backend.services.worker_pool import PoolSaturatedError
+
+PASSWORD = "correct horse battery staple"
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def probe(stop: asyncio.Event, latencies: list, interval: float = 0.005):
+    # Stand-in for a cheap unrelated request: measures how late the loop schedules us.
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        latencies.append((time.perf_counter() - start - interval) * 1000)
+
+
+async def run(mode: str, hashed: str, logins: int, concurrency: int):
+    hasher = PasswordHasher()
+    gate = asyncio.Semaphore(concurrency)
+    rejected = 0
+
+    async def login():
+        nonlocal rejected
+        async with gate:
+            if mode == "inline":
+                verify_password(PASSWORD, hashed)
+                return
+            try:
+                await hasher.verify(PASSWORD, hashed)
+            except PoolSaturatedError:
+                rejected += 1
+
+    stop = asyncio.Event()
+    latencies = []
+    probe_task = asyncio.create_task(probe(stop, latencies))
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+    hasher.shutdown()
+
+    completed = logins - rejected
+    print(
+        f"[{mode}] {completed} logins in {elapsed:.2f}s -> {completed / elapsed:.1f} logins/s"
+        f" ({rejected} shed with 503)"
+    )
+    print(
+        f"[{mode}] unrelated request added latency: "
+        f"p50={statistics.median(latencies or [0]):.1f}ms "
+        f"p99={percentile(latencies, 99):.1f}ms max={max(latencies or [0]):.1f}ms"
+    )
+    if mode == "pool":
+        print(f"[{mode}] pool stats: {hasher.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    hashed = get_password_hash(PASSWORD)
+    for mode in ("inline", "pool"):
+        asyncio.run(run(mode, hashed, args.logins, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Progress ping benchmark: one merge UPDATE per tick vs. the coalescing ProgressBuffer.
+
+Seeds a course with L lessons and E enrollments, then fires T ticks spread over the
+enrollments with C concurrent senders, once writing each tick directly and once through
+the buffer (followed by a final flush). Reports ticks/s, DB transactions and the
+buffer's flush metrics. Seeded rows are removed afterwards.
+
+Usage (from the repo root, DATABASE_URL pointing at a migrated scratch database):
+    python -m benchmarks.progress_pings --enrollments 200 --ticks 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from sqlalchemy import event, text
+
+from backend.progress import lesson_index, merge_progress
+from backend.services import progress_buffer as buffer_module
+from backend.services.progress_buffer import ProgressBuffer
+from backend.sql_database import AsyncSessionLocal, engine
+
+
+class Commits:
+    def __init__(self):
+        self.count = 0
+        event.listen(engine.sync_engine, "commit", self.bump)
+
+    def bump(self, *args):
+        self.count += 1
+
+
+async def seed(enrollments: int, lessons: int):
+    tag = uuid.uuid4().hex[:8]
+    modules = [{"id": f"m{i}", "content": [{"title": str(j)} for j in range(lessons // 5)]} for i in range(5)]
+    index = lesson_index(modules)
+    async with AsyncSessionLocal() as db:
+        course_id = (await db.execute(
+            text("INSERT INTO courses (title, modules, lesson_ids, lesson_count, quiz_count)"
+                 " VALUES (:title, CAST(:modules AS jsonb), CAST(:lesson_ids AS jsonb), :lesson_count, :quiz_count)"
+                 " RETURNING id"),
+            {"title": f"bench {tag}", "modules": json.dumps(modules), **index, "lesson_ids": json.dumps(index["lesson_ids"])},
+        )).scalar_one()
+        pairs = []
+        for i in range(enrollments):
+            user_id, enrollment_id = f"bench-{tag}-{i}", str(uuid.uuid4())
+            await db.execute(
+                text("INSERT INTO users (id, email, hashed_password) VALUES (:id, :email, 'x')"),
+                {"id": user_id, "email": f"{user_id}@bench.invalid"},
+            )
+            await db.execute(
+                text("INSERT INTO enrollments (id, user_id, course_id, progress_data, is_completed, is_paid)"
+                     " VALUES (:id, :user_id, :course_id, '{}', false, false)"),
+                {"id": enrollment_id, "user_id": user_id, "course_id": course_id},
+            )
+            pairs.append((enrollment_id, user_id))
+        await db.commit()
+    return course_id, tag, pairs
+
+
+async def cleanup(course_id: int, tag: str):
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("DELETE FROM enrollments WHERE course_id = :id"), {"id": course_id})
+        await db.execute(text("DELETE FROM courses WHERE id = :id"), {"id": course_id})
+        await db.execute(text("DELETE FROM users WHERE id LIKE :prefix"), {"prefix": f"bench-{tag}-%"})
+        await db.commit()
+
+
+def ticks(pairs, count: int, lessons: int):
+    rnd = random.Random(7)
+    for _ in range(count):
+        enrollment_id, user_id = rnd.choice(pairs)
+        lesson = rnd.randrange(lessons)
+        yield enrollment_id, user_id, {f"m{lesson % 5}": {str(lesson // 5): True}}
+
+
+async def run(mode: str, pairs, count: int, lessons: int, concurrency: int, commits: Commits):
+    gate = asyncio.Semaphore(concurrency)
+    buffer = ProgressBuffer()
+    if mode == "buffered":
+        buffer_module.PROGRESS_BUFFER_ENABLED = True
+        buffer.start()
+
+    async def send(enrollment_id, user_id, delta):
+        async with gate:
+            if mode == "buffered" and buffer.submit(enrollment_id, user_id, delta):
+                return
+            async with AsyncSessionLocal() as db:
+                await merge_progress(db, enrollment_id, user_id, delta)
+                await db.commit()
+
+    before = commits.count
+    start = time.perf_counter()
+    await asyncio.gather(*(send(*tick) for tick in ticks(pairs, count, lessons)))
+    acked = time.perf_counter() - start
+    if mode == "buffered":
+        await buffer.stop()
+    elapsed = time.perf_counter() - start
+    print(
+        f"[{mode}] {count} ticks acknowledged in {acked:.2f}s -> {count / acked:.0f} ticks/s, "
+        f"persisted after {elapsed:.2f}s, {commits.count - before} DB transactions"
+    )
+    if mode == "buffered":
+        print(f"[{mode}] buffer stats: {buffer.stats()}")
+
+
+async def main(enrollments: int, count: int, lessons: int, concurrency: int):
+    commits = Commits()
+    course_id, tag, pairs = await seed(enrollments, lessons)
+    try:
+        await run("direct", pairs, count, lessons, concurrency, commits)
+        await run("buffered", pairs, count, lessons, concurrency, commits)
+    finally:
+        await cleanup(course_id, tag)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--enrollments", type=int, default=200)
+    parser.add_argument("--ticks", type=int, default=5000)
+    parser.add_argument("--lessons", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.enrollments, args.ticks, args.lessons, args.concurrency))
@@ -0,0 +1,64 @@
+"""
+Batch quiz grading: per-question Python loop vs. backend.grading.grade_batch.
+
+Generates N random submissions to a Q-question quiz with O options, encodes them once
+(as the grade-batch endpoint does), then grades them both ways and checks the scores
+agree. Only grading is timed; request parsing and the attempts INSERT are not included.
+
+Usage (from the repo root):
+    python -m benchmarks.quiz_grading --submissions 10000 --questions 20
+"""
+import argparse
+import random
+import time
+
+from backend.grading import encode_answers, grade_batch
+
+
+def loop_grade(key, submissions):
+    scores = [0] * len(submissions)
+    question_correct = [0] * len(key)
+    for s, answers in enumerate(submissions):
+        for q, (expected, given) in enumerate(zip(key, answers)):
+            if expected == given:
+                scores[s] += 1
+                question_correct[q] += 1
+    return scores, question_correct
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--submissions", type=int, default=10000)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--options", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rnd = random.Random(7)
+    key = bytes(rnd.randrange(args.options) for _ in range(args.questions))
+    submissions = [
+        encode_answers([rnd.randrange(args.options) for _ in range(args.questions)], args.questions)
+        for _ in range(args.submissions)
+    ]
+
+    graded = grade_batch(key, submissions)
+    assert (graded.scores, graded.question_correct) == loop_grade(key, submissions)
+
+    loop = best_of(lambda: loop_grade(key, submissions), args.repeat)
+    batch = best_of(lambda: grade_batch(key, submissions), args.repeat)
+    print(f"{args.submissions} submissions x {args.questions} questions")
+    print(f"  python loop : {loop * 1000:8.2f} ms")
+    print(f"  grade_batch : {batch * 1000:8.2f} ms  ({loop / batch:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
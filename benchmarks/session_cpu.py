@@ -0,0 +1,68 @@
+"""
+CPU cost of keeping one learner signed in for an hour: re-login vs. refresh rotation.
+
+Before: every ACCESS_TOKEN_EXPIRE_MINUTES the client re-submits the password, costing a
+bcrypt verify plus an access-token encode. After: the client calls /api/auth/refresh,
+costing an HMAC of the presented token, a new opaque token with its HMAC, and an
+access-token encode.
+
+Only application CPU is measured (time.process_time); the refresh path's single indexed
+UPDATE ... RETURNING is database time and is not included.
+
+Usage (from the repo root):
+    python -m benchmarks.session_cpu --samples 20
+"""
+import argparse
+import time
+
+from backend.security import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    create_access_token,
+    generate_opaque_token,
+    get_password_hash,
+    hash_token,
+    verify_password,
+)
+
+PASSWORD = "correct horse battery staple"
+CLAIMS = {"sub": "learner@example.com"}
+
+
+def cpu_per_call(fn, samples: int) -> float:
+    start = time.process_time()
+    for _ in range(samples):
+        fn()
+    return (time.process_time() - start) / samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=20, help="bcrypt iterations to average over")
+    args = parser.parse_args()
+
+    hashed = get_password_hash(PASSWORD)
+    presented = generate_opaque_token()
+
+    def relogin():
+        verify_password(PASSWORD, hashed)
+        create_access_token(CLAIMS)
+
+    def refresh():
+        hash_token(presented)
+        hash_token(generate_opaque_token())
+        create_access_token(CLAIMS)
+
+    renewals_per_hour = 60 / ACCESS_TOKEN_EXPIRE_MINUTES
+    before = cpu_per_call(relogin, args.samples) * renewals_per_hour
+    after = cpu_per_call(refresh, args.samples * 500) * renewals_per_hour
+
+    print(f"Token renewals per active user-hour: {renewals_per_hour:.1f}")
+    print(f"Before (password re-login): {before * 1000:.3f} ms CPU per user-hour "
+          f"-> {3600 / before:,.0f} active users per core")
+    print(f"After  (refresh rotation):  {after * 1000:.3f} ms CPU per user-hour "
+          f"-> {3600 / after:,.0f} active users per core")
+    print(f"Reduction: {before / after:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Minimal SMTP sink for load-testing the email outbox offline.
+
+Accepts every message, optionally sleeps to mimic provider latency, discards the body
+and prints throughput once per second.
+
+Usage (from the repo root):
+    python -m benchmarks.smtp_sink --port 1025 --latency-ms 150
+    EMAIL_TRANSPORT=smtp SMTP_HOST=localhost SMTP_PORT=1025 uvicorn backend.server:app
+
+Then drive POST /api/auth/signup with any HTTP load tool. Signup latency should not
+depend on --latency-ms, and the outbox counters under /api/metrics show drain progress.
+"""
+import argparse
+import asyncio
+import time
+
+received = 0
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, latency: float):
+    global received
+
+    async def reply(line: str):
+        writer.write((line + "\r\n").encode())
+        await writer.drain()
+
+    await reply("220 learnflow-sink ready")
+    in_data = False
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if in_data:
+                if line in (b".\r\n", b".\n"):
+                    in_data = False
+                    if latency:
+                        await asyncio.sleep(latency)
+                    received += 1
+                    await reply("250 OK queued")
+                continue
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                await reply("250 learnflow-sink")
+            elif command == "DATA":
+                in_data = True
+                await reply("354 End data with <CR><LF>.<CR><LF>")
+            elif command == "QUIT":
+                await reply("221 Bye")
+                break
+            else:
+                # MAIL FROM, RCPT TO, RSET, NOOP ...
+                await reply("250 OK")
+    finally:
+        writer.close()
+
+
+async def report():
+    last, last_at = 0, time.monotonic()
+    while True:
+        await asyncio.sleep(1)
+        now = time.monotonic()
+        if received != last:
+            print(f"{received} messages total, {(received - last) / (now - last_at):.1f} msg/s")
+        last, last_at = received, now
+
+
+async def main(host: str, port: int, latency: float):
+    server = await asyncio.start_server(lambda r, w: handle(r, w, latency), host, port)
+    print(f"SMTP sink listening on {host}:{port} (latency {latency * 1000:.0f} ms)")
+    async with server:
+        await asyncio.gather(server.serve_forever(), report())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.host, args.port, args.latency_ms / 1000))
+    except KeyboardInterrupt:
+        pass
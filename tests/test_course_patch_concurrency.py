@@ -0,0 +1,73 @@
+"""
+Concurrent JSON Patch writes to one course must not lose each other's edits.
+
+Needs DATABASE_URL pointing at a migrated scratch database; skipped otherwise.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import select, text
+
+from backend import crud
+from backend.course_model import CourseModel
+from backend.json_patch import JsonPatchOperation
+from backend.schemas import CourseCreate
+from backend.sql_database import AsyncSessionLocal, engine
+
+
+async def _database_available() -> bool:
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1 FROM courses LIMIT 1"))
+        return True
+    except Exception:
+        return False
+
+
+async def _patch(course_id: int, path: str, value):
+    operations = [JsonPatchOperation.model_validate({"op": "replace", "path": path, "value": value})]
+    async with AsyncSessionLocal() as db:
+        return await crud.patch_course_modules(db, course_id, operations, expected_version=None)
+
+
+async def _blocked_on_locks(count: int):
+    while True:
+        async with engine.connect() as conn:
+            waiting = (await conn.execute(text(
+                "SELECT count(*) FROM pg_stat_activity WHERE wait_event_type = 'Lock' AND datname = current_database()"
+            ))).scalar()
+        if waiting >= count:
+            return
+        await asyncio.sleep(0.02)
+
+
+async def _concurrent_wildcard_patches():
+    if not await _database_available():
+        await engine.dispose()
+        pytest.skip("DATABASE_URL does not point at a migrated database")
+    async with AsyncSessionLocal() as db:
+        course = await crud.create_course(db, CourseCreate(title="concurrency", modules=[{"title": "A"}, {"title": "B"}]))
+    try:
+        # Hold the row so both patches start while it is locked and have to wait for it
+        async with AsyncSessionLocal() as holder:
+            await holder.execute(select(CourseModel.id).where(CourseModel.id == course.id).with_for_update())
+            first = asyncio.create_task(_patch(course.id, "/0/title", "first"))
+            second = asyncio.create_task(_patch(course.id, "/1/title", "second"))
+            await asyncio.wait_for(_blocked_on_locks(2), timeout=10)
+            await holder.commit()
+        versions = await asyncio.gather(first, second)
+
+        async with AsyncSessionLocal() as db:
+            stored = await crud.get_course(db, course.id)
+        return sorted(versions), stored.modules, stored.version
+    finally:
+        async with AsyncSessionLocal() as db:
+            await crud.delete_course(db, course.id)
+        await engine.dispose()
+
+
+def test_concurrent_wildcard_patches_keep_both_edits():
+    versions, modules, version = asyncio.run(_concurrent_wildcard_patches())
+    assert versions == [2, 3]
+    assert version == 3
+    assert [module["title"] for module in modules] == ["first", "second"]